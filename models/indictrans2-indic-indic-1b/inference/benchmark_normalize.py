@@ -0,0 +1,100 @@
+"""
+Microbenchmark for `normalize_regex_inference.normalize`.
+
+Times the fast path (`wrap_with_placeholders_fast` + `str.translate` numerals) against the reference
+implementation (`wrap_with_placeholders` + per-character numeral mapping) on a corpus. That both
+produce identical output is checked by tests/test_normalize.py at the repository root.
+
+Usage (from the model directory):
+    python -m inference.benchmark_normalize                     # synthetic corpus of 100000 sentences
+    python -m inference.benchmark_normalize --size 500000
+    python -m inference.benchmark_normalize --corpus sents.txt  # one sentence per line
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from .indic_num_map import INDIC_NUM_MAP
+from .normalize_regex_inference import DEFAULT_PATTERNS, normalize, wrap_with_placeholders
+
+TEMPLATES = [
+    "Drink at least 8 glasses of water every day and avoid sugary drinks.",
+    "पर्याप्त नींद लें और रोज़ाना ३० मिनट टहलें।",
+    "உங்கள் இரத்த அழுத்தத்தை தினமும் சரிபார்க்கவும்.",
+    "നിങ്ങളുടെ ഡോക്ടറെ {date} ന് കാണുക.",
+    "Take the tablet at {time} after breakfast.",
+    "Your HbA1c was {percent} on {date}.",
+    "Book an appointment at {url} or write to {email}.",
+    "मरीज़ का रक्तचाप {ratio} है, डॉक्टर से संपर्क करें {phone}.",
+    "Follow {handle} and use {hashtag} for daily tips.",
+    "Pay the consultation fee to {upi} before {time}.",
+    "Reduce salt to {range} grams per day.",
+    "डॉ. ए. के. शर्मा से मिलें।",
+    "Emergency: call 108|102 or visit e.g. the nearest PHC.",
+    "Dose: １２.５ mg at ０８:３０,  twice\ta day >/ as advised.",
+]
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    digits = "".join(rng.choice([k for k, v in INDIC_NUM_MAP.items() if v == d]) for d in str(rng.randint(10, 99)))
+    return template.format(
+        date=f"{rng.randint(1, 28)}/{rng.randint(1, 12)}/20{rng.randint(10, 30)}",
+        time=f"{rng.randint(1, 12)}:{rng.randint(0, 59):02d}",
+        percent=f"{rng.randint(5, 12)}.{rng.randint(0, 9)}%",
+        url=rng.choice(["www.aarogya.in/book", "https://clinic.example.org/a?id=12", "health.gov.in"]),
+        email=f"patient{rng.randint(1, 999)}@example.com",
+        ratio=f"{rng.randint(100, 160)}/{rng.randint(60, 100)}",
+        phone=f"98{rng.randint(10000000, 99999999)}",
+        handle=f"@aarogya{rng.randint(1, 99)}",
+        hashtag=rng.choice(["#HealthyLiving", "#diabetes", "#" + digits]),
+        upi=f"clinic{rng.randint(1, 99)}@upi",
+        range=f"{rng.randint(2, 4)}-{rng.randint(5, 6)}",
+    )
+
+
+def synthetic_corpus(size: int, seed: int = 0) -> List[str]:
+    """
+    Builds a corpus of health-domain sentences mixing plain text with URLs, emails, dates, ratios,
+    handles and Indic numerals.
+
+    Args:
+        size (int): number of sentences.
+        seed (int, optional): random seed (defaults: 0).
+
+    Returns:
+        List[str]: the sentences.
+    """
+    rng = random.Random(seed)
+    return [_fill(rng.choice(TEMPLATES), rng) for _ in range(size)]
+
+
+def reference_normalize(text: str):
+    text = "".join([INDIC_NUM_MAP.get(c, c) for c in text.strip("\n")])
+    return wrap_with_placeholders(text, DEFAULT_PATTERNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000, help="size of the synthetic corpus")
+    parser.add_argument("--corpus", help="file with one sentence per line (instead of the synthetic corpus)")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            sents = [line.rstrip("\n") for line in f]
+    else:
+        sents = synthetic_corpus(args.size)
+
+    timings = {}
+    for name, fn in [("reference", reference_normalize), ("fast", normalize)]:
+        start = time.perf_counter()
+        for sent in sents:
+            fn(sent)
+        timings[name] = time.perf_counter() - start
+        print(f"{name:>9}: {timings[name]:.3f}s ({1e6 * timings[name] / max(len(sents), 1):.1f} us/sentence)")
+    print(f"  speedup: {timings['reference'] / max(timings['fast'], 1e-9):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
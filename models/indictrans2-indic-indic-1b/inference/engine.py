@@ -1,7 +1,10 @@
 import hashlib
+import multiprocessing
 import os
+import threading
 import uuid
-from typing import List, Tuple, Union, Dict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple, Union, Dict
 
 import regex as re
 import sentencepiece as spm
@@ -17,9 +20,67 @@ from tqdm import tqdm
 from .flores_codes_map_indic import flores_codes, iso_to_flores
 from .normalize_punctuation import punc_norm
 from .normalize_regex_inference import EMAIL_PATTERN, normalize
+from .translation_memory import TranslationMemory, model_checksum
 
+# max_input_length of the CTranslate2 decoder; longer inputs would be silently truncated.
+MAX_INPUT_LENGTH = 160
+# the source and target language tags plus the end-of-sentence token count towards that length.
+NUM_SPECIAL_TOKENS = 3
+# pieces after which a long sentence is preferably split.
+CLAUSE_PUNCTUATION = {",", ";", ":", "।", "॥", "|", "،", "؛", "?", "!", "—"}
+# scripts written without spaces between words; translated segments are joined without a space.
+UNSPACED_SCRIPTS = {"Hans", "Hant", "Jpan", "Khmr", "Laoo", "Mymr", "Thai", "Tibt"}
 
-def split_sentences(paragraph: str, lang: str) -> List[str]:
+
+class SentenceSplitterPool:
+    """
+    Keeps one `MosesSentenceSplitter` (a long-running Perl subprocess) per language instead of
+    starting a new one for every paragraph. A splitter talks to its subprocess over a pipe, so each
+    one is guarded by its own lock; a splitter whose subprocess died is replaced on the next call.
+    """
+
+    def __init__(self):
+        self._splitters = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _lock_for(self, lang: str) -> threading.Lock:
+        with self._lock:
+            if lang not in self._locks:
+                self._locks[lang] = threading.Lock()
+            return self._locks[lang]
+
+    def split(self, paragraph: str, lang: str) -> List[str]:
+        """
+        Splits a paragraph with the pooled Moses splitter of a language.
+
+        Args:
+            paragraph (str): input text paragraph.
+            lang (str): iso language code understood by Moses.
+
+        Returns:
+            List[str] -> list of sentences.
+        """
+        with self._lock_for(lang):
+            splitter = self._splitters.get(lang)
+            if splitter is None:
+                splitter = self._splitters[lang] = MosesSentenceSplitter(lang)
+            try:
+                return splitter([paragraph])
+            except (BrokenPipeError, OSError):
+                splitter.close()
+                splitter = self._splitters[lang] = MosesSentenceSplitter(lang)
+                return splitter([paragraph])
+
+    def close(self):
+        """Stops the pooled splitter subprocesses."""
+        with self._lock:
+            for splitter in self._splitters.values():
+                splitter.close()
+            self._splitters.clear()
+
+
+def split_sentences(paragraph: str, lang: str, splitter_pool: Optional[SentenceSplitterPool] = None) -> List[str]:
     """
     Splits the input text paragraph into sentences. It uses `moses` for English and
     `indic-nlp` for Indic languages.
@@ -27,13 +88,18 @@ def split_sentences(paragraph: str, lang: str) -> List[str]:
     Args:
         paragraph (str): input text paragraph.
         lang (str): flores language code.
+        splitter_pool (SentenceSplitterPool, optional): pool of reusable Moses splitters; without one a
+            splitter is started (and stopped) for this call only (defaults: None).
 
     Returns:
         List[str] -> list of sentences.
     """
     if lang == "eng_Latn":
-        with MosesSentenceSplitter(flores_codes[lang]) as splitter:
-            sents_moses = splitter([paragraph])
+        if splitter_pool is not None:
+            sents_moses = splitter_pool.split(paragraph, flores_codes[lang])
+        else:
+            with MosesSentenceSplitter(flores_codes[lang]) as splitter:
+                sents_moses = splitter([paragraph])
         sents_nltk = sent_tokenize(paragraph)
         if len(sents_nltk) < len(sents_moses):
             sents = sents_nltk
@@ -81,38 +147,109 @@ def apply_lang_tags(sents: List[str], src_lang: str, tgt_lang: str) -> List[str]
     return tagged_sents
 
 
+def split_long_sentence(pieces: List[str], max_len: int) -> List[List[str]]:
+    """
+    Splits a sentencepiece-encoded sentence into segments of at most `max_len` pieces. Each cut is
+    made after the last clause punctuation in the window when that keeps the segment at least half
+    full, otherwise after the last piece that is not inside a `<ID..>` placeholder.
+
+    Args:
+        pieces (List[str]): sentencepiece pieces of the sentence.
+        max_len (int): maximum number of pieces per segment.
+
+    Returns:
+        List[List[str]]: non-empty segments which concatenate back to `pieces`.
+    """
+    segments = []
+    start = 0
+    while len(pieces) - start > max_len:
+        end = start + max_len
+        clause_cut, safe_cut, in_placeholder = None, None, False
+        for k in range(start, end):
+            piece = pieces[k].replace("▁", "")
+            if "<" in piece:
+                in_placeholder = True
+            if ">" in piece:
+                in_placeholder = False
+            if not in_placeholder:
+                safe_cut = k + 1
+                if piece in CLAUSE_PUNCTUATION:
+                    clause_cut = k + 1
+        if clause_cut is not None and clause_cut - start >= max_len // 2:
+            cut = clause_cut
+        else:
+            cut = safe_cut or end
+        segments.append(pieces[start:cut])
+        start = cut
+    segments.append(pieces[start:])
+    return segments
+
+
 def truncate_long_sentences(
-    sents: List[str], placeholder_entity_map_sents: List[Dict]
-) -> Tuple[List[str], List[Dict]]:
+    sents: List[str], placeholder_entity_map_sents: List[Dict], max_len: int = MAX_INPUT_LENGTH - NUM_SPECIAL_TOKENS
+) -> Tuple[List[str], List[Dict], List[int]]:
     """
-    Truncates the sentences that exceed the maximum sequence length.
-    The maximum sequence for the IndicTrans2 model is limited to 256 tokens.
+    Splits the sentences that exceed the decoder's input length into segments (see `split_long_sentence`)
+    instead of letting the decoder silently truncate them. Segments are translated independently and
+    joined back with `merge_segments`.
 
     Args:
-        sents (List[str]): list of input sentences to truncate.
+        sents (List[str]): list of sentencepiece-encoded input sentences.
+        placeholder_entity_map_sents (List[Dict]): placeholder entity map of each sentence.
+        max_len (int, optional): maximum pieces per segment, excluding language tags and end-of-sentence
+            (defaults: MAX_INPUT_LENGTH - NUM_SPECIAL_TOKENS).
 
     Returns:
-        Tuple[List[str], List[Dict]]: tuple containing the list of sentences with truncation applied and the updated placeholder entity maps.
+        Tuple[List[str], List[Dict], List[int]]: tuple containing the list of segments, their placeholder entity maps
+            and the number of segments each input sentence was split into.
     """
-    MAX_SEQ_LEN = 256
     new_sents = []
     placeholders = []
+    segment_counts = []
 
     for j, sent in enumerate(sents):
-        words = sent.split()
-        num_words = len(words)
-        if num_words > MAX_SEQ_LEN:
-            sents = []
-            i = 0
-            while i <= len(words):
-                sents.append(" ".join(words[i : i + MAX_SEQ_LEN]))
-                i += MAX_SEQ_LEN
-            placeholders.extend([placeholder_entity_map_sents[j]] * (len(sents)))
-            new_sents.extend(sents)
+        pieces = sent.split()
+        if len(pieces) > max_len:
+            segments = [" ".join(segment) for segment in split_long_sentence(pieces, max_len)]
         else:
-            placeholders.append(placeholder_entity_map_sents[j])
-            new_sents.append(sent)
-    return new_sents, placeholders
+            segments = [sent]
+        new_sents.extend(segments)
+        placeholders.extend([placeholder_entity_map_sents[j]] * len(segments))
+        segment_counts.append(len(segments))
+    return new_sents, placeholders, segment_counts
+
+
+def segment_joiner(lang: str) -> str:
+    """
+    Returns the separator placed between translated segments of one sentence: a space, unless the
+    target script does not separate words with spaces.
+
+    Args:
+        lang (str): flores language code of the translations.
+    """
+    return "" if lang.split("_")[-1] in UNSPACED_SCRIPTS else " "
+
+
+def merge_segments(sents: List[str], segment_counts: List[int], lang: str = "") -> List[str]:
+    """
+    Joins translated segments back into one translation per input sentence.
+
+    Args:
+        sents (List[str]): translated segments in order.
+        segment_counts (List[int]): number of segments of each input sentence.
+        lang (str, optional): flores language code of the translations, which picks the joiner
+            (see `segment_joiner`; defaults: a space).
+
+    Returns:
+        List[str]: one translation per input sentence.
+    """
+    joiner = segment_joiner(lang)
+    merged = []
+    start = 0
+    for count in segment_counts:
+        merged.append(joiner.join(sent.strip() for sent in sents[start : start + count] if sent.strip()))
+        start += count
+    return merged
 
 
 class Model:
@@ -126,6 +263,10 @@ class Model:
         device: str = "cuda",
         input_lang_code_format: str = "flores",
         model_type: str = "ctranslate2",
+        memory_size: int = 0,
+        memory_path: Optional[str] = None,
+        num_workers: int = 0,
+        pipeline_chunk_size: int = 32,
     ):
         """
         Initialize the model class.
@@ -133,21 +274,16 @@ class Model:
         Args:
             ckpt_dir (str): path of the model checkpoint directory.
             device (str, optional): where to load the model (defaults: cuda).
+            memory_size (int, optional): sentences kept in the translation memory; 0 disables it (defaults: 0).
+            memory_path (str, optional): SQLite file persisting the translation memory (defaults: None, memory only).
+            num_workers (int, optional): processes running pre/post-processing of large batches in a pipeline
+                with decoding; 0 keeps it in the calling thread (defaults: 0). They are spawned on the first
+                large batch and compete for cores with the decoder's threads, so size them to the cores
+                left over.
+            pipeline_chunk_size (int, optional): sentences per pipeline chunk; smaller batches are processed
+                in the calling thread (defaults: 32).
         """
-        self.ckpt_dir = ckpt_dir
-        self.en_tok = MosesTokenizer(lang="en")
-        self.en_normalizer = MosesPunctNormalizer()
-        self.en_detok = MosesDetokenizer(lang="en")
-        self.xliterator = unicode_transliterate.UnicodeIndicTransliterator()
-
-        print("Initializing sentencepiece model for SRC and TGT")
-        self.sp_src = spm.SentencePieceProcessor(
-            model_file=os.path.join(ckpt_dir, "vocab", "model.SRC")
-        )
-        self.sp_tgt = spm.SentencePieceProcessor(
-            model_file=os.path.join(ckpt_dir, "vocab", "model.TGT")
-        )
-
+        self._init_text_processing(ckpt_dir)
         self.input_lang_code_format = input_lang_code_format
 
         print("Initializing model for translation")
@@ -171,13 +307,58 @@ class Model:
         else:
             raise NotImplementedError(f"Unknown model_type: {model_type}")
 
+        self.memory = None
+        if memory_size > 0:
+            self.memory = TranslationMemory(model_checksum(ckpt_dir), max_size=memory_size, path=memory_path)
+
+        self.split_counts = {"sentences": 0, "split_sentences": 0, "segments": 0}
+        self._split_counts_lock = threading.Lock()
+
+        self.pipeline = None
+        self.pipeline_chunk_size = pipeline_chunk_size
+        if num_workers > 0:
+            print(f"Starting {num_workers} pre/post-processing workers")
+            # spawn (not fork): the parent already runs decoder and splitter threads.
+            self.pipeline = ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_pipeline_worker,
+                initargs=(ckpt_dir,),
+            )
+
+    def _init_text_processing(self, ckpt_dir: str):
+        """
+        Loads the tokenizers, normalizers, transliterator and sentencepiece models used for
+        pre/post-processing (everything except the translation model itself).
+
+        Args:
+            ckpt_dir (str): path of the model checkpoint directory.
+        """
+        self.ckpt_dir = ckpt_dir
+        self.en_tok = MosesTokenizer(lang="en")
+        self.en_normalizer = MosesPunctNormalizer()
+        self.en_detok = MosesDetokenizer(lang="en")
+        self.xliterator = unicode_transliterate.UnicodeIndicTransliterator()
+        self.splitter_pool = SentenceSplitterPool()
+        self.normfactory = indic_normalize.IndicNormalizerFactory()
+        self._normalizers = {}
+        self._normalizers_lock = threading.Lock()
+
+        print("Initializing sentencepiece model for SRC and TGT")
+        self.sp_src = spm.SentencePieceProcessor(
+            model_file=os.path.join(ckpt_dir, "vocab", "model.SRC")
+        )
+        self.sp_tgt = spm.SentencePieceProcessor(
+            model_file=os.path.join(ckpt_dir, "vocab", "model.TGT")
+        )
+
     def ctranslate2_translate_lines(self, lines: List[str]) -> List[str]:
         tokenized_sents = [x.strip().split(" ") for x in lines]
         translations = self.translator.translate_batch(
             tokenized_sents,
             max_batch_size=9216,
             batch_type="tokens",
-            max_input_length=160,
+            max_input_length=MAX_INPUT_LENGTH,
             max_decoding_length=256,
             beam_size=5,
         )
@@ -187,6 +368,42 @@ class Model:
     def fairseq_translate_lines(self, lines: List[str]) -> List[str]:
         return self.translator.translate(lines)
 
+    def translate_lines_with_memory(self, lines: List[str], lang_pairs: List[Tuple[str, str]]) -> List[str]:
+        """
+        Translates preprocessed lines, decoding each distinct line only once and serving lines
+        already in the translation memory without decoding them.
+
+        Args:
+            lines (List[str]): preprocessed (tagged) input lines.
+            lang_pairs (List[Tuple[str, str]]): flores (src_lang, tgt_lang) of each line.
+
+        Returns:
+            List[str]: raw model output for each line.
+        """
+        known = {}
+        if self.memory is not None:
+            by_pair = {}
+            for line, pair in zip(lines, lang_pairs):
+                by_pair.setdefault(pair, []).append(line)
+            for (src_lang, tgt_lang), pair_lines in by_pair.items():
+                for line, translation in self.memory.lookup(list(dict.fromkeys(pair_lines)), src_lang, tgt_lang).items():
+                    known[(line, src_lang, tgt_lang)] = translation
+
+        misses = list(dict.fromkeys(
+            (line, *pair) for line, pair in zip(lines, lang_pairs) if (line, *pair) not in known
+        ))
+        if misses:
+            decoded = self.translate_lines([miss[0] for miss in misses])
+            new = {}
+            for miss, translation in zip(misses, decoded):
+                known[miss] = translation
+                new.setdefault(miss[1:], {})[miss[0]] = translation
+            if self.memory is not None:
+                for (src_lang, tgt_lang), translations in new.items():
+                    self.memory.store(translations, src_lang, tgt_lang)
+
+        return [known[(line, *pair)] for line, pair in zip(lines, lang_pairs)]
+
     def paragraphs_batch_translate__multilingual(self, batch_payloads: List[tuple]) -> List[str]:
         """
         Translates a batch of input paragraphs (including pre/post processing)
@@ -198,37 +415,53 @@ class Model:
         Returns:
             List[str]: batch of paragraph-translations in the respective languages.
         """
+        paragraph_sents = []
+        for paragraph, src_lang, tgt_lang in batch_payloads:
+            if self.input_lang_code_format == "iso":
+                src_lang, tgt_lang = iso_to_flores[src_lang], iso_to_flores[tgt_lang]
+            paragraph_sents.append((split_sentences(paragraph, src_lang, self.splitter_pool), src_lang, tgt_lang))
+
+        if self.pipeline is not None and sum(len(item[0]) for item in paragraph_sents) > self.pipeline_chunk_size:
+            return self._pipelined_translate(paragraph_sents)
+        return self._serial_translate(paragraph_sents)
+
+    def _serial_translate(self, paragraph_sents: List[tuple]) -> List[str]:
+        """
+        Translates sentence-split paragraphs in the calling thread, decoding all their sentences in one batch.
+
+        Args:
+            paragraph_sents (List[tuple]): paragraphs as (sentences, flores src_lang, flores tgt_lang).
+
+        Returns:
+            List[str]: paragraph-translations in input order.
+        """
         paragraph_id_to_sentence_range = []
         global__sents = []
         global__preprocessed_sents = []
         global__preprocessed_sents_placeholder_entity_map = []
+        global__lang_pairs = []
 
-        for i in range(len(batch_payloads)):
-            paragraph, src_lang, tgt_lang = batch_payloads[i]
-            if self.input_lang_code_format == "iso":
-                src_lang, tgt_lang = iso_to_flores[src_lang], iso_to_flores[tgt_lang]
-
-            batch = split_sentences(paragraph, src_lang)
+        for batch, src_lang, tgt_lang in paragraph_sents:
             global__sents.extend(batch)
 
-            preprocessed_sents, placeholder_entity_map_sents = self.preprocess_batch(
+            preprocessed_sents, placeholder_entity_map_sents, segment_counts = self.preprocess_batch(
                 batch, src_lang, tgt_lang
             )
+            self._record_splits(segment_counts)
 
             global_sentence_start_index = len(global__preprocessed_sents)
             global__preprocessed_sents.extend(preprocessed_sents)
             global__preprocessed_sents_placeholder_entity_map.extend(placeholder_entity_map_sents)
+            global__lang_pairs.extend([(src_lang, tgt_lang)] * len(preprocessed_sents))
             paragraph_id_to_sentence_range.append(
                 (global_sentence_start_index, len(global__preprocessed_sents))
             )
 
-        translations = self.translate_lines(global__preprocessed_sents)
+        translations = self.translate_lines_with_memory(global__preprocessed_sents, global__lang_pairs)
 
         translated_paragraphs = []
         for paragraph_id, sentence_range in enumerate(paragraph_id_to_sentence_range):
-            tgt_lang = batch_payloads[paragraph_id][2]
-            if self.input_lang_code_format == "iso":
-                tgt_lang = iso_to_flores[tgt_lang]
+            tgt_lang = paragraph_sents[paragraph_id][2]
 
             postprocessed_sents = self.postprocess(
                 translations[sentence_range[0] : sentence_range[1]],
@@ -242,6 +475,49 @@ class Model:
 
         return translated_paragraphs
 
+    def _pipelined_translate(self, paragraph_sents: List[tuple]) -> List[str]:
+        """
+        Translates sentence-split paragraphs with pre/post-processing sharded across the worker
+        processes. Paragraphs are grouped into chunks of about `pipeline_chunk_size` sentences; all
+        chunks are queued for preprocessing at once, and while one chunk is decoded here the
+        workers preprocess the following chunks and postprocess the previous one.
+
+        Args:
+            paragraph_sents (List[tuple]): paragraphs as (sentences, flores src_lang, flores tgt_lang).
+
+        Returns:
+            List[str]: paragraph-translations in input order.
+        """
+        chunks, current, size = [], [], 0
+        for item in paragraph_sents:
+            if current and size + len(item[0]) > self.pipeline_chunk_size:
+                chunks.append(current)
+                current, size = [], 0
+            current.append(item)
+            size += len(item[0])
+        if current:
+            chunks.append(current)
+
+        preprocessed = [self.pipeline.submit(_preprocess_paragraphs, chunk) for chunk in chunks]
+        postprocessed = []
+        for chunk, future in zip(chunks, preprocessed):
+            results = future.result()
+            lines, lang_pairs = [], []
+            for (_, src_lang, tgt_lang), (tagged_sents, _, segment_counts) in zip(chunk, results):
+                self._record_splits(segment_counts)
+                lines.extend(tagged_sents)
+                lang_pairs.extend([(src_lang, tgt_lang)] * len(tagged_sents))
+
+            translations = self.translate_lines_with_memory(lines, lang_pairs)
+
+            post_items, start = [], 0
+            for (_, _, tgt_lang), (tagged_sents, placeholder_entity_map_sents, _) in zip(chunk, results):
+                post_items.append((translations[start : start + len(tagged_sents)], placeholder_entity_map_sents, tgt_lang))
+                start += len(tagged_sents)
+            postprocessed.append(self.pipeline.submit(_postprocess_paragraphs, post_items))
+
+        return [paragraph for future in postprocessed for paragraph in future.result()]
+
     # translate a batch of sentences from src_lang to tgt_lang
     def batch_translate(self, batch: List[str], src_lang: str, tgt_lang: str) -> List[str]:
         """
@@ -262,11 +538,16 @@ class Model:
         if self.input_lang_code_format == "iso":
             src_lang, tgt_lang = iso_to_flores[src_lang], iso_to_flores[tgt_lang]
 
-        preprocessed_sents, placeholder_entity_map_sents = self.preprocess_batch(
+        preprocessed_sents, placeholder_entity_map_sents, segment_counts = self.preprocess_batch(
             batch, src_lang, tgt_lang
         )
-        translations = self.translate_lines(preprocessed_sents)
-        return self.postprocess(translations, placeholder_entity_map_sents, tgt_lang)
+        self._record_splits(segment_counts)
+        translations = self.translate_lines_with_memory(
+            preprocessed_sents, [(src_lang, tgt_lang)] * len(preprocessed_sents)
+        )
+        return merge_segments(
+            self.postprocess(translations, placeholder_entity_map_sents, tgt_lang), segment_counts, tgt_lang
+        )
 
     # translate a paragraph from src_lang to tgt_lang
     def translate_paragraph(self, paragraph: str, src_lang: str, tgt_lang: str) -> str:
@@ -290,16 +571,16 @@ class Model:
         else:
             flores_src_lang = src_lang
 
-        sents = split_sentences(paragraph, flores_src_lang)
+        sents = split_sentences(paragraph, flores_src_lang, self.splitter_pool)
         postprocessed_sents = self.batch_translate(sents, src_lang, tgt_lang)
         translated_paragraph = " ".join(postprocessed_sents)
 
         return translated_paragraph
 
-    def preprocess_batch(self, batch: List[str], src_lang: str, tgt_lang: str) -> List[str]:
+    def preprocess_batch(self, batch: List[str], src_lang: str, tgt_lang: str) -> Tuple[List[str], List[Dict], List[int]]:
         """
         Preprocess an array of sentences by normalizing, tokenization, and possibly transliterating it. It also tokenizes the
-        normalized text sequences using sentence piece tokenizer and also adds language tags.
+        normalized text sequences using sentence piece tokenizer, splits sentences too long for the decoder and adds language tags.
 
         Args:
             batch (List[str]): input list of sentences to preprocess.
@@ -307,16 +588,36 @@ class Model:
             tgt_lang (str): flores language code of the output text sentences.
 
         Returns:
-            Tuple[List[str], List[Dict]]: a tuple of list of preprocessed input text sentences and also a corresponding list of dictionary
-                mapping placeholders to their original values.
+            Tuple[List[str], List[Dict], List[int]]: a tuple of list of preprocessed input text segments, a corresponding list of dictionary
+                mapping placeholders to their original values, and the number of segments of each input sentence.
         """
         preprocessed_sents, placeholder_entity_map_sents = self.preprocess(batch, lang=src_lang)
         tokenized_sents = self.apply_spm(preprocessed_sents)
-        tokenized_sents, placeholder_entity_map_sents = truncate_long_sentences(
+        tokenized_sents, placeholder_entity_map_sents, segment_counts = truncate_long_sentences(
             tokenized_sents, placeholder_entity_map_sents
         )
         tagged_sents = apply_lang_tags(tokenized_sents, src_lang, tgt_lang)
-        return tagged_sents, placeholder_entity_map_sents
+        return tagged_sents, placeholder_entity_map_sents, segment_counts
+
+    def _record_splits(self, segment_counts: List[int]):
+        # the model is shared by the decoding threads, like the translation memory and its counters.
+        with self._split_counts_lock:
+            self.split_counts["sentences"] += len(segment_counts)
+            self.split_counts["split_sentences"] += sum(1 for count in segment_counts if count > 1)
+            self.split_counts["segments"] += sum(segment_counts)
+
+    def split_stats(self) -> Dict:
+        """
+        Returns:
+            Dict: how many sentences were too long for the decoder and had to be split.
+        """
+        with self._split_counts_lock:
+            split_counts = dict(self.split_counts)
+        sentences = split_counts["sentences"]
+        return {
+            **split_counts,
+            "split_rate": split_counts["split_sentences"] / sentences if sentences else 0.0,
+        }
 
     def apply_spm(self, sents: List[str]) -> List[str]:
         """
@@ -392,11 +693,7 @@ class Model:
         """
         processed_sents, placeholder_entity_map_sents = [], []
 
-        if lang == "eng_Latn":
-            normalizer = None
-        else:
-            normfactory = indic_normalize.IndicNormalizerFactory()
-            normalizer = normfactory.get_normalizer(flores_codes[lang])
+        normalizer = None if lang == "eng_Latn" else self.get_normalizer(lang)
 
         for sent in sents:
             sent, placeholder_entity_map = self.preprocess_sent(sent, normalizer, lang)
@@ -405,6 +702,33 @@ class Model:
 
         return processed_sents, placeholder_entity_map_sents
 
+    def get_normalizer(self, lang: str):
+        """
+        Returns the cached indic-nlp normalizer of a language, creating it on first use.
+        Normalizers hold no per-call state, so one instance is shared by all threads.
+
+        Args:
+            lang (str): flores language code.
+        """
+        normalizer = self._normalizers.get(lang)
+        if normalizer is None:
+            with self._normalizers_lock:
+                normalizer = self._normalizers.get(lang)
+                if normalizer is None:
+                    normalizer = self._normalizers[lang] = self.normfactory.get_normalizer(flores_codes[lang])
+        return normalizer
+
+    def close(self):
+        """
+        Releases the resources held by the model: the Moses splitter subprocesses, the
+        pre/post-processing workers and the translation memory's database connection.
+        """
+        self.splitter_pool.close()
+        if self.pipeline is not None:
+            self.pipeline.shutdown()
+        if self.memory is not None:
+            self.memory.close()
+
     def postprocess(
         self,
         sents: List[str],
@@ -470,3 +794,36 @@ class Model:
                 postprocessed_sents.append(outstr)
 
         return postprocessed_sents
+
+
+class TextProcessor(Model):
+    """
+    Pre/post-processing half of `Model`, without the translation model. Each pipeline worker
+    process holds one.
+    """
+
+    def __init__(self, ckpt_dir: str):
+        self._init_text_processing(ckpt_dir)
+        self.memory = None
+        self.pipeline = None
+
+
+_worker_processor = None
+
+
+def _init_pipeline_worker(ckpt_dir: str):
+    global _worker_processor
+    _worker_processor = TextProcessor(ckpt_dir)
+
+
+def _preprocess_paragraphs(items: List[tuple]) -> List[Tuple[List[str], List[Dict], List[int]]]:
+    """Runs `preprocess_batch` on each (sentences, src_lang, tgt_lang) item in a pipeline worker."""
+    return [_worker_processor.preprocess_batch(sents, src_lang, tgt_lang) for sents, src_lang, tgt_lang in items]
+
+
+def _postprocess_paragraphs(items: List[tuple]) -> List[str]:
+    """Postprocesses each (translations, placeholder maps, tgt_lang) item into a paragraph in a pipeline worker."""
+    return [
+        " ".join(_worker_processor.postprocess(translations, placeholder_entity_map_sents, tgt_lang))
+        for translations, placeholder_entity_map_sents, tgt_lang in items
+    ]
@@ -12,6 +12,32 @@ NUMERAL_PATTERN = r"(~?\d+\.?\d*\s?%?\s?-?\s?~?\d+\.?\d*\s?%|~?\d+%|\d+[-\/.,:']
 # handles upi, social media handles and hashtags
 OTHER_PATTERN = r'[A-Za-z0-9]*[#|@]\w+'
 
+DEFAULT_PATTERNS = [EMAIL_PATTERN, URL_PATTERN, NUMERAL_PATTERN, OTHER_PATTERN]
+
+INDIC_NUM_TABLE = str.maketrans(INDIC_NUM_MAP)
+
+#Set of Translations of "ID" in all the suppported languages have been collated.
+#This has been added to deal with edge cases where placeholders might get translated.
+INDIC_FAILURE_CASES = ['آی ڈی ', 'ꯑꯥꯏꯗꯤ', 'आईडी', 'आई . डी . ', 'ऐटि', 'آئی ڈی ', 'ᱟᱭᱰᱤ ᱾', 'आयडी', 'ऐडि', 'आइडि']
+PLACEHOLDER_TEMPLATES = ["<ID{}>", "< ID{} >"] + [
+    template.format(case, "{}") for case in INDIC_FAILURE_CASES
+    for template in ["<{}{}>", "< {}{} >", "< {} {} >"]
+]
+
+WHITESPACE_REGEX = re.compile(r"\s+")
+DIGIT_REGEX = re.compile(r"\d")
+
+# Cheap checks for a character every match of a pattern must contain; a pattern whose check fails
+# cannot match, so its (much slower) scan is skipped.
+PATTERN_PREFILTERS = {
+    EMAIL_PATTERN: lambda text: "@" in text,
+    URL_PATTERN: lambda text: "." in text,
+    NUMERAL_PATTERN: lambda text: DIGIT_REGEX.search(text) is not None,
+    OTHER_PATTERN: lambda text: "#" in text or "@" in text or "|" in text,
+}
+
+_compiled_patterns = {}
+
 
 def normalize_indic_numerals(line: str):
     """
@@ -23,7 +49,7 @@ def normalize_indic_numerals(line: str):
     Returns:
         str: an input string with the all Indic numerals normalized to Roman script.
     """
-    return "".join([INDIC_NUM_MAP.get(c, c) for c in line])
+    return line.translate(INDIC_NUM_TABLE)
 
 
 def wrap_with_placeholders(text: str, patterns: list) -> Tuple[str, dict]:
@@ -86,7 +112,62 @@ def wrap_with_placeholders(text: str, patterns: list) -> Tuple[str, dict]:
     return text, placeholder_entity_map
 
 
-def normalize(text: str, patterns: list = [EMAIL_PATTERN, URL_PATTERN, NUMERAL_PATTERN, OTHER_PATTERN]) -> Tuple[str, dict]:
+def compile_patterns(patterns: list) -> list:
+    """
+    Compiles a list of patterns once and pairs each with its prefilter (if it has one).
+
+    Args:
+        patterns (list): list of patterns to search for in the input string.
+
+    Returns:
+        list: list of (pattern, compiled pattern, prefilter or None) tuples.
+    """
+    key = tuple(patterns)
+    if key not in _compiled_patterns:
+        _compiled_patterns[key] = [
+            (pattern, re.compile(pattern), PATTERN_PREFILTERS.get(pattern)) for pattern in patterns
+        ]
+    return _compiled_patterns[key]
+
+
+def wrap_with_placeholders_fast(text: str, patterns: list) -> Tuple[str, dict]:
+    """
+    Same output as `wrap_with_placeholders`, using precompiled patterns and precomputed placeholder
+    templates. A pattern is only scanned when the text contains a character its matches require,
+    which for most sentences leaves nothing to scan; matches are wrapped exactly as in the reference.
+
+    Args:
+        text (str): an input string which needs to be wrapped with the placeholders.
+        pattern (list): list of patterns to search for in the input string.
+
+    Returns:
+        Tuple[str, dict]: a tuple containing the modified text and a dictionary mapping
+            placeholders to their original values.
+    """
+    serial_no = 1
+    placeholder_entity_map = dict()
+
+    for pattern, regex, prefilter in compile_patterns(patterns):
+        if prefilter is not None and not prefilter(text):
+            continue
+        for match in set(regex.findall(text)):
+            if pattern==URL_PATTERN and len(match.replace(".",'')) < 4:
+                continue
+            if pattern==NUMERAL_PATTERN and len(match.replace(" ",'').replace(".",'').replace(":",'')) < 4:
+                continue
+
+            for template in PLACEHOLDER_TEMPLATES:
+                placeholder_entity_map[template.format(serial_no)] = match
+
+            text = text.replace(match, "<ID{}>".format(serial_no))
+            serial_no+=1
+
+    text = WHITESPACE_REGEX.sub(" ", text)
+    text = text.replace(">/",">")
+    return text, placeholder_entity_map
+
+
+def normalize(text: str, patterns: list = DEFAULT_PATTERNS) -> Tuple[str, dict]:
     """
     Normalizes and wraps the spans of input string with placeholder tags. It first normalizes
     the Indic numerals in the input string to Roman script. Later, it uses the input string with normalized
@@ -101,5 +182,5 @@ def normalize(text: str, patterns: list = [EMAIL_PATTERN, URL_PATTERN, NUMERAL_P
             placeholders to their original values.
     """
     text = normalize_indic_numerals(text.strip("\n"))
-    text, placeholder_entity_map  = wrap_with_placeholders(text, patterns)
+    text, placeholder_entity_map  = wrap_with_placeholders_fast(text, patterns)
     return text, placeholder_entity_map
@@ -0,0 +1,153 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def model_checksum(ckpt_dir: str) -> str:
+    """
+    Computes a fingerprint of a model checkpoint directory, so that translations cached for one
+    checkpoint are never served for another.
+
+    The (small) config and vocabulary files are hashed by content, while the weights file is only
+    identified by its size and modification time.
+
+    Args:
+        ckpt_dir (str): path of the model checkpoint directory.
+
+    Returns:
+        str: hex digest identifying the checkpoint.
+    """
+    digest = hashlib.sha256()
+    for name in ["config.json", "shared_vocabulary.json", "shared_vocabulary.txt",
+                 os.path.join("vocab", "model.SRC"), os.path.join("vocab", "model.TGT")]:
+        path = os.path.join(ckpt_dir, name)
+        if os.path.isfile(path):
+            digest.update(name.encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    for name in ["model.bin", os.path.join("model", "checkpoint_best.pt")]:
+        path = os.path.join(ckpt_dir, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            digest.update(f"{name}:{stat.st_size}:{int(stat.st_mtime)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TranslationMemory:
+    """
+    Sentence-level translation memory: maps a preprocessed (normalized, tokenized and tagged)
+    input sentence to the raw model output for it, so that repeated sentences skip the decoder.
+
+    Entries are kept in a bounded LRU and optionally written through to a SQLite file, which
+    survives restarts and can be shared by several processes. All methods are thread-safe.
+    """
+
+    def __init__(self, checksum: str, max_size: int = 50000, path: Optional[str] = None):
+        """
+        Initialize the translation memory.
+
+        Args:
+            checksum (str): fingerprint of the model checkpoint (see `model_checksum`).
+            max_size (int, optional): max sentences kept in memory (defaults: 50000).
+            path (str, optional): SQLite file for the persistent tier (defaults: None, memory only).
+        """
+        self.checksum = checksum
+        self.max_size = max_size
+        self.path = path
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sentences (sent TEXT NOT NULL, src_lang TEXT NOT NULL, "
+                "tgt_lang TEXT NOT NULL, checksum TEXT NOT NULL, translation TEXT NOT NULL, "
+                "PRIMARY KEY (sent, src_lang, tgt_lang, checksum))"
+            )
+
+    def _remember(self, key: tuple, translation: str):
+        self._entries[key] = translation
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def lookup(self, sents: List[str], src_lang: str, tgt_lang: str) -> Dict[str, str]:
+        """
+        Looks up a batch of preprocessed sentences.
+
+        Args:
+            sents (List[str]): preprocessed input sentences.
+            src_lang (str): flores source language code.
+            tgt_lang (str): flores target language code.
+
+        Returns:
+            Dict[str, str]: raw translations of the sentences that were found.
+        """
+        found = {}
+        with self._lock:
+            for sent in sents:
+                key = (sent, src_lang, tgt_lang)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[sent] = self._entries[key]
+                    self.memory_hits += 1
+                    continue
+                row = None
+                if self._db is not None:
+                    row = self._db.execute(
+                        "SELECT translation FROM sentences WHERE sent = ? AND src_lang = ? AND tgt_lang = ? AND checksum = ?",
+                        (sent, src_lang, tgt_lang, self.checksum),
+                    ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    found[sent] = row[0]
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+        return found
+
+    def store(self, translations: Dict[str, str], src_lang: str, tgt_lang: str):
+        """
+        Stores raw translations of preprocessed sentences.
+
+        Args:
+            translations (Dict[str, str]): preprocessed sentence to raw model output.
+            src_lang (str): flores source language code.
+            tgt_lang (str): flores target language code.
+        """
+        with self._lock:
+            for sent, translation in translations.items():
+                self._remember((sent, src_lang, tgt_lang), translation)
+            if self._db is not None and translations:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO sentences (sent, src_lang, tgt_lang, checksum, translation) VALUES (?, ?, ?, ?, ?)",
+                    [(sent, src_lang, tgt_lang, self.checksum, t) for sent, t in translations.items()],
+                )
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            Dict: hit/miss counters, hit rate and number of sentences held in memory.
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "size": len(self._entries),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
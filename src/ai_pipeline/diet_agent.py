@@ -1,34 +1,111 @@
-import logging
-import os
-from typing import Optional, Tuple
-from src.database.mongodb import MongoDB
-from src.utils.pdf_generator import generate_pdf
-from google.cloud import translate_v2 as translate
-from google.generativeai import GenerativeModel
-import google.generativeai as genai
+import asyncio
 import hashlib
 import json
+import logging
+import os
 import re
-import time
+from typing import Any, Dict, List, Optional, Tuple
+from src.database.mongodb import AsyncMongoDB, get_async_mongodb
+from src.ai_pipeline.diet_library import DietPlanLibrary
+from src.ai_pipeline.llm_gateway import LLMGateway, get_llm_gateway
+from src.ai_pipeline.plan_stream import DietPlanStreamParser, PlanStreamError
+from src.utils.pdf_generator import DietPlanPdf, generate_pdf, localize_meal_types
+from src.utils.retry import OutputFormatError, get_policy
+from src.utils.singleflight import get_singleflight
+from src.input_processing.translation import translate_batch
 
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-    handlers=[logging.FileHandler("bot.log", encoding="utf-8"), logging.StreamHandler()]
-)
 logger = logging.getLogger(__name__)
 
+# Upper age (inclusive) and label of each band used to share diet plans between users.
+AGE_BANDS = [(12, "0-12"), (17, "13-17"), (29, "18-29"), (44, "30-44"), (59, "45-59")]
+# Stands in for the user's name in prompts of shared plans, so no plan mentions another user.
+SHARED_PLAN_NAME = "Patient"
+DIET_MODEL = "gemini-1.5-pro"
+# Stream live plans from Gemini, translating and laying out each day while later days are generated.
+STREAM_DIET_PLANS = os.getenv("DIET_PLAN_STREAMING", "True").lower() == "true"
+
+
+def age_band(age: Any) -> str:
+    """Return the age band label of an age ("unknown" when missing or not a number)."""
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        return "unknown"
+    for upper, label in AGE_BANDS:
+        if age <= upper:
+            return label
+    return "60+"
+
+
+class DietPlanFormatError(OutputFormatError):
+    """Gemini returned an empty or malformed diet plan; worth another attempt."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
 class DietAgent:
-    def __init__(self):
+    def __init__(self, mongodb: Optional[AsyncMongoDB] = None, llm: Optional[LLMGateway] = None):
         """Initialize the DietAgent with necessary configurations."""
-        self.mongodb = MongoDB()
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            logger.error("GEMINI_API_KEY not found in environment variables")
-            raise ValueError("GEMINI_API_KEY is required")
-        genai.configure(api_key=api_key)
-        self.model = GenerativeModel("gemini-1.5-pro")
-        self.translate_client = translate.Client()
+        self._mongodb = mongodb
+        try:
+            self.llm = llm or get_llm_gateway()
+        except ValueError as e:
+            logger.error(f"LLM backend unavailable: {str(e)}")
+            raise
+        # Hit/miss counts of the shared plan cache per profile bucket (oldest buckets dropped first)
+        self.profile_stats: Dict[str, Dict[str, int]] = {}
+        self.max_profile_stats = int(os.getenv("DIET_PROFILE_STATS_SIZE", "1000"))
+        self.library = DietPlanLibrary(mongodb)
+        self.flights = get_singleflight("diet_plan")
+
+    @property
+    def mongodb(self) -> AsyncMongoDB:
+        """Database handle; resolved lazily so the async client binds to the running event loop."""
+        return self._mongodb or get_async_mongodb()
+
+    def plan_profile(
+        self,
+        input_text: str,
+        condition: Optional[str],
+        dietary_preference: Optional[str],
+        age: Any,
+        allergies: List[str],
+        language: str
+    ) -> str:
+        """
+        Canonical profile of a (non-report) diet plan request. Users with the same profile share one
+        cached plan; personal fields (name, exact age) only go into their own PDF.
+        """
+        return "|".join([
+            self.normalize_condition(condition or "none"),
+            self.normalize_condition(input_text),
+            (dietary_preference or "any").lower().strip(),
+            age_band(age),
+            ",".join(sorted({a.lower().strip() for a in allergies if a and a.strip()})) or "none",
+            language
+        ])
+
+    def _record_profile_lookup(self, profile: str, hit: bool):
+        stats = self.profile_stats.setdefault(profile, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+        while len(self.profile_stats) > self.max_profile_stats:
+            self.profile_stats.pop(next(iter(self.profile_stats)))
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return the shared plan cache hit rate, overall and per profile bucket (most requested first)."""
+        hits = sum(s["hits"] for s in self.profile_stats.values())
+        lookups = hits + sum(s["misses"] for s in self.profile_stats.values())
+        buckets = sorted(self.profile_stats.items(), key=lambda item: -(item[1]["hits"] + item[1]["misses"]))
+        return {
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "lookups": lookups,
+            "buckets": {
+                profile: {**counts, "hit_rate": counts["hits"] / (counts["hits"] + counts["misses"])}
+                for profile, counts in buckets[:20]
+            }
+        }
 
     def normalize_condition(self, condition: str) -> str:
         """Normalize condition names to handle typos and variations."""
@@ -58,7 +135,7 @@ class DietAgent:
             f"dietary_preference={dietary_preference}"
         )
 
-        user_profile = self.mongodb.get_user(user_id)
+        user_profile = await self.mongodb.get_user(user_id)
         language = user_profile.get("language", "en")
         age = user_profile.get("age")
         allergies = user_profile.get("allergies", [])
@@ -67,16 +144,107 @@ class DietAgent:
         if condition:
             condition = self.normalize_condition(condition)
 
-        cache_key = hashlib.md5(
-            f"{user_id}_{input_text}_{condition}_{language}".encode()
-        ).hexdigest()
+        # Plans built from a medical report are personal; all others are shared by clinical profile.
+        profile = None if is_medical_report else self.plan_profile(
+            input_text, condition, dietary_preference, age, allergies, language
+        )
+        if profile:
+            cache_key = "diet_profile_" + hashlib.md5(profile.encode()).hexdigest()
+        else:
+            cache_key = hashlib.md5(
+                f"{user_id}_{input_text}_{condition}_{language}".encode()
+            ).hexdigest()
+        user_info = {"name": name, "age": age or "Unknown", "condition": condition or "None"}
+
+        # Concurrent requests with the same cache key (repeats, or other users with the same profile) share
+        # one lookup or generation; every caller still gets a PDF with its own details.
+        (diet_plan, pdf), shared = await self.flights.do(
+            cache_key, self._produce_plan, user_id, input_text, is_medical_report, condition, dietary_preference,
+            age, allergies, language, name, profile, cache_key, user_info
+        )
+        if "error" in diet_plan:
+            return diet_plan, None
+        # A PDF laid out while streaming carries the details of the user who started the request.
+        return await self._finish_plan(diet_plan, user_id, language, user_info, None if shared else pdf)
 
-        cached_response = self.mongodb.get_cached_response(cache_key)
+    async def _produce_plan(
+        self,
+        user_id: str,
+        input_text: str,
+        is_medical_report: bool,
+        condition: Optional[str],
+        dietary_preference: Optional[str],
+        age: Any,
+        allergies: List[str],
+        language: str,
+        name: str,
+        profile: Optional[str],
+        cache_key: str,
+        user_info: Dict[str, Any]
+    ) -> Tuple[dict, Optional[DietPlanPdf]]:
+        """
+        Find or generate the translated plan of a request.
+        Returns:
+            The plan (or {"error": reason}) and the PDF laid out while streaming it, if any
+        """
+        # Common profiles are served from the pre-generated library; the PDF is rendered per user.
+        entry = await self.library.lookup(profile) if profile else None
+        if entry:
+            logger.info(f"Returning library diet plan for user {user_id}, profile: {profile}")
+            return entry["diet_plan"], None
+
+        cached_response = await self.mongodb.get_cached_response(cache_key)
+        if profile:
+            self._record_profile_lookup(profile, cached_response is not None)
         if cached_response:
             logger.info(f"Returning cached diet plan for user {user_id}, cache_key: {cache_key}")
-            return cached_response["diet_plan"], cached_response.get("pdf_path")
+            # The PDF carries the user's own details and is removed after sending, so it is rebuilt.
+            return cached_response["diet_plan"], None
+
+        prompt = await self.build_prompt(
+            input_text, is_medical_report, condition, dietary_preference, age, allergies, language, name, shared=bool(profile)
+        )
+
+        pdf = None
+        try:
+            if STREAM_DIET_PLANS:
+                diet_plan, pdf = await get_policy("gemini").call(
+                    self._stream_diet_plan, prompt, user_id, language, user_info
+                )
+            else:
+                diet_plan = await get_policy("gemini").call(self._request_diet_plan, prompt, user_id)
+        except DietPlanFormatError as e:
+            logger.error(f"Giving up on diet plan for user {user_id}: {e.reason}")
+            return {"error": e.reason}, None
+        except Exception as e:
+            logger.error(f"Error generating diet plan for user {user_id}: {str(e)}", exc_info=True)
+            return {"error": "Failed to generate diet plan"}, None
+
+        try:
+            if pdf is None:
+                diet_plan = await self.translate_plan(diet_plan, language)
+            # The interaction itself is recorded by the calling handler.
+            await self.mongodb.cache_response(cache_key, {"diet_plan": diet_plan, "profile": profile})
+        except Exception as e:
+            logger.error(f"Error finalizing diet plan for user {user_id}: {str(e)}", exc_info=True)
+            return {"error": "Failed to generate diet plan"}, None
 
-        prompt_template = self.mongodb.get_diet_plan_prompt(language)
+        return diet_plan, pdf
+
+    async def build_prompt(
+        self,
+        input_text: str,
+        is_medical_report: bool,
+        condition: Optional[str],
+        dietary_preference: Optional[str],
+        age: Any,
+        allergies: List[str],
+        language: str,
+        name: str,
+        shared: bool = False
+    ) -> str:
+        """Format the diet plan prompt; shared plans get the age band and a neutral name instead of the user's."""
+        prompt_template = await self.mongodb.get_diet_plan_prompt(language)
         if not prompt_template:
             logger.warning(f"No diet plan prompt found for language {language}, falling back to default")
             prompt_template = {
@@ -109,9 +277,9 @@ class DietAgent:
             }
 
         dietary_prompt = "" if is_medical_report else f"- Dietary preference: {dietary_preference or 'not specified'}\n"
-        prompt = prompt_template["template"].format(
-            age=age or "unknown",
-            name=name,
+        return prompt_template["template"].format(
+            age=age_band(age) if shared else (age or "unknown"),
+            name=SHARED_PLAN_NAME if shared else name,
             condition=condition or "none",
             allergies=", ".join(allergies) if allergies else "none",
             input_text=input_text,
@@ -119,92 +287,151 @@ class DietAgent:
             dietary_prompt=dietary_prompt
         )
 
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                logger.debug(f"Attempt {attempt + 1} to call Gemini API for user {user_id}")
-                response = self.model.generate_content(prompt)
-                response_text = response.text.strip()
-                logger.debug(f"Raw Gemini response for user {user_id}: {response_text}")
-
-                if not response_text:
-                    logger.error(f"Empty response from Gemini for user {user_id} on attempt {attempt + 1}")
-                    if attempt < max_retries - 1:
-                        time.sleep(2)
-                        continue
-                    return {"error": "Empty response from Gemini"}, None
-
-                # Extract JSON from backticks if present
-                json_match = re.search(r'```json\n(.*?)\n```', response_text, re.DOTALL)
-                if json_match:
-                    json_text = json_match.group(1).strip()
-                else:
-                    json_text = response_text
-
-                # Parse JSON
-                try:
-                    diet_plan = json.loads(json_text)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON diet plan for user {user_id}: {str(e)}. Raw response: {response_text}")
-                    if attempt < max_retries - 1:
-                        time.sleep(2)
-                        continue
-                    return {"error": "Invalid diet plan format"}, None
-
-                # Validate diet plan structure
-                if not isinstance(diet_plan, dict) or "days" not in diet_plan or "notes" not in diet_plan:
-                    logger.error(f"Malformed diet plan for user {user_id}: Missing days or notes. Raw response: {response_text}")
-                    if attempt < max_retries - 1:
-                        time.sleep(2)
-                        continue
-                    return {"error": "Invalid diet plan structure"}, None
-
-                # Translate if needed
-                if language != "en":
-                    for day, meals in diet_plan["days"].items():
-                        for meal in meals:
-                            meal["details"] = self.translate_client.translate(
-                                meal["details"], source_language="en", target_language=language
-                            )["translatedText"]
-                            meal["type"] = self.translate_client.translate(
-                                meal["type"], source_language="en", target_language=language
-                            )["translatedText"]
-                    diet_plan["notes"] = self.translate_client.translate(
-                        diet_plan["notes"], source_language="en", target_language=language
-                    )["translatedText"]
-
-                # Generate PDF
-                user_info = {"name": name, "age": age or "Unknown", "condition": condition or "None"}
+    async def translate_plan(self, diet_plan: dict, language: str) -> dict:
+        """Translate meal details, meal types and notes of an English plan in place (one batch)."""
+        if language != "en":
+            meals = [meal for day_meals in diet_plan["days"].values() for meal in day_meals]
+            translated = await translate_batch(
+                [meal["details"] for meal in meals] + [diet_plan["notes"]], "en", language
+            )
+            meal_types = await localize_meal_types([meal["type"] for meal in meals], language)
+            for meal, details in zip(meals, translated):
+                meal["details"] = details
+                meal["type"] = meal_types[meal["type"]]
+            diet_plan["notes"] = translated[-1]
+        return diet_plan
+
+    async def create_shared_plan(
+        self, input_text: str, condition: Optional[str], age: Any, language: str, label: str
+    ) -> dict:
+        """
+        Generate and translate a shareable plan (no allergies, no preference) for the offline plan library.
+
+        Raises:
+            DietPlanFormatError: If Gemini keeps returning unusable output
+        """
+        prompt = await self.build_prompt(
+            input_text, False, condition and self.normalize_condition(condition), None, age, [], language,
+            SHARED_PLAN_NAME, shared=True
+        )
+        diet_plan = await get_policy("gemini").call(self._request_diet_plan, prompt, label)
+        return await self.translate_plan(diet_plan, language)
+
+    async def _finish_plan(
+        self,
+        diet_plan: dict,
+        user_id: str,
+        language: str,
+        user_info: Dict[str, Any],
+        pdf: Optional[DietPlanPdf] = None
+    ) -> Tuple[dict, Optional[str]]:
+        """Render the user's PDF of a (translated) plan, or write the one already laid out while streaming."""
+        try:
+            if pdf is not None:
+                pdf_path = await pdf.build(f"Diet_Plan_{user_id}.pdf")
+            else:
                 pdf_path = await generate_pdf(
                     diet_plan,
                     f"Diet_Plan_{user_id}.pdf",
                     language=language,
                     user_info=user_info
                 )
-                logger.info(f"Generated diet plan PDF for user {user_id}: {pdf_path}")
-
-                if pdf_path:
-                    self.mongodb.cache_response(cache_key, {"diet_plan": diet_plan, "pdf_path": pdf_path})
-                    self.mongodb.save_interaction(
-                        user_id=user_id,
-                        input_type="diet",
-                        input_text=input_text,
-                        response=json.dumps(diet_plan),
-                        language=language,
-                        pdf_path=pdf_path
-                    )
-                else:
-                    logger.error(f"PDF generation failed for user {user_id}")
-                    return {"error": "Failed to generate PDF"}, None
-
-                return diet_plan, pdf_path
-            except Exception as e:
-                logger.error(f"Error generating diet plan for user {user_id} on attempt {attempt + 1}: {str(e)}", exc_info=True)
-                if attempt < max_retries - 1:
-                    time.sleep(2)
-                    continue
-                return {"error": "Failed to generate diet plan"}, None
+        except Exception as e:
+            logger.error(f"Error generating diet plan PDF for user {user_id}: {str(e)}", exc_info=True)
+            return {"error": "Failed to generate diet plan"}, None
+        if not pdf_path:
+            logger.error(f"PDF generation failed for user {user_id}")
+            return {"error": "Failed to generate PDF"}, None
+        logger.info(f"Generated diet plan PDF for user {user_id}: {pdf_path}")
+        return diet_plan, pdf_path
+
+    async def _stream_diet_plan(
+        self, prompt: str, user_id: str, language: str, user_info: Dict[str, Any]
+    ) -> Tuple[dict, DietPlanPdf]:
+        """
+        Run one streamed Gemini attempt. Each day is translated and added to the PDF as soon as it is
+        parsed; output that cannot become a valid plan aborts the attempt at once.
+        Returns:
+            The translated plan and its PDF with every section added (not yet written)
+        Raises:
+            DietPlanFormatError: On empty, malformed or truncated output
+        """
+        logger.debug("Streaming Gemini diet plan for user %s", user_id)
+        parser = DietPlanStreamParser()
+        pdf = DietPlanPdf(language)
+        await pdf.add_header(user_info)
+        day_tasks: List[asyncio.Task] = []
+        chunks = self.llm.stream(prompt, "diet", DIET_MODEL)
+        try:
+            async for text in chunks:
+                for day, meals in parser.feed(text):
+                    # Chained on the previous day so days reach the PDF in order.
+                    previous = day_tasks[-1] if day_tasks else None
+                    day_tasks.append(asyncio.create_task(self._add_plan_day(pdf, day, meals, language, previous)))
+            diet_plan = parser.finish()
+            if day_tasks:
+                await day_tasks[-1]
+            if language != "en":
+                diet_plan["notes"] = (await translate_batch([diet_plan["notes"]], "en", language))[0]
+            await pdf.add_notes(diet_plan["notes"])
+            return diet_plan, pdf
+        except PlanStreamError as e:
+            logger.error(f"Unusable streamed diet plan for user {user_id}: {str(e)}. Raw response: {parser.buffer}")
+            raise DietPlanFormatError(
+                "Empty response from Gemini" if not parser.buffer.strip() else "Invalid diet plan format"
+            )
+        finally:
+            # Ends the stream (and frees its concurrency slot) when the attempt is aborted.
+            await chunks.aclose()
+            for task in day_tasks:
+                task.cancel()
+
+    async def _add_plan_day(
+        self, pdf: DietPlanPdf, day: str, meals: List[dict], language: str, previous: Optional[asyncio.Task]
+    ):
+        """Translate one streamed day in place and add its table once the previous day is in the PDF."""
+        if language != "en":
+            translated, meal_types = await asyncio.gather(
+                translate_batch([meal["details"] for meal in meals], "en", language),
+                localize_meal_types([meal["type"] for meal in meals], language)
+            )
+            for meal, details in zip(meals, translated):
+                meal["details"] = details
+                meal["type"] = meal_types[meal["type"]]
+        if previous is not None:
+            await previous
+        await pdf.add_day(day, meals)
+
+    async def _request_diet_plan(self, prompt: str, user_id: str) -> dict:
+        """Run one Gemini attempt and return the parsed plan; raises DietPlanFormatError on unusable output."""
+        logger.debug("Calling Gemini API for user %s", user_id)
+        response_text = (await self.llm.generate(prompt, "diet", DIET_MODEL)).strip()
+        logger.debug("Raw Gemini response for user %s: %s", user_id, response_text)
+
+        if not response_text:
+            logger.error(f"Empty response from Gemini for user {user_id}")
+            raise DietPlanFormatError("Empty response from Gemini")
+
+        # Extract JSON from backticks if present
+        json_match = re.search(r'```json\n(.*?)\n```', response_text, re.DOTALL)
+        if json_match:
+            json_text = json_match.group(1).strip()
+        else:
+            json_text = response_text
+
+        # Parse JSON
+        try:
+            diet_plan = json.loads(json_text)
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid JSON diet plan for user {user_id}: {str(e)}. Raw response: {response_text}")
+            raise DietPlanFormatError("Invalid diet plan format")
+
+        # Validate diet plan structure
+        if not isinstance(diet_plan, dict) or "days" not in diet_plan or "notes" not in diet_plan:
+            logger.error(f"Malformed diet plan for user {user_id}: Missing days or notes. Raw response: {response_text}")
+            raise DietPlanFormatError("Invalid diet plan structure")
+
+        return diet_plan
 
     def close(self):
-        """Close MongoDB connection."""
-        self.mongodb.close()
\ No newline at end of file
+        """Release agent resources. The shared MongoDB pool is closed by the application on shutdown."""
@@ -0,0 +1,219 @@
+"""
+Library of pre-generated diet plans for the most requested profiles: the general plan and the common
+conditions, for every language in LANGUAGE_MAP and every age band, without allergies or a dietary
+preference. Each entry holds the translated plan (MongoDB `diet_plan_library`), so these requests are
+answered without calling Gemini; the PDF is still rendered per user, with their details. Other profiles
+fall back to live generation.
+
+Entries are versioned with DIET_LIBRARY_VERSION; bump it after changing the prompt and rebuild.
+Entries older than DIET_LIBRARY_MAX_AGE_DAYS are regenerated by the next build.
+
+The bot only reads the library. Building it makes about two hundred Gemini calls, so it runs as a
+separate process (e.g. a daily cron job) instead of sharing the bot's rate limits and circuit breaker.
+
+Build missing, stale or invalid entries (and remove other versions):
+    python -m src.ai_pipeline.diet_library build
+Report coverage of the current version:
+    python -m src.ai_pipeline.diet_library status
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from src.database.mongodb import AsyncMongoDB, get_async_mongodb
+from src.utils.helpers import LANGUAGE_MAP, validate_translation
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_VERSION = os.getenv("DIET_LIBRARY_VERSION", "1")
+LIBRARY_MAX_AGE_DAYS = float(os.getenv("DIET_LIBRARY_MAX_AGE_DAYS", "30"))
+
+# None is the general plan (menu option 3); the others are the conditions DietAgent normalizes to.
+LIBRARY_CONDITIONS: List[Optional[str]] = [None, "diabetes", "hypertension", "cholesterol"]
+GENERAL_PLAN_INPUT = "general diet plan"
+# One age inside each band of `diet_agent.AGE_BANDS`, plus None for users without an age.
+LIBRARY_AGES: List[Optional[int]] = [12, 17, 29, 44, 59, 60, None]
+
+
+def validate_plan(diet_plan: Any, language: str) -> List[str]:
+    """Return one line per problem that makes a plan unfit for the library (empty if it is usable)."""
+    if not isinstance(diet_plan, dict):
+        return ["plan is not an object"]
+    problems = []
+    days = diet_plan.get("days")
+    if not isinstance(days, dict) or sorted(days) != [str(day) for day in range(1, 8)]:
+        problems.append(f"expected days 1-7, got {sorted(days) if isinstance(days, dict) else days!r}")
+        days = days if isinstance(days, dict) else {}
+    for day, meals in days.items():
+        if not isinstance(meals, list) or not meals:
+            problems.append(f"day {day}: no meals")
+            continue
+        for meal in meals:
+            if not isinstance(meal, dict) or not all(isinstance(meal.get(f), str) and meal.get(f).strip()
+                                                     for f in ("time", "type", "details")):
+                problems.append(f"day {day}: malformed meal {meal!r}")
+            elif language != "en" and not validate_translation(meal["details"], language):
+                problems.append(f"day {day}: meal details not translated to {language}")
+    notes = diet_plan.get("notes")
+    if not isinstance(notes, str) or not notes.strip():
+        problems.append("missing notes")
+    elif language != "en" and not validate_translation(notes, language):
+        problems.append(f"notes not translated to {language}")
+    return problems
+
+
+class DietPlanLibrary:
+    """Lookup and build of pre-generated diet plans of the current library version."""
+
+    def __init__(self, mongodb: Optional[AsyncMongoDB] = None, version: str = LIBRARY_VERSION):
+        self._mongodb = mongodb
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def mongodb(self) -> AsyncMongoDB:
+        return self._mongodb or get_async_mongodb()
+
+    async def lookup(self, profile: str) -> Optional[Dict[str, Any]]:
+        """Return the library entry of a profile, or None if the library does not cover it."""
+        entry = await self.mongodb.get_library_plan(profile, self.version)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def profiles(self, agent, languages: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Return the library's profile matrix (conditions x languages x age bands)."""
+        matrix = []
+        for condition in LIBRARY_CONDITIONS:
+            input_text = condition or GENERAL_PLAN_INPUT
+            for language in languages or list(LANGUAGE_MAP):
+                for age in LIBRARY_AGES:
+                    matrix.append({
+                        "profile": agent.plan_profile(input_text, condition, None, age, [], language),
+                        "input_text": input_text,
+                        "condition": condition,
+                        "age": age,
+                        "language": language
+                    })
+        return matrix
+
+    def _is_current(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return (
+            entry is not None
+            and entry.get("created_at", datetime.min) > datetime.utcnow() - timedelta(days=LIBRARY_MAX_AGE_DAYS)
+        )
+
+    async def build_entry(self, agent, item: Dict[str, Any]) -> bool:
+        """Generate, validate and store one profile; returns False if the plan was rejected."""
+        profile = item["profile"]
+        try:
+            diet_plan = await agent.create_shared_plan(
+                item["input_text"], item["condition"], item["age"], item["language"], f"library:{profile}"
+            )
+        except Exception as e:
+            logger.error(f"Library plan for {profile} failed: {str(e)}")
+            return False
+        problems = validate_plan(diet_plan, item["language"])
+        if problems:
+            logger.error(f"Rejected library plan for {profile}: {'; '.join(problems)}")
+            return False
+
+        saved = await self.mongodb.save_library_plan({
+            "profile": profile,
+            "version": self.version,
+            "condition": item["condition"],
+            "language": item["language"],
+            "diet_plan": diet_plan,
+            "created_at": datetime.utcnow()
+        })
+        logger.info(f"Stored library plan for {profile} (version {self.version})")
+        return saved
+
+    async def build(self, agent, languages: Optional[List[str]] = None, force: bool = False, concurrency: int = 2) -> Dict[str, int]:
+        """
+        Build every missing, expired or (with `force`) existing entry of the current version, then
+        remove entries and PDFs of other versions.
+        Returns:
+            Counts of built, failed and skipped profiles and of removed old entries
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        counts = {"built": 0, "failed": 0, "skipped": 0, "removed": 0}
+
+        async def build_one(item):
+            if not force and self._is_current(await self.mongodb.get_library_plan(item["profile"], self.version)):
+                counts["skipped"] += 1
+                return
+            async with semaphore:
+                counts["built" if await self.build_entry(agent, item) else "failed"] += 1
+
+        await asyncio.gather(*(build_one(item) for item in self.profiles(agent, languages)))
+        counts["removed"] = await self.prune()
+        logger.info(f"Diet plan library {self.version} build finished: {counts}")
+        return counts
+
+    async def prune(self) -> int:
+        """Delete entries of every version except the current one."""
+        removed = 0
+        for version in {entry["version"] for entry in await self.mongodb.list_library_plans()} - {self.version}:
+            removed += await self.mongodb.delete_library_plans(version)
+            logger.info(f"Removed diet plan library version {version}")
+        return removed
+
+    async def status(self, agent) -> Dict[str, Any]:
+        """Return coverage of the current version."""
+        entries = {entry["profile"]: entry for entry in await self.mongodb.list_library_plans(self.version)}
+        matrix = self.profiles(agent)
+        current = [item for item in matrix if self._is_current(entries.get(item["profile"]))]
+        return {
+            "version": self.version,
+            "profiles": len(matrix),
+            "current": len(current),
+            "missing_or_stale": [item["profile"] for item in matrix if item not in current]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+def main():
+    from dotenv import load_dotenv
+    from src.utils.logging_config import setup_logging
+    from src.ai_pipeline.diet_agent import DietAgent
+    load_dotenv()
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Build or inspect the pre-generated diet plan library")
+    parser.add_argument("command", choices=["build", "status"])
+    parser.add_argument("--languages", nargs="*", help="Only build these language codes")
+    parser.add_argument("--force", action="store_true", help="Regenerate entries that are still current")
+    parser.add_argument("--concurrency", type=int, default=2, help="Plans generated at the same time")
+    args = parser.parse_args()
+    agent = DietAgent()
+
+    async def run():
+        if args.command == "build":
+            counts = await agent.library.build(agent, args.languages, args.force, args.concurrency)
+            print(counts)
+            return 1 if counts["failed"] else 0
+        report = await agent.library.status(agent)
+        for profile in report["missing_or_stale"]:
+            print(f"missing or stale: {profile}")
+        print(f"{report['current']}/{report['profiles']} profiles current in version {report['version']}")
+        return 1 if report["missing_or_stale"] else 0
+
+    sys.exit(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Shared async gateway for every LLM call made by the agents. Model clients are created once per process
+and reused, and calls use the non-blocking client API instead of occupying executor threads.
+
+Per model, the gateway caps concurrent calls (LLM_MAX_CONCURRENCY), spaces requests with a token
+bucket sized to the API quota (GEMINI_RPM requests per minute, 0 for no limit) and coalesces identical
+in-flight prompts into one call. Latency, tokens, errors and coalesced calls are accounted per agent.
+
+LLM_BACKEND=fake swaps Gemini for FakeLLM, a local backend with canned answers, for offline runs.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.2"))
+
+
+class LLMResponse:
+    """Text of a completion with its token usage (0 when the backend does not report it)."""
+
+    def __init__(self, text: str, prompt_tokens: int = 0, output_tokens: int = 0):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+
+
+class TokenBucket:
+    """Async token bucket: `rate_per_minute` tokens a minute, bursts of up to `capacity`."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, rate_per_minute / 6.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waits = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Take one token, waiting for the bucket to refill if it is empty (FIFO between waiters)."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                self.waits += 1
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class GeminiBackend:
+    """Gemini through the async client of google.generativeai; one client per model name."""
+
+    def __init__(self):
+        api_key = os.getenv("GEMINI_API_KEY")
+        logger.info(f"Loaded GEMINI_API_KEY: {'Set' if api_key else 'Not set'}")
+        if genai is None:
+            raise ValueError("google-generativeai is not installed")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY is required")
+        genai.configure(api_key=api_key)
+        self._models: Dict[str, Any] = {}
+
+    def _model(self, model: str):
+        if model not in self._models:
+            self._models[model] = genai.GenerativeModel(model)
+        return self._models[model]
+
+    @staticmethod
+    def _usage(response) -> Tuple[int, int]:
+        usage = getattr(response, "usage_metadata", None)
+        return (
+            getattr(usage, "prompt_token_count", 0) or 0,
+            getattr(usage, "candidates_token_count", 0) or 0
+        )
+
+    async def generate(self, model: str, prompt: str) -> LLMResponse:
+        response = await self._model(model).generate_content_async(prompt)
+        return LLMResponse(response.text, *self._usage(response))
+
+    async def stream(self, model: str, prompt: str, usage: Dict[str, int]) -> AsyncIterator[str]:
+        """Yield text chunks; token counts are written to `usage` as they are reported."""
+        response = await self._model(model).generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            usage["prompt_tokens"], usage["output_tokens"] = self._usage(chunk)
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunk without text parts (e.g. only a finish reason or a safety block)
+                continue
+            yield text
+
+
+class FakeLLM:
+    """
+    Offline stand-in for Gemini: answers after FAKE_LLM_LATENCY seconds with a valid 7-day diet plan
+    when the prompt asks for JSON and with a fixed health answer otherwise. Tokens are counted as words.
+    """
+
+    def __init__(self, latency: float = FAKE_LLM_LATENCY):
+        self.latency = latency
+        self.calls = 0
+
+    def respond(self, prompt: str) -> str:
+        if "```json" in prompt:
+            meals = [
+                {"time": "07:00-08:00", "type": "Breakfast", "details": "Vegetable upma with a cup of curd"},
+                {"time": "10:30-11:00", "type": "Snack", "details": "A guava and a handful of roasted chana"},
+                {"time": "13:00-14:00", "type": "Lunch", "details": "Brown rice, dal, sambar and stir-fried beans"},
+                {"time": "19:30-20:30", "type": "Dinner", "details": "Two phulkas with paneer bhurji and salad"}
+            ]
+            plan = {
+                "days": {str(day): meals for day in range(1, 8)},
+                "notes": "Drink plenty of water, limit salt and sugar, and walk for 30 minutes a day."
+            }
+            return "```json\n" + json.dumps(plan, indent=2) + "\n```"
+        return (
+            "Rest well, drink plenty of fluids and eat light home-cooked food. "
+            "Please see a doctor for personalized advice. Have more questions? I'm here to help!"
+        )
+
+    async def generate(self, model: str, prompt: str) -> LLMResponse:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        text = self.respond(prompt)
+        return LLMResponse(text, len(prompt.split()), len(text.split()))
+
+    async def stream(self, model: str, prompt: str, usage: Dict[str, int]) -> AsyncIterator[str]:
+        self.calls += 1
+        text = self.respond(prompt)
+        chunks = [text[i:i + 200] for i in range(0, len(text), 200)]
+        usage["prompt_tokens"] = len(prompt.split())
+        for i, chunk in enumerate(chunks):
+            await asyncio.sleep(self.latency / len(chunks))
+            usage["output_tokens"] = len("".join(chunks[:i + 1]).split())
+            yield chunk
+
+
+class _ModelLimits:
+    """Concurrency cap and rate limiter of one model."""
+
+    def __init__(self, max_concurrency: int, rpm: float):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.bucket = TokenBucket(rpm)
+        self.in_flight = 0
+
+
+class LLMGateway:
+    """Rate-limited, coalescing front of an LLM backend, shared by all agents."""
+
+    def __init__(self, backend=None, max_concurrency: int = LLM_MAX_CONCURRENCY, rpm: float = GEMINI_RPM):
+        # Read at construction (not import) so a LLM_BACKEND set in .env is honoured.
+        self.backend = backend or (FakeLLM() if os.getenv("LLM_BACKEND", "gemini").lower() == "fake" else GeminiBackend())
+        self.max_concurrency = max_concurrency
+        self.rpm = rpm
+        self._limits: Dict[str, _ModelLimits] = {}
+        self._in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._agent_stats: Dict[str, Dict[str, Any]] = {}
+
+    def _model_limits(self, model: str) -> _ModelLimits:
+        if model not in self._limits:
+            self._limits[model] = _ModelLimits(self.max_concurrency, self.rpm)
+        return self._limits[model]
+
+    def _stats(self, agent: str) -> Dict[str, Any]:
+        return self._agent_stats.setdefault(agent, {
+            "calls": 0, "errors": 0, "coalesced": 0, "prompt_tokens": 0, "output_tokens": 0,
+            "total_latency": 0.0, "max_latency": 0.0
+        })
+
+    def _record(self, agent: str, started: float, prompt_tokens: int = 0, output_tokens: int = 0, error: bool = False):
+        latency = time.monotonic() - started
+        stats = self._stats(agent)
+        stats["calls"] += 1
+        stats["errors"] += int(error)
+        stats["prompt_tokens"] += prompt_tokens
+        stats["output_tokens"] += output_tokens
+        stats["total_latency"] += latency
+        stats["max_latency"] = max(stats["max_latency"], latency)
+
+    async def _call(self, prompt: str, agent: str, model: str) -> str:
+        limits = self._model_limits(model)
+        await limits.bucket.acquire()
+        async with limits.semaphore:
+            limits.in_flight += 1
+            started = time.monotonic()
+            try:
+                response = await self.backend.generate(model, prompt)
+            except Exception:
+                self._record(agent, started, error=True)
+                raise
+            finally:
+                limits.in_flight -= 1
+        self._record(agent, started, response.prompt_tokens, response.output_tokens)
+        return response.text
+
+    def _forget(self, key: Tuple[str, str], task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the error as retrieved even if every caller has given up waiting.
+            task.exception()
+
+    async def generate(self, prompt: str, agent: str, model: str) -> str:
+        """
+        Return the completion text of a prompt. Identical prompts to the same model that are already
+        in flight share that call; cancelling one caller does not cancel it for the others.
+        Args:
+            prompt: Full prompt text
+            agent: Calling agent, for accounting (e.g. 'diet', 'qa')
+            model: Model name (e.g. 'gemini-1.5-flash')
+        """
+        key = (model, prompt)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(prompt, agent, model))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._stats(agent)["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def stream(self, prompt: str, agent: str, model: str) -> AsyncIterator[str]:
+        """Yield the completion text of a prompt in chunks (not coalesced); holds a concurrency slot meanwhile."""
+        limits = self._model_limits(model)
+        await limits.bucket.acquire()
+        usage = {"prompt_tokens": 0, "output_tokens": 0}
+        async with limits.semaphore:
+            limits.in_flight += 1
+            started = time.monotonic()
+            error = True
+            try:
+                async for text in self.backend.stream(model, prompt, usage):
+                    yield text
+                error = False
+            finally:
+                limits.in_flight -= 1
+                self._record(agent, started, usage["prompt_tokens"], usage["output_tokens"], error=error)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-agent accounting and per-model load."""
+        return {
+            "backend": type(self.backend).__name__,
+            "agents": {
+                agent: {**stats, "avg_latency": stats["total_latency"] / stats["calls"] if stats["calls"] else 0.0}
+                for agent, stats in self._agent_stats.items()
+            },
+            "models": {
+                model: {
+                    "in_flight": limits.in_flight,
+                    "rate_limited_waits": limits.bucket.waits,
+                    "pending_prompts": sum(1 for m, _ in self._in_flight if m == model)
+                }
+                for model, limits in self._limits.items()
+            }
+        }
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Return the process-wide LLM gateway, creating its backend on first use."""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
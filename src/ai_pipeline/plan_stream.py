@@ -0,0 +1,170 @@
+"""
+Incremental parsing of a diet plan streamed from the LLM: each day of the plan is handed out as soon as
+its meal list is complete, so translation and PDF layout of the first days overlap with generation of
+the later ones. Output that can no longer become a valid plan is rejected as soon as it is seen rather
+than after the full completion.
+"""
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+# A number cut off mid-way (e.g. "12." or "1e") fails to decode but may still complete.
+_PARTIAL_NUMBER = re.compile(r"[-+.eE0-9]*\Z")
+
+
+class PlanStreamError(ValueError):
+    """The streamed output cannot (or did not) become a valid diet plan."""
+
+
+def _validate_meals(day: str, meals: Any):
+    if not isinstance(meals, list) or not meals:
+        raise PlanStreamError(f"day {day}: no meals")
+    for meal in meals:
+        if not isinstance(meal, dict) or not all(isinstance(meal.get(f), str) for f in ("type", "details")):
+            raise PlanStreamError(f"day {day}: malformed meal {meal!r}")
+
+
+class DietPlanStreamParser:
+    """
+    Incremental parser of a diet plan JSON object (optionally inside a ```json fence) of the form
+    {"days": {"1": [meal, ...], ...}, "notes": "..."}.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.days: Dict[str, List[dict]] = {}
+        self.fields: Dict[str, Any] = {}
+        self._pos = 0
+        self._state = "start"
+
+    def feed(self, text: str) -> List[Tuple[str, List[dict]]]:
+        """
+        Add a chunk of model output.
+        Returns:
+            The (day, meals) pairs completed by this chunk, in order
+        Raises:
+            PlanStreamError: If the output so far cannot be the start of a valid plan
+        """
+        self.buffer += text
+        completed = []
+        while self._step(completed):
+            pass
+        return completed
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Return the complete plan once the stream has ended.
+        Raises:
+            PlanStreamError: If the output is empty, truncated or misses days or notes
+        """
+        if not self.buffer.strip():
+            raise PlanStreamError("empty response")
+        if self._state != "end":
+            raise PlanStreamError("truncated diet plan")
+        if not self.days or not isinstance(self.fields.get("notes"), str):
+            raise PlanStreamError("missing days or notes")
+        return {**self.fields, "days": self.days}
+
+    def _skip(self, chars: str = _WHITESPACE) -> bool:
+        """Advance past `chars`; False if the buffer ends first (more input needed)."""
+        while self._pos < len(self.buffer) and self.buffer[self._pos] in chars:
+            self._pos += 1
+        return self._pos < len(self.buffer)
+
+    def _decode(self) -> Tuple[bool, Any]:
+        """Decode the JSON value at the current position; (False, None) if it is not complete yet."""
+        try:
+            value, end = _DECODER.raw_decode(self.buffer, self._pos)
+        except json.JSONDecodeError as e:
+            rest = self.buffer[e.pos:].rstrip()
+            if (
+                "Unterminated" in e.msg
+                or not rest
+                or any(word.startswith(rest) for word in ("true", "false", "null"))
+                or _PARTIAL_NUMBER.match(rest)
+            ):
+                return False, None
+            raise PlanStreamError(f"invalid JSON at offset {e.pos}: {e.msg}")
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and _PARTIAL_NUMBER.match(self.buffer, end):
+            # A top-level number is only complete once a delimiter follows: "1" of "123" or "12" of "12.5"
+            # decode fine but the next chunk may extend them.
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _decode_key(self) -> Tuple[bool, Any]:
+        """Decode `"key":` and position after the colon; (False, None) if it is not complete yet."""
+        if self.buffer[self._pos] != '"':
+            raise PlanStreamError(f"expected a key at offset {self._pos}")
+        start = self._pos
+        complete, key = self._decode()
+        if complete and self._skip():
+            if self.buffer[self._pos] != ":":
+                raise PlanStreamError(f"expected ':' at offset {self._pos}")
+            self._pos += 1
+            if self._skip():
+                return True, key
+        self._pos = start
+        return False, None
+
+    def _step(self, completed: List[Tuple[str, List[dict]]]) -> bool:
+        """Consume one token or value; False when more input is needed."""
+        if self._state == "start":
+            if not self._skip():
+                return False
+            rest = self.buffer[self._pos:]
+            if rest.startswith("{"):
+                self._pos += 1
+                self._state = "object"
+                return True
+            if not rest.startswith("```"):
+                if "```".startswith(rest):
+                    return False
+                raise PlanStreamError("response is not a JSON object")
+            newline = rest.find("\n")
+            if newline < 0:
+                return False
+            if rest[3:newline].strip().lower() not in ("", "json"):
+                raise PlanStreamError(f"unexpected code fence {rest[:newline]!r}")
+            self._pos += newline + 1
+            if not self._skip():
+                return False
+            if self.buffer[self._pos] != "{":
+                raise PlanStreamError("fenced block is not a JSON object")
+            self._pos += 1
+            self._state = "object"
+            return True
+
+        if self._state == "end":
+            return False
+
+        if not self._skip(_WHITESPACE + ","):
+            return False
+        if self.buffer[self._pos] == "}":
+            self._pos += 1
+            self._state = "end" if self._state == "object" else "object"
+            return True
+
+        start = self._pos
+        complete, key = self._decode_key()
+        if not complete:
+            return False
+        if self._state == "object" and key == "days":
+            if self.buffer[self._pos] != "{":
+                raise PlanStreamError("'days' is not an object")
+            self._pos += 1
+            self._state = "days"
+            return True
+        complete, value = self._decode()
+        if not complete:
+            self._pos = start
+            return False
+        if self._state == "days":
+            _validate_meals(key, value)
+            self.days[key] = value
+            completed.append((key, value))
+        else:
+            self.fields[key] = value
+        return True
@@ -1,7 +1,6 @@
 import re
 import logging
 
-logging.basicConfig(level=logging.INFO, filename="bot.log")
 logger = logging.getLogger(__name__)
 
 def analyze_health_indicators(text):
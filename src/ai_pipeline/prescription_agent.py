@@ -1,44 +1,25 @@
+import hashlib
 import logging
 import sys
 import os
+from typing import Tuple
 from dotenv import load_dotenv
-from google.generativeai import GenerativeModel
-from src.database.mongodb import MongoDB
+from src.database.mongodb import get_async_mongodb
 from src.utils.helpers import validate_translation, LANGUAGE_MAP
-from src.input_processing.translation import translate_text
+from src.input_processing.translation import translate_lines
+from src.ai_pipeline.llm_gateway import get_llm_gateway
+from src.utils.retry import get_policy
+from src.utils.singleflight import SINGLE_FLIGHT_TTL, get_singleflight
 
 load_dotenv()
 
-class UnicodeSafeStreamHandler(logging.StreamHandler):
-    def __init__(self):
-        super().__init__(stream=sys.stdout)
-        if sys.stdout.encoding.lower() != "utf-8":
-            self.stream = open(sys.stdout.fileno(), mode="w", encoding="utf-8", buffering=1)
-
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler("bot.log", encoding="utf-8"),
-        UnicodeSafeStreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 if sys.platform == "win32":
     if sys.stdout.encoding != "utf-8":
         sys.stdout.reconfigure(encoding="utf-8")
 
-try:
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    logger.info(f"Loaded GEMINI_API_KEY: {'Set' if gemini_api_key else 'Not set'}")
-    if not gemini_api_key:
-        raise ValueError("GEMINI_API_KEY not found in environment variables")
-    gemini_model = GenerativeModel("gemini-1.5-flash")
-    logger.info("Gemini API initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Gemini API: {str(e)}")
-    gemini_model = None
+MODEL = "gemini-1.5-flash"
 
 async def analyze_report(user_id: str, query: str) -> str:
     """
@@ -49,9 +30,19 @@ async def analyze_report(user_id: str, query: str) -> str:
     Returns:
         Translated response with extracted details and explanations
     """
+    # A report resent just after it was answered (updates of one user run one at a time) gets that answer
+    # for SINGLE_FLIGHT_TTL seconds instead of a new Gemini call. The fallback message is not reused.
+    flights = get_singleflight("report", SINGLE_FLIGHT_TTL, remember_if=lambda result: result[1])
+    key = f"{user_id}_" + hashlib.md5(query.encode()).hexdigest()
+    (response, _), _ = await flights.do(key, _analyze_report, user_id, query)
+    return response
+
+
+async def _analyze_report(user_id: str, query: str) -> Tuple[str, bool]:
+    """Returns the response and whether it is Gemini's answer (False for the fallback message)."""
     logger.info(f"Processing report for user {user_id}: {query}")
-    mongodb = MongoDB()
-    user_profile = mongodb.get_user(user_id)
+    mongodb = get_async_mongodb()
+    user_profile = await mongodb.get_user(user_id)
     user_name = user_profile.get("name", "User")
     lang = user_profile.get("language", "en")
 
@@ -81,13 +72,12 @@ async def analyze_report(user_id: str, query: str) -> str:
         "Do not diagnose or prescribe."
     )
 
+    answered = True
     try:
-        if not gemini_model:
-            raise ValueError("Gemini API not initialized")
-        response = gemini_model.generate_content(prompt)
-        response_text = response.text.strip()
+        response_text = (await get_policy("gemini").call(get_llm_gateway().generate, prompt, "prescription", MODEL)).strip()
         logger.info(f"Gemini response for user {user_id}: {response_text[:100]}...")
     except Exception as e:
+        answered = False
         logger.error(f"Gemini API error for user {user_id}: {str(e)}", exc_info=True)
         response_text = (
             f"Hello, {user_name}! I couldn't process your report '{query}'. "
@@ -96,16 +86,16 @@ async def analyze_report(user_id: str, query: str) -> str:
 
     # Translate response
     try:
-        translated_response = await translate_text(response_text, "en", lang)
+        translated_response = await translate_lines(response_text, "en", lang)
         if validate_translation(translated_response, lang):
             logger.info(f"Translated response for user {user_id}: {translated_response[:100]}...")
-            mongodb.save_interaction(user_id, "report", query, translated_response)
-            return translated_response
+            await mongodb.save_interaction(user_id, "report", query, translated_response, lang)
+            return translated_response, answered
         else:
             logger.warning(f"Translation validation failed for lang={lang}. Using English fallback.")
-            mongodb.save_interaction(user_id, "report", query, response_text)
-            return response_text
+            await mongodb.save_interaction(user_id, "report", query, response_text, lang)
+            return response_text, answered
     except Exception as e:
         logger.error(f"Translation error for user {user_id}: {str(e)}", exc_info=True)
-        mongodb.save_interaction(user_id, "report", query, response_text)
-        return response_text
\ No newline at end of file
+        await mongodb.save_interaction(user_id, "report", query, response_text, lang)
+        return response_text, answered
\ No newline at end of file
@@ -1,45 +1,26 @@
+import hashlib
 import logging
 import sys
 import os
 import re
+from typing import Tuple
 from dotenv import load_dotenv
-from google.generativeai import GenerativeModel
-from src.database.mongodb import MongoDB
+from src.database.mongodb import get_async_mongodb
 from src.utils.helpers import sanitize_text, validate_translation, LANGUAGE_MAP
-from src.input_processing.translation import translate_text
+from src.input_processing.translation import translate_lines
+from src.ai_pipeline.llm_gateway import get_llm_gateway
+from src.utils.retry import get_policy
+from src.utils.singleflight import SINGLE_FLIGHT_TTL, get_singleflight
 
 load_dotenv()
 
-class UnicodeSafeStreamHandler(logging.StreamHandler):
-    def __init__(self):
-        super().__init__(stream=sys.stdout)
-        if sys.stdout.encoding.lower() != "utf-8":
-            self.stream = open(sys.stdout.fileno(), mode="w", encoding="utf-8", buffering=1)
-
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler("bot.log", encoding="utf-8"),
-        UnicodeSafeStreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 if os.name == "nt":
     if sys.stdout.encoding != "utf-8":
         sys.stdout.reconfigure(encoding="utf-8")
 
-try:
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    logger.info(f"Loaded GEMINI_API_KEY: {'Set' if gemini_api_key else 'Not set'}")
-    if not gemini_api_key:
-        raise ValueError("GEMINI_API_KEY not found in environment variables")
-    gemini_model = GenerativeModel("gemini-1.5-flash")
-    logger.info("Gemini API initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Gemini API: {str(e)}")
-    gemini_model = None
+MODEL = "gemini-1.5-flash"
 
 async def process_query(user_id: str, query: str, is_audio: bool = False) -> str:
     """
@@ -51,9 +32,20 @@ async def process_query(user_id: str, query: str, is_audio: bool = False) -> str
     Returns:
         Translated response text
     """
+    # Updates of one user are handled one at a time, so a resent query arrives after the first one has
+    # been answered: it is served that answer for SINGLE_FLIGHT_TTL seconds instead of a new Gemini call.
+    # The apology fallback is not reused, so a retry after it reaches Gemini again.
+    flights = get_singleflight("query", SINGLE_FLIGHT_TTL, remember_if=lambda result: result[1])
+    key = f"{user_id}_{is_audio}_" + hashlib.md5(query.encode()).hexdigest()
+    (response, _), _ = await flights.do(key, _process_query, user_id, query, is_audio)
+    return response
+
+
+async def _process_query(user_id: str, query: str, is_audio: bool = False) -> Tuple[str, bool]:
+    """Returns the response and whether it is Gemini's answer (False for the apology fallback)."""
     logger.info(f"Processing query for user {user_id}: {query} (is_audio={is_audio})")
-    mongodb = MongoDB()
-    user_profile = mongodb.get_user(user_id)
+    mongodb = get_async_mongodb()
+    user_profile = await mongodb.get_user(user_id)
     user_name = user_profile.get("name", "there")
     lang = user_profile.get("language", "en")
     age = user_profile.get("age", None)
@@ -71,16 +63,15 @@ async def process_query(user_id: str, query: str, is_audio: bool = False) -> str
         query_allergies = [allergy.strip() for allergy in match.group(1).split(",") if allergy.strip()]
         allergies.extend(query_allergies)
         allergies = list(set(allergies))  # Remove duplicates
-        mongodb.save_user({"user_id": user_id, "language": lang, "name": user_name, "age": age, "allergies": allergies})
+        await mongodb.save_user({"user_id": user_id, "language": lang, "name": user_name, "age": age, "allergies": allergies})
         logger.info(f"Detected allergies in query for user {user_id}: {query_allergies}")
 
     # Retrieve recent interactions for context
     try:
-        recent_interaction = mongodb.db.interactions.find_one(
-            {"user_id": user_id, "input_type": "query"},
-            sort=[("timestamp", -1)]
-        ) if mongodb.db else None
-        context = recent_interaction["query"] + " -> " + recent_interaction["response"] if recent_interaction else ""
+        recent_interaction = await mongodb.get_recent_interaction(user_id, "query")
+        context = (
+            f"{recent_interaction['input_text']} -> {recent_interaction['response']}" if recent_interaction else ""
+        )
     except Exception as e:
         logger.error(f"Error fetching recent interaction for user {user_id}: {str(e)}")
         context = ""
@@ -107,13 +98,12 @@ async def process_query(user_id: str, query: str, is_audio: bool = False) -> str
         "End with: 'Please see a doctor for personalized advice. Have more questions? I'm here to help!'"
     )
 
+    answered = True
     try:
-        if not gemini_model:
-            raise ValueError("Gemini API not initialized")
-        response = gemini_model.generate_content(prompt)
-        response_text = response.text.strip()
+        response_text = (await get_policy("gemini").call(get_llm_gateway().generate, prompt, "qa", MODEL)).strip()
         logger.info(f"Gemini response for user {user_id}: {response_text[:100]}...")
     except Exception as e:
+        answered = False
         logger.error(f"Gemini API error for user {user_id}: {str(e)}", exc_info=True)
         response_text = (
             f"Hello, {user_name}, I'm sorry, but I couldn't process your query '{query}' right now. "
@@ -122,7 +112,7 @@ async def process_query(user_id: str, query: str, is_audio: bool = False) -> str
 
     # Translate response
     try:
-        translated_response = await translate_text(response_text, "en", lang)
+        translated_response = await translate_lines(response_text, "en", lang)
         if validate_translation(translated_response, lang):
             logger.info(f"Translated response for user {user_id}: {translated_response[:100]}...")
         else:
@@ -134,9 +124,9 @@ async def process_query(user_id: str, query: str, is_audio: bool = False) -> str
 
     # Store interaction
     try:
-        mongodb.save_interaction(user_id, "query", query, translated_response, is_audio=is_audio)
+        await mongodb.save_interaction(user_id, "query", query, translated_response, lang, is_audio=is_audio)
         logger.info(f"Saved query interaction for user {user_id}")
     except Exception as e:
         logger.error(f"Error saving interaction for user {user_id}: {str(e)}")
 
-    return translated_response
\ No newline at end of file
+    return translated_response, answered
\ No newline at end of file
@@ -5,20 +5,6 @@ from src.ai_pipeline.diet_agent import generate_diet_plan
 from src.ai_pipeline.prescription_agent import analyze_report
 from src.utils.helpers import LANGUAGE_MAP
 
-class UnicodeSafeStreamHandler(logging.StreamHandler):
-    def __init__(self):
-        super().__init__(stream=sys.stdout)
-        if sys.stdout.encoding.lower() != "utf-8":
-            self.stream = open(sys.stdout.fileno(), mode="w", encoding="utf-8", buffering=1)
-
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler("bot.log", encoding="utf-8"),
-        UnicodeSafeStreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 if sys.platform == "win32":
@@ -0,0 +1,474 @@
+"""
+Horizontal deployment: one coordinator process fronting N bot worker processes.
+
+The coordinator owns the public webhook endpoint. It routes each update to a worker by consistent
+hashing on the sender's user id, so one user's updates always reach the same worker (keeping
+per-user ordering, the profile cache and warm models on that worker). Workers are ordinary bots in
+webhook mode listening on 127.0.0.1:<WORKER_BASE_PORT + i>.
+
+Health protocol: the coordinator polls each worker's `GET /healthz`. After
+`WORKER_MAX_FAILURES` failed probes a worker is taken out of the ring, its queued updates are
+re-routed and the process is restarted; it rejoins once it answers again.
+
+Shard handoff: when a worker leaves gracefully (shutdown or `POST /cluster/drain/<index>`) or joins,
+updates for the users whose owner changes are held until the previous owner has finished everything
+it was sent for them, then released to the new owner in order. Workers that gain users drop their
+cached profiles first (`POST /cluster/flush`), since an entry left from an earlier ownership is stale.
+
+Usage:
+    BOT_WORKERS=4 python -m src.bot.cluster
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import os
+import secrets
+import signal
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from dotenv import load_dotenv
+from src.bot.webhook import SECRET_HEADER, serve_http
+from src.utils.logging_config import setup_logging
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+UPDATE_KINDS = (
+    "message", "edited_message", "callback_query", "inline_query", "chosen_inline_result",
+    "shipping_query", "pre_checkout_query", "poll_answer", "my_chat_member", "chat_member",
+    "chat_join_request", "channel_post", "edited_channel_post"
+)
+
+
+def update_owner_key(update: Dict[str, Any]) -> str:
+    """Return the routing key (user id, else chat id) of a raw Telegram update."""
+    for kind in UPDATE_KINDS:
+        body = update.get(kind)
+        if isinstance(body, dict):
+            sender = body.get("from") or body.get("user")
+            if isinstance(sender, dict) and "id" in sender:
+                return str(sender["id"])
+            chat = body.get("chat")
+            if isinstance(chat, dict) and "id" in chat:
+                return str(chat["id"])
+    return str(update.get("update_id", ""))
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes."""
+
+    def __init__(self, replicas: int = 100):
+        self.replicas = replicas
+        self._hashes: List[int] = []
+        self._owners: Dict[int, int] = {}
+        self.nodes = set()
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int(hashlib.md5(value.encode("utf-8")).hexdigest()[:16], 16)
+
+    def add(self, node: int):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for replica in range(self.replicas):
+            h = self._hash(f"worker-{node}-{replica}")
+            self._owners[h] = node
+            bisect.insort(self._hashes, h)
+
+    def remove(self, node: int):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        for replica in range(self.replicas):
+            h = self._hash(f"worker-{node}-{replica}")
+            del self._owners[h]
+            self._hashes.remove(h)
+
+    def get(self, key: str) -> Optional[int]:
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._owners[self._hashes[index]]
+
+
+class WorkerHandle:
+    """Coordinator-side state of one worker process."""
+
+    def __init__(self, index: int, port: int, queue_size: int):
+        self.index = index
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.state = "starting"  # starting | joining | healthy | unhealthy | draining | stopped
+        self.failures = 0
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.held: List[Tuple[str, bytes]] = []
+        self.forwarder: Optional[asyncio.Task] = None
+        # Update being forwarded, and queued updates per routing key
+        self.current: Optional[Tuple[str, bytes]] = None
+        self.pending_keys: Dict[str, int] = {}
+        # Set when the worker gained users; its profile cache is flushed before the next update is sent
+        self.flush_pending = False
+
+    def enqueue(self, key: str, body: bytes):
+        self.queue.put_nowait((key, body))
+        self.pending_keys[key] = self.pending_keys.get(key, 0) + 1
+
+    def dequeued(self, key: str):
+        self.pending_keys[key] -= 1
+        if not self.pending_keys[key]:
+            del self.pending_keys[key]
+
+
+class Coordinator:
+    """Routes webhook updates to sharded bot workers and supervises them."""
+
+    def __init__(self, num_workers: int):
+        self.num_workers = num_workers
+        self.base_port = int(os.getenv("WORKER_BASE_PORT", "9100"))
+        self.queue_size = int(os.getenv("WORKER_QUEUE_SIZE", "1000"))
+        self.health_interval = float(os.getenv("WORKER_HEALTH_INTERVAL", "5"))
+        self.max_failures = int(os.getenv("WORKER_MAX_FAILURES", "3"))
+        self.handoff_timeout = float(os.getenv("WORKER_HANDOFF_TIMEOUT", "60"))
+        self.public_secret = os.getenv("WEBHOOK_SECRET")
+        self.internal_secret = secrets.token_hex(16)
+        self.worker_path = "/telegram"
+        self.workers = [WorkerHandle(i, self.base_port + i, self.queue_size) for i in range(num_workers)]
+        # `ownership` includes workers that are handing off; `routing` only those that may receive updates.
+        self.ownership = HashRing()
+        self.routing = HashRing()
+        self.client: Optional[httpx.AsyncClient] = None
+        self._tasks: List[asyncio.Task] = []
+
+    # ---- worker processes -------------------------------------------------------------------
+
+    async def _spawn(self, worker: WorkerHandle):
+        env = dict(os.environ)
+        log_file = os.getenv("LOG_FILE", "bot.log")
+        env.update({
+            "BOT_MODE": "webhook",
+            "WEBHOOK_HOST": "127.0.0.1",
+            "WEBHOOK_PORT": str(worker.port),
+            "WEBHOOK_PATH": self.worker_path,
+            "WEBHOOK_SECRET": self.internal_secret,
+            "BOT_WORKER_INDEX": str(worker.index),
+            # RotatingFileHandler cannot be shared between processes, so each worker gets its own file.
+            "LOG_FILE": f"{os.path.splitext(log_file)[0]}.worker{worker.index}.log",
+        })
+        env.pop("WEBHOOK_URL", None)  # only the coordinator registers with Telegram
+        worker.process = await asyncio.create_subprocess_exec(sys.executable, "-m", "src.bot.telegram_bot", env=env)
+        worker.state = "starting"
+        worker.failures = 0
+        logger.info(f"Started worker {worker.index} (pid {worker.process.pid}) on port {worker.port}")
+
+    async def _terminate(self, worker: WorkerHandle):
+        if worker.process and worker.process.returncode is None:
+            worker.process.terminate()
+            try:
+                await asyncio.wait_for(worker.process.wait(), timeout=30)
+            except asyncio.TimeoutError:
+                worker.process.kill()
+                await worker.process.wait()
+        logger.info(f"Worker {worker.index} stopped")
+
+    async def _probe(self, worker: WorkerHandle) -> Optional[Dict[str, Any]]:
+        try:
+            response = await self.client.get(f"{worker.url}/healthz", timeout=2.0)
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError):
+            return None
+
+    # ---- routing ----------------------------------------------------------------------------
+
+    def dispatch(self, key: str, body: bytes) -> bool:
+        """Route one update; returns False when it cannot be accepted right now."""
+        owner = self.ownership.get(key)
+        if owner is None:
+            return False
+        worker = self.workers[owner]
+        if worker.state in ("draining", "joining"):
+            # Ownership of this key is moving; hold it until the handoff completes.
+            if len(worker.held) >= self.queue_size:
+                return False
+            worker.held.append((key, body))
+            return True
+        try:
+            worker.enqueue(key, body)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _forward_loop(self, worker: WorkerHandle):
+        headers = {SECRET_HEADER: self.internal_secret, "Content-Type": "application/json"}
+        while True:
+            key, body = await worker.queue.get()
+            worker.current = (key, body)
+            delay = 0.2
+            try:
+                while True:
+                    if worker.state in ("unhealthy", "stopped"):
+                        if not self.dispatch(key, body):
+                            logger.error(f"Dropping update for {key}: no worker can accept it")
+                        break
+                    try:
+                        if worker.flush_pending:
+                            response = await self.client.post(f"{worker.url}/cluster/flush", headers=headers)
+                            if response.status_code != 200:
+                                raise httpx.HTTPError(f"profile cache flush answered HTTP {response.status_code}")
+                            worker.flush_pending = False
+                        response = await self.client.post(f"{worker.url}{self.worker_path}", content=body,
+                                                          headers=headers)
+                        if response.status_code == 200:
+                            break
+                        if response.status_code != 503:
+                            logger.error(f"Worker {worker.index} rejected update for {key}: HTTP {response.status_code}")
+                            break
+                    except httpx.HTTPError as e:
+                        logger.warning(f"Forwarding to worker {worker.index} failed: {str(e)}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 5.0)
+            finally:
+                worker.current = None
+                worker.dequeued(key)
+                worker.queue.task_done()
+
+    def _reroute_queue(self, worker: WorkerHandle):
+        """Move a failed worker's pending updates to their new owners, preserving order."""
+        pending = []
+        while not worker.queue.empty():
+            pending.append(worker.queue.get_nowait())
+            worker.dequeued(pending[-1][0])
+            worker.queue.task_done()
+        for key, body in pending:
+            if not self.dispatch(key, body):
+                logger.error(f"Dropping update for {key} while failing over worker {worker.index}")
+        if pending:
+            logger.info(f"Re-routed {len(pending)} updates from worker {worker.index}")
+
+    # ---- handoff ----------------------------------------------------------------------------
+
+    async def _wait_idle(self, worker: WorkerHandle, deadline: float):
+        """Wait until everything forwarded to `worker` has been processed, or the deadline passes."""
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(worker.queue.join(), timeout=max(deadline - loop.time(), 0.01))
+        except asyncio.TimeoutError:
+            logger.warning(f"Handoff timeout waiting for worker {worker.index} forward queue")
+            return
+        while loop.time() < deadline:
+            health = await self._probe(worker)
+            if health is None or (health.get("queue_depth") == 0 and health.get("in_flight") == 0):
+                return
+            await asyncio.sleep(0.2)
+        logger.warning(f"Handoff timeout waiting for worker {worker.index} to go idle")
+
+    async def _busy_keys(self, worker: WorkerHandle) -> Optional[List[str]]:
+        """Return the users the worker has accepted updates for and not finished, or None if it is down."""
+        try:
+            response = await self.client.get(f"{worker.url}/cluster/busy", timeout=2.0,
+                                             headers={SECRET_HEADER: self.internal_secret})
+            response.raise_for_status()
+            return response.json()["owners"]
+        except (httpx.HTTPError, ValueError, KeyError):
+            return None
+
+    async def _wait_moved(self, worker: WorkerHandle, new_owner: int, deadline: float):
+        """
+        Wait until `worker` has nothing queued or in progress for the users now owned by `new_owner`.
+        Unlike `_wait_idle`, this does not wait for the worker's other users, so it ends promptly under load.
+        """
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            if not any(self.ownership.get(key) == new_owner for key in worker.pending_keys):
+                busy = await self._busy_keys(worker)
+                if busy is None or not any(self.ownership.get(key) == new_owner for key in busy):
+                    return
+            await asyncio.sleep(0.2)
+        logger.warning(f"Handoff timeout waiting for worker {worker.index} to finish users moving to worker {new_owner}")
+
+    def _mark_flush(self, workers: List[WorkerHandle]):
+        for worker in workers:
+            worker.flush_pending = True
+
+    def _release_held(self, worker: WorkerHandle):
+        held, worker.held = worker.held, []
+        for key, body in held:
+            if not self.dispatch(key, body):
+                logger.error(f"Dropping held update for {key} after handoff")
+        if held:
+            logger.info(f"Released {len(held)} held updates after handoff of worker {worker.index}")
+
+    async def join(self, worker: WorkerHandle):
+        """Admit a healthy worker, holding its new users' updates until their previous owners are idle."""
+        previous_owners = [self.workers[i] for i in self.routing.nodes]
+        worker.state = "joining"
+        self.ownership.add(worker.index)
+        await asyncio.sleep(0)
+        deadline = asyncio.get_running_loop().time() + self.handoff_timeout
+        await asyncio.gather(*(self._wait_moved(w, worker.index, deadline) for w in previous_owners))
+        if worker.state != "joining":
+            return
+        self.routing.add(worker.index)
+        worker.state = "healthy"
+        self._mark_flush([worker])
+        self._release_held(worker)
+        logger.info(f"Worker {worker.index} joined the ring")
+
+    async def drain(self, worker: WorkerHandle):
+        """Gracefully hand a worker's users to the rest of the ring and stop it."""
+        if worker.state not in ("healthy", "joining"):
+            return
+        logger.info(f"Draining worker {worker.index}")
+        worker.state = "draining"
+        self.routing.remove(worker.index)
+        await self._wait_idle(worker, asyncio.get_running_loop().time() + self.handoff_timeout)
+        self.ownership.remove(worker.index)
+        worker.state = "stopped"
+        self._mark_flush([self.workers[i] for i in self.routing.nodes])
+        self._release_held(worker)
+        await self._terminate(worker)
+
+    async def _fail(self, worker: WorkerHandle):
+        logger.error(f"Worker {worker.index} failed health checks; removing it from the ring")
+        worker.state = "unhealthy"
+        self.routing.remove(worker.index)
+        self.ownership.remove(worker.index)
+        # Stop forwarding before the process is restarted, so an update being retried is re-routed
+        # ahead of the queue instead of reaching the restarted worker out of order.
+        current = worker.current
+        if worker.forwarder:
+            worker.forwarder.cancel()
+            await asyncio.gather(worker.forwarder, return_exceptions=True)
+        self._mark_flush([self.workers[i] for i in self.routing.nodes])
+        if current and not self.dispatch(*current):
+            logger.error(f"Dropping update for {current[0]} while failing over worker {worker.index}")
+        self._release_held(worker)
+        self._reroute_queue(worker)
+        worker.forwarder = asyncio.create_task(self._forward_loop(worker))
+
+    async def _health_loop(self):
+        while True:
+            for worker in self.workers:
+                if worker.state in ("draining", "stopped", "joining"):
+                    continue
+                if worker.process is None or worker.process.returncode is not None:
+                    if worker.state == "healthy":
+                        await self._fail(worker)
+                    await self._spawn(worker)
+                    continue
+                health = await self._probe(worker)
+                if health is not None:
+                    worker.failures = 0
+                    if worker.state in ("starting", "unhealthy"):
+                        self._tasks.append(asyncio.create_task(self.join(worker)))
+                        await asyncio.sleep(0)
+                    continue
+                worker.failures += 1
+                if worker.state == "healthy" and worker.failures >= self.max_failures:
+                    await self._fail(worker)
+                    await self._terminate(worker)
+                    await self._spawn(worker)
+            await asyncio.sleep(self.health_interval)
+
+    # ---- public endpoint --------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": [
+                {"index": w.index, "state": w.state, "queue_depth": w.queue.qsize(), "held": len(w.held)}
+                for w in self.workers
+            ]
+        }
+
+    async def handle(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        if path == "/healthz":
+            healthy = any(w.state == "healthy" for w in self.workers)
+            return (200 if healthy else 503), self.stats()
+        if path.startswith("/cluster/drain/") and method == "POST":
+            if headers.get(SECRET_HEADER) != self.public_secret or not self.public_secret:
+                return 401, {"ok": False}
+            try:
+                worker = self.workers[int(path.rsplit("/", 1)[-1])]
+            except (ValueError, IndexError):
+                return 404, {"ok": False}
+            asyncio.create_task(self.drain(worker))
+            return 200, {"ok": True}
+        if path != os.getenv("WEBHOOK_PATH", "/telegram"):
+            return 404, {"ok": False}
+        if method != "POST":
+            return 405, {"ok": False}
+        if self.public_secret and headers.get(SECRET_HEADER) != self.public_secret:
+            return 401, {"ok": False}
+        try:
+            key = update_owner_key(json.loads(body))
+        except ValueError:
+            return 400, {"ok": False}
+        if not self.dispatch(key, body):
+            return 503, {"ok": False}
+        return 200, {"ok": True}
+
+    async def _register_webhook(self):
+        public_url = os.getenv("WEBHOOK_URL")
+        if not public_url:
+            return
+        base_url = os.getenv("TELEGRAM_BASE_URL", "https://api.telegram.org/bot")
+        payload = {"url": public_url, "allowed_updates": list(UPDATE_KINDS)}
+        if self.public_secret:
+            payload["secret_token"] = self.public_secret
+        response = await self.client.post(f"{base_url}{os.getenv('TELEGRAM_BOT_TOKEN')}/setWebhook", json=payload)
+        response.raise_for_status()
+        logger.info(f"Registered webhook with Telegram: {public_url}")
+
+    async def run(self):
+        self.client = httpx.AsyncClient(timeout=30.0)
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:  # Windows
+                pass
+
+        for worker in self.workers:
+            await self._spawn(worker)
+            worker.forwarder = asyncio.create_task(self._forward_loop(worker))
+        self._tasks.append(asyncio.create_task(self._health_loop()))
+
+        host = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+        port = int(os.getenv("WEBHOOK_PORT", "8443"))
+        server = await serve_http(self.handle, host, port)
+        logger.info(f"Coordinator listening on {host}:{port} with {self.num_workers} workers")
+        await self._register_webhook()
+
+        try:
+            await stop_event.wait()
+        finally:
+            logger.info("Coordinator shutting down")
+            server.close()
+            await server.wait_closed()
+            for task in self._tasks:
+                task.cancel()
+            # Every worker is going away, so there is nobody to hand users to: let each finish its own work.
+            deadline = loop.time() + self.handoff_timeout
+            await asyncio.gather(*(self._wait_idle(w, deadline) for w in self.workers))
+            for worker in self.workers:
+                await self._terminate(worker)
+                if worker.forwarder:
+                    worker.forwarder.cancel()
+            await self.client.aclose()
+
+
+def main():
+    setup_logging()
+    num_workers = int(os.getenv("BOT_WORKERS", str(os.cpu_count() or 2)))
+    asyncio.run(Coordinator(num_workers).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Dict, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+def update_owner(update: object) -> Optional[int]:
+    """Return the user (or chat) an update belongs to, used as the serialization key."""
+    if isinstance(update, Update):
+        if update.effective_user:
+            return update.effective_user.id
+        if update.effective_chat:
+            return update.effective_chat.id
+    return None
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processes updates concurrently across users while keeping each user's updates strictly ordered.
+
+    Conversation state lives in the user document (`awaiting_*` flags), so two updates from the same
+    user must never interleave. Updates without a user run unserialized.
+
+    PTB's `process_update` takes its concurrency semaphore before `do_process_update` runs, so a busy
+    user's queued updates would each hold a global slot while waiting for their own turn. That base
+    limit is therefore left unbounded, and `max_concurrent_updates` is enforced here, only by the update
+    at the head of each user's queue.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(sys.maxsize)
+        self.limit = max_concurrent_updates
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, int] = {}
+        self._running = 0
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # Created on first use so it binds to the loop that actually runs the bot.
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        return self._slots
+
+    async def _run(self, coroutine: Awaitable[Any]) -> None:
+        async with self.slots:
+            self._running += 1
+            try:
+                await coroutine
+            finally:
+                self._running -= 1
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        owner = update_owner(update)
+        if owner is None:
+            await self._run(coroutine)
+            return
+        lock = self._locks.setdefault(owner, asyncio.Lock())
+        self._pending[owner] = self._pending.get(owner, 0) + 1
+        try:
+            async with lock:
+                await self._run(coroutine)
+        finally:
+            self._pending[owner] -= 1
+            if not self._pending[owner]:
+                del self._pending[owner]
+                del self._locks[owner]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of users with queued updates, the total queued and the busy global slots."""
+        return {
+            "active_users": len(self._pending),
+            "queued_updates": sum(self._pending.values()),
+            "running_updates": self._running
+        }
+
+
+class OperationLimits:
+    """Global concurrency caps for expensive operations, shared by all users."""
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = limits
+        # Created on first use so they bind to the loop that actually runs the bot.
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._waiting = {name: 0 for name in limits}
+        self._running = {name: 0 for name in limits}
+
+    @asynccontextmanager
+    async def limit(self, operation: str):
+        """Hold one of the slots for `operation` for the duration of the block."""
+        semaphore = self._semaphores.get(operation)
+        if semaphore is None:
+            semaphore = self._semaphores[operation] = asyncio.Semaphore(self.limits[operation])
+        self._waiting[operation] += 1
+        if semaphore.locked():
+            logger.info(f"Waiting for a free '{operation}' slot ({self._running[operation]} running)")
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting[operation] -= 1
+        self._running[operation] += 1
+        try:
+            yield
+        finally:
+            self._running[operation] -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"limit": self.limits[name], "running": self._running[name], "waiting": self._waiting[name]}
+            for name in self.limits
+        }
+
+
+operation_limits = OperationLimits({
+    "diet_plan": int(os.getenv("DIET_PLAN_CONCURRENCY", "4")),
+    "ocr": int(os.getenv("OCR_CONCURRENCY", "2")),
+    "voice": int(os.getenv("VOICE_CONCURRENCY", "4")),
+})
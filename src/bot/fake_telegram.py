@@ -0,0 +1,166 @@
+"""
+Offline stand-ins for Telegram, for exercising webhook mode without network access.
+
+- `FakeTelegramSender` posts synthetic updates to the bot's webhook endpoint, as Telegram would.
+- `FakeBotAPI` answers the Bot API calls the bot makes (getMe, sendMessage, ...) and records them.
+  Point the bot at it with TELEGRAM_BASE_URL=http://127.0.0.1:8081/bot
+
+Usage:
+    python -m src.bot.fake_telegram api --port 8081
+    python -m src.bot.fake_telegram send --user-id 42 --text /start
+    python -m src.bot.fake_telegram send --user-id 42 --callback lang_en
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+import httpx
+from src.bot.webhook import SECRET_HEADER, serve_http
+from src.utils.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+FAKE_BOT = {"id": 1, "is_bot": True, "first_name": "AarogyaAI", "username": "aarogyaai_fake_bot"}
+
+
+class FakeTelegramSender:
+    """Builds Telegram-shaped updates and POSTs them to a webhook endpoint."""
+
+    def __init__(self, url: str, secret_token: Optional[str] = None):
+        self.url = url
+        self.secret_token = secret_token
+        self._update_ids = itertools.count(int(time.time()))
+        self._message_ids = itertools.count(1)
+
+    @staticmethod
+    def _user(user_id: int) -> Dict[str, Any]:
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+
+    def text_update(self, user_id: int, text: str) -> Dict[str, Any]:
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            "text": text
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": next(self._update_ids), "message": message}
+
+    def callback_update(self, user_id: int, data: str) -> Dict[str, Any]:
+        return {
+            "update_id": next(self._update_ids),
+            "callback_query": {
+                "id": str(next(self._message_ids)),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": {
+                    "message_id": next(self._message_ids),
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": FAKE_BOT,
+                    "text": "menu"
+                }
+            }
+        }
+
+    async def send(self, update: Dict[str, Any]) -> int:
+        """POST one update and return the HTTP status the bot answered with."""
+        headers = {SECRET_HEADER: self.secret_token} if self.secret_token else {}
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.post(self.url, json=update, headers=headers)
+        logger.info(f"Sent update {update['update_id']}: HTTP {response.status_code}")
+        return response.status_code
+
+
+def _parse_params(headers: Dict[str, str], body: bytes) -> Dict[str, Any]:
+    content_type = headers.get("content-type", "")
+    text = body.decode("utf-8", "replace")
+    if "json" in content_type:
+        return json.loads(text or "{}")
+    if "multipart/form-data" in content_type:
+        return dict(re.findall(r'form-data; name="([^"]+)"[^\r\n]*\r\n(?:[^\r\n]+\r\n)*\r\n([^\r]*)\r\n', text))
+    return {key: values[0] for key, values in parse_qs(text).items()}
+
+
+class FakeBotAPI:
+    """Minimal Bot API server that acknowledges every call and records outgoing messages."""
+
+    def __init__(self):
+        self.calls: List[Tuple[str, Dict[str, Any]]] = []
+        self._message_ids = itertools.count(1000)
+
+    def _message(self, params: Dict[str, Any], **extra) -> Dict[str, Any]:
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+            "from": FAKE_BOT
+        }
+        message.update(extra)
+        return message
+
+    async def handle(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        api_method = path.rsplit("/", 1)[-1]
+        params = _parse_params(headers, body)
+        self.calls.append((api_method, params))
+        logger.info(f"Bot API call {api_method}: {str(params)[:200]}")
+        if api_method == "getMe":
+            result: Any = FAKE_BOT
+        elif api_method == "sendMessage":
+            result = self._message(params, text=params.get("text", ""))
+        elif api_method == "sendDocument":
+            result = self._message(params, document={"file_id": "fake-document", "file_unique_id": "fake-document"})
+        elif api_method == "sendVoice":
+            result = self._message(params, voice={"file_id": "fake-voice", "file_unique_id": "fake-voice", "duration": 1})
+        else:
+            result = True
+        return 200, {"ok": True, "result": result}
+
+
+async def _run_api(host: str, port: int):
+    server = await serve_http(FakeBotAPI().handle, host, port)
+    logger.info(f"Fake Bot API listening on http://{host}:{port}/bot")
+    async with server:
+        await server.serve_forever()
+
+
+async def _run_send(args):
+    sender = FakeTelegramSender(args.url, args.secret)
+    if args.callback:
+        update = sender.callback_update(args.user_id, args.callback)
+    else:
+        update = sender.text_update(args.user_id, args.text)
+    await sender.send(update)
+
+
+def main():
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Offline Telegram stand-ins for webhook testing")
+    sub = parser.add_subparsers(dest="command", required=True)
+    api = sub.add_parser("api", help="Run a fake Bot API server")
+    api.add_argument("--host", default="127.0.0.1")
+    api.add_argument("--port", type=int, default=8081)
+    send = sub.add_parser("send", help="Send a fake update to the webhook endpoint")
+    send.add_argument("--url", default="http://127.0.0.1:8443/telegram")
+    send.add_argument("--secret", default=None)
+    send.add_argument("--user-id", type=int, default=42)
+    group = send.add_mutually_exclusive_group(required=True)
+    group.add_argument("--text")
+    group.add_argument("--callback")
+    args = parser.parse_args()
+    if args.command == "api":
+        asyncio.run(_run_api(args.host, args.port))
+    else:
+        asyncio.run(_run_send(args))
+
+
+if __name__ == "__main__":
+    main()
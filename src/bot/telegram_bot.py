@@ -16,35 +16,25 @@ from telegram.ext import (
     ContextTypes,
 )
 from google.cloud import texttospeech
-from src.database.mongodb import MongoDB
+from src.database.mongodb import MongoDB, clear_profile_caches, get_async_mongodb, close_mongodb
 from src.utils.helpers import sanitize_text, validate_translation, LANGUAGE_MAP
 from src.input_processing.asr import transcribe_audio
 from src.input_processing.ocr import extract_text_from_image
 from src.input_processing.translation import translate_text
+from src.input_processing.translation_cache import translation_cache
+from src.input_processing.translation_backends import backend_stats, close_backends, warm_up_backends
 from src.ai_pipeline.diet_agent import DietAgent
+from src.bot.dispatcher import PerUserUpdateProcessor, operation_limits
+from src.bot.webhook import serve_webhook
+from src.utils.executors import executor_stats, run_cpu, run_io, shutdown_executors
+from src.utils.retry import get_policy
+from src.utils.singleflight import singleflight_stats
+from src.utils.ui_strings import load_catalog, ui_text
+from src.utils.logging_config import DIAGNOSTIC_MODE, diagnostic_sample, setup_logging
 
 load_dotenv()
 
-# Enable verbose logging for python-telegram-bot
-logging.getLogger("telegram").setLevel(logging.DEBUG)
-logging.getLogger("telegram.ext").setLevel(logging.DEBUG)
-
-
-class UnicodeSafeStreamHandler(logging.StreamHandler):
-    def __init__(self):
-        super().__init__(stream=sys.stdout)
-        if sys.stdout.encoding.lower() != "utf-8":
-            self.stream = open(sys.stdout.fileno(), mode="w", encoding="utf-8", buffering=1)
-
-
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.DEBUG,
-    handlers=[
-        logging.FileHandler("bot.log", encoding="utf-8"),
-        UnicodeSafeStreamHandler()
-    ]
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 if sys.platform == "win32":
@@ -52,7 +42,6 @@ if sys.platform == "win32":
         sys.stdout.reconfigure(encoding="utf-8")
 
 DEBUG_MODE = os.getenv("DEBUG_MODE", "False").lower() == "true"
-DIAGNOSTIC_MODE = os.getenv("DIAGNOSTIC_MODE", "True").lower() == "true"
 
 # Initialize DietAgent globally
 diet_agent = DietAgent()
@@ -96,8 +85,8 @@ def text_to_speech(text: str, lang: str, output_path: str) -> bool:
             audio_encoding=texttospeech.AudioEncoding.MP3
         )
 
-        response = client.synthesize_speech(
-            input=synthesis_input, voice=voice, audio_config=audio_config
+        response = get_policy("tts").call_sync(
+            client.synthesize_speech, input=synthesis_input, voice=voice, audio_config=audio_config
         )
 
         with open(output_path, "wb") as out:
@@ -117,10 +106,15 @@ async def trigger_n8n_workflow(user_id: str, chat_id: str, prompt: str):
         "chat_id": chat_id,
         "prompt": prompt
     }
+
+    async def post(client: httpx.AsyncClient) -> httpx.Response:
+        response = await client.post(n8n_webhook_url, json=payload)
+        response.raise_for_status()
+        return response
+
     try:
         async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.post(n8n_webhook_url, json=payload)
-            response.raise_for_status()
+            response = await get_policy("n8n").call(post, client)
             logger.info(f"Triggered n8n workflow for user {user_id}: {response.status_code}")
     except Exception as e:
         logger.error(f"Failed to trigger n8n workflow for user {user_id}: {str(e)}", exc_info=True)
@@ -135,30 +129,27 @@ async def route_query(user_id: str, text: str, input_type: str) -> str:
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
     logger.info(f"Start command received from user {user_id}")
-    if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Entering start handler for user {user_id}, update: {update.to_dict()}")
-    mongodb = MongoDB()
+    if diagnostic_sample():
+        logger.debug("[DIAGNOSTIC] Entering start handler for user %s, update: %s", user_id, update.to_dict())
+    mongodb = get_async_mongodb()
     if mongodb.db is None:
         logger.error(f"Database connection failed for user {user_id}")
         await update.message.reply_text("Sorry, we're experiencing database issues. Please try again later.")
         return
 
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Fetching user profile for {user_id}")
-    user_profile = mongodb.get_user(user_id)
+        logger.debug("[DIAGNOSTIC] Fetching user profile for %s", user_id)
+    user_profile = await mongodb.get_user(user_id)
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] User profile: {user_profile}")
+        logger.debug("[DIAGNOSTIC] User profile: %s", user_profile)
     if user_profile.get("language") and user_profile.get("name") and "age" in user_profile and user_profile.get(
             "allergies") is not None:
         lang = user_profile.get("language", "en")
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Translating welcome message for lang {lang}")
-        prompt = await translate_text(
-            f"Welcome back, {user_profile['name']}! Select an option or use /dietplan for diet options:",
-            "en", lang
-        ) or f"Welcome back, {user_profile['name']}! Select an option or use /dietplan for diet options:"
+            logger.debug("[DIAGNOSTIC] Translating welcome message for lang %s", lang)
+        prompt = await ui_text("welcome_back", lang, name=user_profile['name'])
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Sending welcome message to {user_id}: {prompt}")
+            logger.debug("[DIAGNOSTIC] Sending welcome message to %s: %s", user_id, prompt)
         keyboard = [
             [InlineKeyboardButton("Queries", callback_data="action_queries")],
             [InlineKeyboardButton("Prediction", callback_data="action_prediction")],
@@ -175,60 +166,57 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Sending language selection to {user_id}")
+        logger.debug("[DIAGNOSTIC] Sending language selection to %s", user_id)
     await update.message.reply_text("Welcome to AarogyaAI! Please select your language:", reply_markup=reply_markup)
 
 
 async def diet_plan_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
     logger.info(f"Diet plan command received from user {user_id}")
-    if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Entering diet_plan_command for user {user_id}, update: {update.to_dict()}")
+    if diagnostic_sample():
+        logger.debug("[DIAGNOSTIC] Entering diet_plan_command for user %s, update: %s", user_id, update.to_dict())
 
-    mongodb = MongoDB()
+    mongodb = get_async_mongodb()
     if mongodb.db is None:
         logger.error(f"Database connection failed for user {user_id}")
         await update.message.reply_text("Sorry, we're experiencing database issues. Please try again later.")
         return
 
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Fetching user profile for {user_id}")
-    user_profile = mongodb.get_user(user_id)
+        logger.debug("[DIAGNOSTIC] Fetching user profile for %s", user_id)
+    user_profile = await mongodb.get_user(user_id)
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] User profile: {user_profile}")
+        logger.debug("[DIAGNOSTIC] User profile: %s", user_profile)
     if not user_profile.get("language"):
         logger.error(f"No language set for user {user_id}")
         await update.message.reply_text("Please start with /start to select your language.")
         return
     lang = user_profile.get("language", "en")
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Language for user {user_id}: {lang}")
+        logger.debug("[DIAGNOSTIC] Language for user %s: %s", user_id, lang)
 
-    prompt = await translate_text(
-        "Please reply with: 1 for Medical Report, 2 for Specific Condition, 3 for General Diet",
-        "en", lang
-    ) or "Please reply with: 1 for Medical Report, 2 for Specific Condition, 3 for General Diet"
+    prompt = await ui_text("diet_choice_menu", lang)
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Diet plan prompt: {prompt}")
+        logger.debug("[DIAGNOSTIC] Diet plan prompt: %s", prompt)
     try:
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Saving awaiting_diet_plan_choice state for user {user_id}")
-        mongodb.save_user({"user_id": user_id, "awaiting_diet_plan_choice": True})
+            logger.debug("[DIAGNOSTIC] Saving awaiting_diet_plan_choice state for user %s", user_id)
+        await mongodb.save_user({"user_id": user_id, "awaiting_diet_plan_choice": True})
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Sending diet plan prompt to user {user_id}")
+            logger.debug("[DIAGNOSTIC] Sending diet plan prompt to user %s", user_id)
         await update.message.reply_text(prompt)
         logger.info(f"Successfully sent diet plan prompt to user {user_id}")
     except Exception as e:
         logger.error(f"Telegram API error sending diet plan prompt to user {user_id}: {str(e)}", exc_info=True)
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Triggering n8n fallback for user {user_id}")
+            logger.debug("[DIAGNOSTIC] Triggering n8n fallback for user %s", user_id)
         await trigger_n8n_workflow(user_id, str(update.message.chat_id), prompt)
         await update.message.reply_text("Prompt sent via backup system. Please check or try again.")
 
 
 async def button(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Raw update received: {update.to_dict()}")
+    if diagnostic_sample():
+        logger.debug("[DIAGNOSTIC] Raw update received: %s", update.to_dict())
     query = update.callback_query
     try:
         await query.answer()
@@ -241,33 +229,31 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE):
     data = query.data
     logger.info(f"Button clicked by {user_id}: {data}")
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Entering button handler for user {user_id}, data: {data}")
+        logger.debug("[DIAGNOSTIC] Entering button handler for user %s, data: %s", user_id, data)
 
     try:
-        if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Initializing MongoDB for user {user_id}")
-        mongodb = MongoDB()
+        mongodb = get_async_mongodb()
         if mongodb.db is None:
             logger.error(f"Database connection failed for user {user_id}")
             await query.message.reply_text("Sorry, we're experiencing database issues. Please try again later.")
             return
 
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Fetching user profile for {user_id}")
-        user_profile = mongodb.get_user(user_id)
+            logger.debug("[DIAGNOSTIC] Fetching user profile for %s", user_id)
+        user_profile = await mongodb.get_user(user_id)
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] User profile for {user_id}: {user_profile}")
+            logger.debug("[DIAGNOSTIC] User profile for %s: %s", user_id, user_profile)
         if not user_profile.get("language"):
             logger.error(f"No language set for user {user_id}")
             await query.message.reply_text("Please start with /start to select your language.")
             return
         lang = user_profile.get("language", "en")
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Language for user {user_id}: {lang}")
+            logger.debug("[DIAGNOSTIC] Language for user %s: %s", user_id, lang)
 
         if data.startswith("lang_"):
             if DIAGNOSTIC_MODE:
-                logger.debug(f"[DIAGNOSTIC] Processing language selection: {data}")
+                logger.debug("[DIAGNOSTIC] Processing language selection: %s", data)
             lang = data.split("_")[1]
             if lang not in LANGUAGE_MAP:
                 logger.error(f"Invalid language selected by {user_id}: {lang}")
@@ -281,84 +267,71 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "awaiting_allergies": False
             }
             if DIAGNOSTIC_MODE:
-                logger.debug(f"[DIAGNOSTIC] Saving user data: {user_data}")
-            mongodb.save_user(user_data)
+                logger.debug("[DIAGNOSTIC] Saving user data: %s", user_data)
+            await mongodb.save_user(user_data)
             logger.info(f"Language set to {lang} for user {user_id}")
-            prompt = await translate_text(
-                "Please provide your name (1-50 characters).", "en", lang
-            ) or "Please provide your name (1-50 characters)."
+            prompt = await ui_text("ask_name", lang)
             await query.message.reply_text(prompt)
 
         elif data.startswith("action_"):
             action = data.split("_")[1]
             if DIAGNOSTIC_MODE:
-                logger.debug(f"[DIAGNOSTIC] Processing action: {action}")
+                logger.debug("[DIAGNOSTIC] Processing action: %s", action)
             if action == "queries":
-                prompt = await translate_text(
-                    "Please enter your health-related query.", "en", lang
-                ) or "Please enter your health-related query."
+                prompt = await ui_text("ask_query", lang)
                 await query.message.reply_text(prompt)
             elif action == "prediction":
-                prompt = await translate_text(
-                    "Prediction feature is not available yet. Please try another option.", "en", lang
-                ) or "Prediction feature is not available yet. Please try another option."
+                prompt = await ui_text("prediction_unavailable", lang)
                 await query.message.reply_text(prompt)
             elif action == "diet_plan":
                 logger.info(f"Processing diet_plan action for user {user_id}")
                 if DIAGNOSTIC_MODE:
-                    logger.debug(f"[DIAGNOSTIC] Entering diet_plan handler for user {user_id}")
-                prompt = await translate_text(
-                    "Please reply with: 1 for Medical Report, 2 for Specific Condition, 3 for General Diet",
-                    "en", lang
-                ) or "Please reply with: 1 for Medical Report, 2 for Specific Condition, 3 for General Diet"
+                    logger.debug("[DIAGNOSTIC] Entering diet_plan handler for user %s", user_id)
+                prompt = await ui_text("diet_choice_menu", lang)
                 if DIAGNOSTIC_MODE:
-                    logger.debug(f"[DIAGNOSTIC] Diet plan prompt: {prompt}")
+                    logger.debug("[DIAGNOSTIC] Diet plan prompt: %s", prompt)
                 try:
                     if DIAGNOSTIC_MODE:
-                        logger.debug(f"[DIAGNOSTIC] Saving awaiting_diet_plan_choice state for user {user_id}")
-                    mongodb.save_user({"user_id": user_id, "awaiting_diet_plan_choice": True})
+                        logger.debug("[DIAGNOSTIC] Saving awaiting_diet_plan_choice state for user %s", user_id)
+                    await mongodb.save_user({"user_id": user_id, "awaiting_diet_plan_choice": True})
                     if DIAGNOSTIC_MODE:
-                        logger.debug(f"[DIAGNOSTIC] Sending diet plan prompt to user {user_id}")
+                        logger.debug("[DIAGNOSTIC] Sending diet plan prompt to user %s", user_id)
                     await query.message.reply_text(prompt)
                     logger.info(f"Successfully sent diet plan prompt to user {user_id}")
                 except Exception as e:
                     logger.error(f"Telegram API error sending diet plan prompt to user {user_id}: {str(e)}",
                                  exc_info=True)
                     if DIAGNOSTIC_MODE:
-                        logger.debug(f"[DIAGNOSTIC] Triggering n8n fallback for user {user_id}")
+                        logger.debug("[DIAGNOSTIC] Triggering n8n fallback for user %s", user_id)
                     await trigger_n8n_workflow(user_id, str(query.message.chat_id), prompt)
                     await query.message.reply_text("Prompt sent via backup system. Please check or try again.")
             elif action == "prescription":
-                prompt = await translate_text(
-                    "Prescription feature is not available yet. Please try another option.", "en", lang
-                ) or "Prescription feature is not available yet. Please try another option."
+                prompt = await ui_text("prescription_unavailable", lang)
                 await query.message.reply_text(prompt)
     except Exception as e:
         logger.error(f"Unexpected error in button handler for user {user_id}: {str(e)}", exc_info=True)
-        error_msg = await translate_text(
-            "❌ Error processing your request. Please try again.", "en", lang
-        ) or "❌ Error processing your request. Please try again."
+        error_msg = await ui_text("error_request", lang)
         await query.message.reply_text(error_msg)
 
 
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.message.from_user.id)
-    if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Entering handle_text for user {user_id}, update: {update.to_dict()}")
-    mongodb = MongoDB()
+    if diagnostic_sample():
+        logger.debug("[DIAGNOSTIC] Entering handle_text for user %s, update: %s", user_id, update.to_dict())
+    mongodb = get_async_mongodb()
     if mongodb.db is None:
         logger.error(f"Database connection failed for user {user_id}")
         await update.message.reply_text("Sorry, we're experiencing database issues. Please try again later.")
         return
 
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Fetching user profile for {user_id}")
-    user_profile = mongodb.get_user(user_id)
+        logger.debug("[DIAGNOSTIC] Fetching user profile for %s", user_id)
+    user_profile = await mongodb.get_user(user_id)
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] User profile: {user_profile}")
+        logger.debug("[DIAGNOSTIC] User profile: %s", user_profile)
     text = update.message.text.strip()
     lang = user_profile.get("language", "en")
-    logger.debug(f"Received text from {user_id}: {text}, lang: {lang}")
+    logger.debug("Received text from %s: %s, lang: %s", user_id, text, lang)
 
     if not user_profile.get("language"):
         logger.error(f"No language set for {user_id}")
@@ -367,25 +340,20 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if user_profile.get("awaiting_diet_plan_choice"):
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Processing diet plan choice: {text}")
+            logger.debug("[DIAGNOSTIC] Processing diet plan choice: %s", text)
         if text in ["1", "2", "3"]:
             try:
                 if text == "1":
-                    prompt = await translate_text(
-                        "Please upload your medical report (PDF or image).", "en", lang
-                    ) or "Please upload your medical report (PDF or image)."
-                    mongodb.save_user({
+                    prompt = await ui_text("ask_report_upload", lang)
+                    await mongodb.save_user({
                         "user_id": user_id,
                         "awaiting_diet_report": True,
                         "awaiting_diet_plan_choice": False
                     })
                     await update.message.reply_text(prompt)
                 elif text == "2":
-                    prompt = await translate_text(
-                        "Please specify a condition (e.g., diabetes, hypertension, cholesterol).",
-                        "en", lang
-                    ) or "Please specify a condition (e.g., diabetes, hypertension, cholesterol)."
-                    mongodb.save_user({
+                    prompt = await ui_text("ask_condition", lang)
+                    await mongodb.save_user({
                         "user_id": user_id,
                         "awaiting_diet_condition": True,
                         "awaiting_diet_plan_choice": False
@@ -393,8 +361,9 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     await update.message.reply_text(prompt)
                 elif text == "3":
                     logger.info(f"Generating general diet plan for user {user_id}")
-                    response, pdf_path = await diet_agent.generate_diet_plan(user_id, "general diet plan",
-                                                                             is_medical_report=False)
+                    async with operation_limits.limit("diet_plan"):
+                        response, pdf_path = await diet_agent.generate_diet_plan(user_id, "general diet plan",
+                                                                                 is_medical_report=False)
                     if pdf_path and os.path.exists(pdf_path):
                         try:
                             with open(pdf_path, "rb") as pdf_file:
@@ -403,48 +372,36 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
                             logger.info(f"Sent diet plan PDF to user {user_id}: {pdf_path}")
                         except Exception as e:
                             logger.error(f"Failed to send PDF to user {user_id}: {str(e)}", exc_info=True)
-                            error_msg = await translate_text(
-                                "❌ Error sending diet plan PDF. Please try again.", "en", lang
-                            ) or "❌ Error sending diet plan PDF. Please try again."
+                            error_msg = await ui_text("error_pdf_send", lang)
                             await update.message.reply_text(error_msg)
                         finally:
                             if os.path.exists(pdf_path):
                                 try:
                                     os.remove(pdf_path)
-                                    logger.debug(f"Removed temporary PDF: {pdf_path}")
+                                    logger.debug("Removed temporary PDF: %s", pdf_path)
                                 except Exception as e:
                                     logger.error(f"Failed to remove PDF {pdf_path}: {str(e)}")
                     else:
-                        error_msg = await translate_text(
-                            "❌ Failed to generate diet plan PDF. Please try again.", "en", lang
-                        ) or "❌ Failed to generate diet plan PDF. Please try again."
+                        error_msg = await ui_text("error_pdf_generation", lang)
                         await update.message.reply_text(error_msg)
-                    mongodb.save_interaction(user_id, "diet", "general diet plan", response, lang, is_audio=False,
-                                             pdf_path=pdf_path)
-                    mongodb.save_user({"user_id": user_id, "awaiting_diet_plan_choice": False})
+                    await mongodb.save_interaction(user_id, "diet", "general diet plan", response, lang,
+                                                   is_audio=False, pdf_path=pdf_path)
+                    await mongodb.save_user({"user_id": user_id, "awaiting_diet_plan_choice": False})
             except Exception as e:
                 logger.error(f"Error processing diet plan choice {text} for user {user_id}: {str(e)}", exc_info=True)
-                error_msg = await translate_text(
-                    "❌ Error processing your choice. Please try again.", "en", lang
-                ) or "❌ Error processing your choice. Please try again."
+                error_msg = await ui_text("error_choice", lang)
                 await update.message.reply_text(error_msg)
         else:
-            prompt = await translate_text(
-                "Invalid choice. Please reply with: 1 for Medical Report, 2 for Specific Condition, 3 for General Diet",
-                "en", lang
-            ) or "Invalid choice. Please reply with: 1 for Medical Report, 2 for Specific Condition, 3 for General Diet"
+            prompt = await ui_text("invalid_diet_choice", lang)
             await update.message.reply_text(prompt)
         return
 
     if user_profile.get("awaiting_name"):
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Processing name input: {text}")
+            logger.debug("[DIAGNOSTIC] Processing name input: %s", text)
         if not re.match(r'^[a-zA-Z\s]{1,50}$', text):
-            logger.debug(f"Invalid name provided by {user_id}: {text}")
-            prompt = await translate_text(
-                "Please provide a valid name (1-50 characters, letters only).",
-                "en", lang
-            ) or "Please provide a valid name (1-50 characters, letters only)."
+            logger.debug("Invalid name provided by %s: %s", user_id, text)
+            prompt = await ui_text("invalid_name", lang)
             await update.message.reply_text(prompt)
             return
         user_data = {
@@ -455,17 +412,15 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "awaiting_age": True
         }
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Saving user data: {user_data}")
-        mongodb.save_user(user_data)
+            logger.debug("[DIAGNOSTIC] Saving user data: %s", user_data)
+        await mongodb.save_user(user_data)
         logger.info(f"Name set to {text} for user {user_id}")
-        prompt = await translate_text(
-            "Thank you! Please provide your age (0-120).", "en", lang
-        ) or "Thank you! Please provide your age (0-120)."
+        prompt = await ui_text("ask_age", lang)
         await update.message.reply_text(prompt)
 
     elif user_profile.get("awaiting_age"):
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Processing age input: {text}")
+            logger.debug("[DIAGNOSTIC] Processing age input: %s", text)
         try:
             age = int(text)
             if not 0 <= age <= 120:
@@ -479,24 +434,19 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "awaiting_allergies": True
             }
             if DIAGNOSTIC_MODE:
-                logger.debug(f"[DIAGNOSTIC] Saving user data: {user_data}")
-            mongodb.save_user(user_data)
+                logger.debug("[DIAGNOSTIC] Saving user data: %s", user_data)
+            await mongodb.save_user(user_data)
             logger.info(f"Age set to {age} for user {user_id}")
-            prompt = await translate_text(
-                "Thank you! Do you have any allergies (e.g., penicillin)? If none, say 'None'.",
-                "en", lang
-            ) or "Thank you! Do you have any allergies (e.g., penicillin)? If none, say 'None'."
+            prompt = await ui_text("ask_allergies", lang)
             await update.message.reply_text(prompt)
         except ValueError as e:
-            logger.debug(f"Invalid age provided by {user_id}: {text}, error: {str(e)}")
-            prompt = await translate_text(
-                "Please provide a valid age (0-120, numbers only).", "en", lang
-            ) or "Please provide a valid age (0-120, numbers only)."
+            logger.debug("Invalid age provided by %s: %s, error: %s", user_id, text, str(e))
+            prompt = await ui_text("invalid_age", lang)
             await update.message.reply_text(prompt)
 
     elif user_profile.get("awaiting_allergies"):
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Processing allergies input: {text}")
+            logger.debug("[DIAGNOSTIC] Processing allergies input: %s", text)
         allergies = []
         if text.lower() != "none":
             allergies = [
@@ -512,13 +462,10 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "awaiting_allergies": False
         }
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Saving user data: {user_data}")
-        mongodb.save_user(user_data)
+            logger.debug("[DIAGNOSTIC] Saving user data: %s", user_data)
+        await mongodb.save_user(user_data)
         logger.info(f"Allergies set to {allergies} for user {user_id}")
-        prompt = await translate_text(
-            f"Thank you, {user_profile.get('name', 'User')}! Select an option or use /dietplan for diet options:",
-            "en", lang
-        ) or f"Thank you, {user_profile.get('name', 'User')}! Select an option or use /dietplan for diet options:"
+        prompt = await ui_text("welcome_registered", lang, name=user_profile.get('name', 'User'))
         keyboard = [
             [InlineKeyboardButton("Queries", callback_data="action_queries")],
             [InlineKeyboardButton("Prediction", callback_data="action_prediction")],
@@ -530,11 +477,12 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     elif user_profile.get("awaiting_diet_condition"):
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Processing diet condition: {text}")
+            logger.debug("[DIAGNOSTIC] Processing diet condition: %s", text)
         logger.info(f"Generating diet plan for condition '{text}' for user {user_id}")
         try:
-            response, pdf_path = await diet_agent.generate_diet_plan(user_id, text, is_medical_report=False,
-                                                                     condition=text)
+            async with operation_limits.limit("diet_plan"):
+                response, pdf_path = await diet_agent.generate_diet_plan(user_id, text, is_medical_report=False,
+                                                                         condition=text)
             if pdf_path and os.path.exists(pdf_path):
                 try:
                     with open(pdf_path, "rb") as pdf_file:
@@ -542,41 +490,35 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     logger.info(f"Sent diet plan PDF to user {user_id}: {pdf_path}")
                 except Exception as e:
                     logger.error(f"Failed to send PDF to user {user_id}: {str(e)}", exc_info=True)
-                    error_msg = await translate_text(
-                        "❌ Error sending diet plan PDF. Please try again.", "en", lang
-                    ) or "❌ Error sending diet plan PDF. Please try again."
+                    error_msg = await ui_text("error_pdf_send", lang)
                     await update.message.reply_text(error_msg)
                 finally:
                     if os.path.exists(pdf_path):
                         try:
                             os.remove(pdf_path)
-                            logger.debug(f"Removed temporary PDF: {pdf_path}")
+                            logger.debug("Removed temporary PDF: %s", pdf_path)
                         except Exception as e:
                             logger.error(f"Failed to remove PDF {pdf_path}: {str(e)}")
             else:
-                error_msg = await translate_text(
-                    "❌ Failed to generate diet plan PDF. Please try again.", "en", lang
-                ) or "❌ Failed to generate diet plan PDF. Please try again."
+                error_msg = await ui_text("error_pdf_generation", lang)
                 await update.message.reply_text(error_msg)
-            mongodb.save_interaction(user_id, "diet", text, response, lang, is_audio=False, pdf_path=pdf_path)
-            mongodb.save_user({"user_id": user_id, "awaiting_diet_condition": False})
+            await mongodb.save_interaction(user_id, "diet", text, response, lang, is_audio=False, pdf_path=pdf_path)
+            await mongodb.save_user({"user_id": user_id, "awaiting_diet_condition": False})
         except Exception as e:
             logger.error(f"Error generating diet plan for condition '{text}' for user {user_id}: {str(e)}",
                          exc_info=True)
-            error_msg = await translate_text(
-                "❌ Error generating diet plan. Please try again.", "en", lang
-            ) or "❌ Error generating diet plan. Please try again."
+            error_msg = await ui_text("error_diet_plan", lang)
             await update.message.reply_text(error_msg)
 
     else:
         if DIAGNOSTIC_MODE:
-            logger.debug(f"[DIAGNOSTIC] Routing general query: {text}")
+            logger.debug("[DIAGNOSTIC] Routing general query: %s", text)
         sanitized_text = sanitize_text(text)
-        logger.debug(f"Routing query for {user_id}: {sanitized_text}")
+        logger.debug("Routing query for %s: %s", user_id, sanitized_text)
         try:
             response = await route_query(user_id, sanitized_text, input_type="query")
             translated_response = await translate_text(response, "en", lang) or response
-            logger.debug(f"Sending query response to {user_id}: {translated_response[:100]}...")
+            logger.debug("Sending query response to %s: %s...", user_id, translated_response[:100])
 
             if isinstance(response, tuple):
                 translated_response, pdf_path = response
@@ -587,15 +529,13 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         logger.info(f"Sent diet plan PDF to user {user_id}: {pdf_path}")
                     except Exception as e:
                         logger.error(f"Failed to send PDF to user {user_id}: {str(e)}", exc_info=True)
-                        error_msg = await translate_text(
-                            "❌ Error sending diet plan PDF. Please try again.", "en", lang
-                        ) or "❌ Error sending diet plan PDF. Please try again."
+                        error_msg = await ui_text("error_pdf_send", lang)
                         await update.message.reply_text(error_msg)
                     finally:
                         if os.path.exists(pdf_path):
                             try:
                                 os.remove(pdf_path)
-                                logger.debug(f"Removed temporary PDF: {pdf_path}")
+                                logger.debug("Removed temporary PDF: %s", pdf_path)
                             except Exception as e:
                                 logger.error(f"Failed to remove PDF {pdf_path}: {str(e)}")
                 else:
@@ -603,18 +543,16 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
             else:
                 await send_long_message(update.message, translated_response)
 
-            mongodb.save_interaction(user_id, "query", sanitized_text, translated_response, lang, is_audio=False)
+            await mongodb.save_interaction(user_id, "query", sanitized_text, translated_response, lang, is_audio=False)
         except Exception as e:
             logger.error(f"Query processing error for user {user_id}: {str(e)}", exc_info=True)
-            error_msg = await translate_text(
-                "Sorry, an error occurred. Please try again.", "en", lang
-            ) or "Sorry, an error occurred. Please try again."
+            error_msg = await ui_text("error_generic", lang)
             await update.message.reply_text(error_msg)
 
 
 async def send_long_message(message: Update.message, text: str, max_length: int = 4096):
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Sending long message: {text[:100]}...")
+        logger.debug("[DIAGNOSTIC] Sending long message: %s...", text[:100])
     if not isinstance(text, str):
         logger.error(f"Expected string for send_long_message, got {type(text)}: {text}")
         text = "❌ Error processing message. Please try again."
@@ -628,19 +566,19 @@ async def send_long_message(message: Update.message, text: str, max_length: int
 
 async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.message.from_user.id)
-    if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Entering handle_document for user {user_id}, update: {update.to_dict()}")
-    mongodb = MongoDB()
+    if diagnostic_sample():
+        logger.debug("[DIAGNOSTIC] Entering handle_document for user %s, update: %s", user_id, update.to_dict())
+    mongodb = get_async_mongodb()
     if mongodb.db is None:
         logger.error(f"Database connection failed for user {user_id}")
         await update.message.reply_text("Sorry, we're experiencing database issues. Please try again later.")
         return
 
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Fetching user profile for {user_id}")
-    user_profile = mongodb.get_user(user_id)
+        logger.debug("[DIAGNOSTIC] Fetching user profile for %s", user_id)
+    user_profile = await mongodb.get_user(user_id)
     lang = user_profile.get("language", "en")
-    logger.debug(f"Received document from {user_id}, lang: {lang}")
+    logger.debug("Received document from %s, lang: %s", user_id, lang)
 
     if not user_profile.get("language") or user_profile.get("awaiting_name") or user_profile.get(
             "awaiting_age") or user_profile.get("awaiting_allergies"):
@@ -654,12 +592,11 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         await file.download_to_drive(file_path)
         logger.info(f"Downloaded document for user {user_id}: {file_path}")
-        extracted_text = extract_text_from_image(file_path)  # Note: Should be extract_text_from_pdf for PDFs
+        async with operation_limits.limit("ocr"):
+            extracted_text = await run_cpu(extract_text_from_image, file_path)  # Note: Should be extract_text_from_pdf for PDFs
         if not extracted_text:
             logger.warning(f"No text extracted from document for {user_id}: {file_path}")
-            error_msg = await translate_text(
-                "❌ No text found in document. Please upload a valid medical report.", "en", lang
-            ) or "❌ No text found in document. Please upload a valid medical report."
+            error_msg = await ui_text("error_no_document_text", lang)
             await update.message.reply_text(error_msg)
             return
         logger.info(f"Extracted text for user {user_id}: {extracted_text[:100]}...")
@@ -668,13 +605,14 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
         condition = extract_condition_from_text(extracted_text)
 
         # Generate diet plan directly without dietary preference prompt
-        response, pdf_path = await diet_agent.generate_diet_plan(
-            user_id=user_id,
-            input_text=extracted_text,
-            is_medical_report=True,
-            condition=condition,
-            dietary_preference=None
-        )
+        async with operation_limits.limit("diet_plan"):
+            response, pdf_path = await diet_agent.generate_diet_plan(
+                user_id=user_id,
+                input_text=extracted_text,
+                is_medical_report=True,
+                condition=condition,
+                dietary_preference=None
+            )
 
         if pdf_path and os.path.exists(pdf_path):
             try:
@@ -687,24 +625,20 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 logger.info(f"Sent diet plan PDF to user {user_id}: {pdf_path}")
             except Exception as e:
                 logger.error(f"Failed to send PDF to user {user_id}: {str(e)}", exc_info=True)
-                error_msg = await translate_text(
-                    "❌ Error sending diet plan PDF. Please try again.", "en", lang
-                ) or "❌ Error sending diet plan PDF. Please try again."
+                error_msg = await ui_text("error_pdf_send", lang)
                 await update.message.reply_text(error_msg)
             finally:
                 if os.path.exists(pdf_path):
                     try:
                         os.remove(pdf_path)
-                        logger.debug(f"Removed temporary PDF: {pdf_path}")
+                        logger.debug("Removed temporary PDF: %s", pdf_path)
                     except Exception as e:
                         logger.error(f"Failed to remove PDF {pdf_path}: {str(e)}")
         else:
-            error_msg = await translate_text(
-                "❌ Failed to generate diet plan PDF. Please try again.", "en", lang
-            ) or "❌ Failed to generate diet plan PDF. Please try again."
+            error_msg = await ui_text("error_pdf_generation", lang)
             await update.message.reply_text(error_msg)
 
-        mongodb.save_interaction(
+        await mongodb.save_interaction(
             user_id=user_id,
             input_type="diet",
             input_text=extracted_text,
@@ -713,22 +647,20 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
             is_audio=False,
             pdf_path=pdf_path
         )
-        mongodb.save_user({
+        await mongodb.save_user({
             "user_id": user_id,
             "pending_report_text": None,
             "awaiting_diet_report": False
         })
     except Exception as e:
         logger.error(f"Document processing error for user {user_id}: {str(e)}", exc_info=True)
-        error_msg = await translate_text(
-            "❌ Error processing document. Please try again.", "en", lang
-        ) or "❌ Error processing document. Please try again."
+        error_msg = await ui_text("error_document", lang)
         await update.message.reply_text(error_msg)
     finally:
         if os.path.exists(file_path):
             try:
                 os.remove(file_path)
-                logger.debug(f"Removed temporary file: {file_path}")
+                logger.debug("Removed temporary file: %s", file_path)
             except Exception as e:
                 logger.error(f"Failed to remove file {file_path}: {str(e)}")
 
@@ -744,19 +676,19 @@ def extract_condition_from_text(text: str) -> str:
 
 async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.message.from_user.id)
-    if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Entering handle_voice for user {user_id}, update: {update.to_dict()}")
-    mongodb = MongoDB()
+    if diagnostic_sample():
+        logger.debug("[DIAGNOSTIC] Entering handle_voice for user %s, update: %s", user_id, update.to_dict())
+    mongodb = get_async_mongodb()
     if mongodb.db is None:
         logger.error(f"Database connection failed for user {user_id}")
         await update.message.reply_text("Sorry, we're experiencing database issues. Please try again later.")
         return
 
     if DIAGNOSTIC_MODE:
-        logger.debug(f"[DIAGNOSTIC] Fetching user profile for {user_id}")
-    user_profile = mongodb.get_user(user_id)
+        logger.debug("[DIAGNOSTIC] Fetching user profile for %s", user_id)
+    user_profile = await mongodb.get_user(user_id)
     lang = user_profile.get("language", "en")
-    logger.debug(f"Received voice from {user_id}, lang: {lang}")
+    logger.debug("Received voice from %s, lang: %s", user_id, lang)
 
     if not user_profile.get("language") or user_profile.get("awaiting_name") or user_profile.get(
             "awaiting_age") or user_profile.get("awaiting_allergies"):
@@ -772,44 +704,43 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         await file.download_to_drive(file_path)
         logger.info(f"Downloaded voice file to {file_path}")
-        transcribed_text = transcribe_audio(file_path, lang)
+        async with operation_limits.limit("voice"):
+            transcribed_text = await run_io(transcribe_audio, file_path, lang)
         if not transcribed_text:
             logger.warning(f"Transcription failed for voice message from user {user_id}")
-            error_msg = await translate_text(
-                "❌ Could not transcribe voice message. Please try again.", "en", lang
-            ) or "❌ Could not transcribe voice message. Please try again."
+            error_msg = await ui_text("error_transcription", lang)
             await update.message.reply_text(error_msg)
             return
         sanitized_text = sanitize_text(transcribed_text)
-        logger.debug(f"Transcribed voice query for {user_id}: {sanitized_text}")
+        logger.debug("Transcribed voice query for %s: %s", user_id, sanitized_text)
         response = await route_query(user_id, sanitized_text, input_type="query")
         translated_response = await translate_text(response, "en", lang) or response
 
-        if text_to_speech(translated_response, lang, audio_path):
+        async with operation_limits.limit("voice"):
+            speech_ready = await run_io(text_to_speech, translated_response, lang, audio_path)
+        if speech_ready:
             try:
                 with open(audio_path, "rb") as audio_file:
                     await update.message.reply_voice(voice=audio_file)
                 logger.info(f"Sent audio response to user {user_id}")
-                mongodb.save_interaction(user_id, "query", sanitized_text, translated_response, lang, is_audio=True)
+                await mongodb.save_interaction(user_id, "query", sanitized_text, translated_response, lang, is_audio=True)
             except Exception as e:
                 logger.error(f"Failed to send audio response to user {user_id}: {str(e)}", exc_info=True)
                 await send_long_message(update.message, translated_response)
-                mongodb.save_interaction(user_id, "query", sanitized_text, translated_response, lang, is_audio=False)
+                await mongodb.save_interaction(user_id, "query", sanitized_text, translated_response, lang, is_audio=False)
         else:
             await send_long_message(update.message, translated_response)
-            mongodb.save_interaction(user_id, "query", sanitized_text, translated_response, lang, is_audio=False)
+            await mongodb.save_interaction(user_id, "query", sanitized_text, translated_response, lang, is_audio=False)
     except Exception as e:
         logger.error(f"Voice message processing error for user {user_id}: {str(e)}", exc_info=True)
-        error_msg = await translate_text(
-            "❌ Error processing voice message. Please try again.", "en", lang
-        ) or "❌ Error processing voice message. Please try again."
+        error_msg = await ui_text("error_voice", lang)
         await update.message.reply_text(error_msg)
     finally:
         for path in [file_path, audio_path]:
             if os.path.exists(path):
                 try:
                     os.remove(path)
-                    logger.debug(f"Removed temporary file: {path}")
+                    logger.debug("Removed temporary file: %s", path)
                 except Exception as e:
                     logger.error(f"Failed to remove file {path}: {str(e)}")
 
@@ -836,6 +767,38 @@ async def polling_monitor(application: Application):
             application.start()
 
 
+async def post_init(application: Application):
+    """Run one-time startup work: index migrations, the interaction write buffer, UI strings and translation backends."""
+    mongodb = MongoDB()
+    mongodb.ensure_indexes()
+    mongodb.close()
+    get_async_mongodb().start_interaction_writer()
+    load_catalog()
+    await warm_up_backends()
+    application.bot_data["health_stats"] = {
+        "translation_cache": translation_cache.stats,
+        "translation_backends": backend_stats,
+        "diet_plan_cache": diet_agent.cache_stats,
+        "diet_plan_library": diet_agent.library.stats,
+        "llm": diet_agent.llm.stats,
+        "single_flight": singleflight_stats,
+        "operations": operation_limits.stats,
+        "executors": executor_stats,
+    }
+    # Called by the cluster coordinator when users move to this worker (see src/bot/cluster.py).
+    application.bot_data["cache_flush"] = clear_profile_caches
+
+
+async def post_shutdown(application: Application):
+    """Release process-wide resources."""
+    logger.info(f"Translation cache stats: {translation_cache.stats()}")
+    translation_cache.close()
+    await close_backends()
+    await get_async_mongodb().close_interaction_writer()
+    close_mongodb()
+    shutdown_executors()
+
+
 def main():
     check_dependencies()
     token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -843,7 +806,21 @@ def main():
     if not token:
         logger.error("TELEGRAM_BOT_TOKEN not found in environment variables")
         return
-    application = Application.builder().token(token).build()
+    mode = os.getenv("BOT_MODE", "polling").lower()
+    builder = (
+        Application.builder()
+        .token(token)
+        .concurrent_updates(PerUserUpdateProcessor(int(os.getenv("MAX_CONCURRENT_UPDATES", "64"))))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if os.getenv("TELEGRAM_BASE_URL"):
+        # e.g. the offline fake Bot API from src.bot.fake_telegram
+        builder = builder.base_url(os.getenv("TELEGRAM_BASE_URL"))
+    if mode == "webhook":
+        # Updates arrive through our own ingress queue instead of the polling updater.
+        builder = builder.updater(None)
+    application = builder.build()
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("dietplan", diet_plan_command))
     application.add_handler(CallbackQueryHandler(button))
@@ -851,9 +828,12 @@ def main():
     application.add_handler(MessageHandler(filters.Document.ALL, handle_document))
     application.add_handler(MessageHandler(filters.VOICE, handle_voice))
     application.add_error_handler(error_handler)
-    application.job_queue.run_repeating(lambda ctx: polling_monitor(application), interval=300)
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
-
+    if mode == "webhook":
+        logger.info("Starting in webhook mode")
+        asyncio.run(serve_webhook(application))
+    else:
+        application.job_queue.run_repeating(lambda ctx: polling_monitor(application), interval=300)
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
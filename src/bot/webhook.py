@@ -0,0 +1,263 @@
+import asyncio
+import json
+import logging
+import os
+import signal
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from telegram import Update
+from telegram.ext import Application
+from src.bot.dispatcher import update_owner
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1024 * 1024
+READ_TIMEOUT = 10.0
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+HttpHandler = Callable[[str, str, Dict[str, str], bytes], Awaitable[Tuple[int, Any]]]
+
+_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    method, target, _ = request_line.split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, value = line.decode("latin-1").split(":", 1)
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length > MAX_BODY_BYTES:
+        raise ValueError(f"Request body too large: {length} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+async def serve_http(handler: HttpHandler, host: str, port: int) -> asyncio.AbstractServer:
+    """
+    Start a minimal HTTP/1.1 server (one request per connection) that passes
+    (method, path, headers, body) to `handler` and writes back its (status, JSON payload).
+    """
+
+    async def on_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        status, payload = 500, {"ok": False}
+        try:
+            method, target, headers, body = await asyncio.wait_for(_read_request(reader), timeout=READ_TIMEOUT)
+            status, payload = await handler(method, target.split("?", 1)[0], headers, body)
+        except ValueError as e:
+            logger.warning(f"Rejected malformed HTTP request: {str(e)}")
+            status, payload = 400, {"ok": False, "description": str(e)}
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            logger.error(f"HTTP handler error: {str(e)}", exc_info=True)
+        data = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n"
+            .encode("latin-1") + data
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(on_connection, host, port)
+
+
+class WebhookIngress:
+    """
+    Receives Telegram webhook calls, acknowledges them immediately and queues the updates in a
+    bounded in-memory queue drained by worker tasks.
+
+    When the queue is full the endpoint answers 503 so Telegram redelivers later, instead of the
+    process accepting more work than it can hold. Workers hand updates to the application's update
+    processor, so per-user ordering and concurrency limits still apply.
+
+    A worker never waits behind another worker's user: an update whose user already has one in
+    progress is parked in that user's backlog and processed next by the worker handling that user.
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        path: str = "/telegram",
+        secret_token: Optional[str] = None,
+        max_queue_size: int = 1000,
+        workers: int = 32
+    ):
+        self.application = application
+        self.path = path
+        self.secret_token = secret_token
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.num_workers = workers
+        self._workers = []
+        # Owner -> updates waiting behind the one a worker is processing for that user
+        self._backlogs: Dict[int, Deque[Update]] = {}
+        # Owner -> accepted updates not yet processed (queued, backlogged or in progress)
+        self._pending_owners: Dict[int, int] = {}
+        self.backlogged = 0
+        self.in_flight = 0
+        self.accepted = 0
+        self.rejected = 0
+
+    async def handle(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        if path == "/healthz":
+            # Other components register zero-argument stats callables under bot_data["health_stats"].
+            extra = self.application.bot_data.get("health_stats", {})
+            return 200, {**self.stats(), **{name: stats() for name, stats in extra.items()}}
+        if path in ("/cluster/busy", "/cluster/flush"):
+            # Shard handoff protocol of the cluster coordinator (src/bot/cluster.py)
+            if not self.secret_token or headers.get(SECRET_HEADER) != self.secret_token:
+                return 401, {"ok": False}
+            if path == "/cluster/busy":
+                return 200, {"owners": [str(owner) for owner in self._pending_owners]}
+            flush = self.application.bot_data.get("cache_flush")
+            if flush:
+                flush()
+            return 200, {"ok": True}
+        if path != self.path:
+            return 404, {"ok": False}
+        if method != "POST":
+            return 405, {"ok": False}
+        if self.secret_token and headers.get(SECRET_HEADER) != self.secret_token:
+            logger.warning("Rejected webhook call with missing or invalid secret token")
+            return 401, {"ok": False}
+        try:
+            update = Update.de_json(json.loads(body), self.application.bot)
+        except Exception as e:
+            logger.warning(f"Rejected undecodable webhook payload: {str(e)}")
+            return 400, {"ok": False}
+        try:
+            if self.queue.qsize() + self.backlogged >= self.queue.maxsize:
+                raise asyncio.QueueFull
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            logger.warning(f"Update queue full ({self.queue.maxsize}); asking Telegram to redeliver {update.update_id}")
+            return 503, {"ok": False}
+        self.accepted += 1
+        owner = update_owner(update)
+        if owner is not None:
+            self._pending_owners[owner] = self._pending_owners.get(owner, 0) + 1
+        return 200, {"ok": True}
+
+    async def _process(self, update: Update):
+        self.in_flight += 1
+        try:
+            await self.application.update_processor.process_update(update, self.application.process_update(update))
+        except Exception as e:
+            logger.error(f"Error processing update {update.update_id}: {str(e)}", exc_info=True)
+        finally:
+            self.in_flight -= 1
+            self.queue.task_done()
+            owner = update_owner(update)
+            if owner in self._pending_owners:
+                self._pending_owners[owner] -= 1
+                if not self._pending_owners[owner]:
+                    del self._pending_owners[owner]
+
+    async def _worker(self):
+        while True:
+            update = await self.queue.get()
+            owner = update_owner(update)
+            if owner is None:
+                await self._process(update)
+                continue
+            backlog = self._backlogs.get(owner)
+            if backlog is not None:
+                backlog.append(update)
+                self.backlogged += 1
+                continue
+            backlog = self._backlogs[owner] = deque()
+            try:
+                while True:
+                    await self._process(update)
+                    if not backlog:
+                        break
+                    update = backlog.popleft()
+                    self.backlogged -= 1
+            finally:
+                del self._backlogs[owner]
+
+    def start_workers(self):
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.num_workers)]
+
+    async def drain(self):
+        """Wait for queued updates to finish, then stop the workers."""
+        await self.queue.join()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "backlogged": self.backlogged,
+            "in_flight": self.in_flight,
+            "accepted": self.accepted,
+            "rejected": self.rejected
+        }
+
+
+async def serve_webhook(application: Application):
+    """Run the application behind a local webhook endpoint until SIGINT/SIGTERM."""
+    host = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    port = int(os.getenv("WEBHOOK_PORT", "8443"))
+    path = os.getenv("WEBHOOK_PATH", "/telegram")
+    secret_token = os.getenv("WEBHOOK_SECRET")
+    public_url = os.getenv("WEBHOOK_URL")
+    ingress = WebhookIngress(
+        application,
+        path=path,
+        secret_token=secret_token,
+        max_queue_size=int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000")),
+        workers=int(os.getenv("WEBHOOK_WORKERS", "32"))
+    )
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    ingress.start_workers()
+    server = await serve_http(ingress.handle, host, port)
+    logger.info(f"Webhook endpoint listening on {host}:{port}{path}")
+    if public_url:
+        await application.bot.set_webhook(
+            url=public_url,
+            secret_token=secret_token,
+            allowed_updates=Update.ALL_TYPES,
+            max_connections=int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+        )
+        logger.info(f"Registered webhook with Telegram: {public_url}")
+
+    try:
+        await stop_event.wait()
+    finally:
+        logger.info("Shutting down webhook endpoint")
+        server.close()
+        await server.wait_closed()
+        await ingress.drain()
+        await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
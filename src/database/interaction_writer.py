@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+from src.utils.retry import RetryableError, RetryPolicy, get_policy, is_retryable
+
+try:
+    from pymongo.errors import ConnectionFailure
+except ImportError:
+    ConnectionFailure = None
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+DUPLICATE_KEY = 11000
+
+
+class PartialWriteError(RetryableError):
+    """Some records of a batch were not inserted; only those are retried."""
+
+
+def is_transient_write_error(exc: BaseException) -> bool:
+    """Retry partial writes and connection problems (pymongo's ConnectionFailure covers reconnects and timeouts)."""
+    if ConnectionFailure is not None and isinstance(exc, ConnectionFailure):
+        return True
+    return is_retryable(exc)
+
+
+class InteractionWriter:
+    """
+    Write-behind buffer for interaction records.
+
+    Records are queued in memory and written with `insert_many` once `max_batch_size` records are
+    pending or `flush_interval` seconds have passed since the first one arrived. The queue is bounded:
+    when it is full, `enqueue` waits for the writer to catch up instead of growing without limit.
+    A failed write is retried with backoff before its records are dropped.
+    """
+
+    def __init__(
+        self,
+        collection,
+        max_batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_buffer_size: Optional[int] = None,
+        policy: Optional[RetryPolicy] = None
+    ):
+        """
+        Args:
+            collection: Motor collection the records are written to
+            max_batch_size: Records per insert_many call (env INTERACTION_BATCH_SIZE, default 100)
+            flush_interval: Max seconds a record waits before being flushed (env INTERACTION_FLUSH_INTERVAL, default 2)
+            max_buffer_size: Max queued records before callers are blocked (env INTERACTION_BUFFER_SIZE, default 1000)
+            policy: Retry policy of a batch write (default: retries transient errors under the shared
+                `mongodb` policy's circuit breaker)
+        """
+        self.collection = collection
+        self.max_batch_size = max_batch_size or int(os.getenv("INTERACTION_BATCH_SIZE", "100"))
+        self.flush_interval = flush_interval or float(os.getenv("INTERACTION_FLUSH_INTERVAL", "2"))
+        max_buffer_size = max_buffer_size or int(os.getenv("INTERACTION_BUFFER_SIZE", "1000"))
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffer_size)
+        self._task: Optional[asyncio.Task] = None
+        mongodb_policy = get_policy("mongodb")
+        self.policy = policy or RetryPolicy(
+            "interactions",
+            max_attempts=mongodb_policy.max_attempts,
+            base_delay=mongodb_policy.base_delay,
+            deadline=mongodb_policy.deadline,
+            retry_on=is_transient_write_error,
+            breaker=mongodb_policy.breaker
+        )
+        self.written = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the background flush task on the running event loop."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"Interaction writer started (batch={self.max_batch_size}, interval={self.flush_interval}s, "
+                f"buffer={self._queue.maxsize})"
+            )
+
+    async def enqueue(self, record: Dict[str, Any]):
+        """Queue a record for writing; waits while the buffer is full."""
+        await self._queue.put(record)
+
+    async def _next_batch(self):
+        """Collect records until the batch is full or the flush interval expires. Returns (batch, stop)."""
+        first = await self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                record = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if record is _STOP:
+                return batch, True
+            batch.append(record)
+        return batch, False
+
+    async def _insert(self, pending: List[Dict[str, Any]]):
+        """
+        One insert attempt of the records in `pending`. On a bulk write error `pending` is cut down to the
+        records reported as not inserted; a duplicate key means an earlier attempt did write the record.
+        """
+        try:
+            await self.collection.insert_many(pending, ordered=False)
+        except Exception as e:
+            details = getattr(e, "details", None)
+            if not isinstance(details, dict) or not details.get("writeErrors"):
+                raise
+            failed = {error["index"] for error in details["writeErrors"] if error.get("code") != DUPLICATE_KEY}
+            self.written += len(pending) - len(failed)
+            pending[:] = [record for i, record in enumerate(pending) if i in failed]
+            if pending:
+                raise PartialWriteError(f"{len(pending)} interactions not inserted: {str(e)}") from e
+            return
+        self.written += len(pending)
+        pending.clear()
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        pending = list(batch)
+        try:
+            await self.policy.call(self._insert, pending)
+            logger.info(f"Flushed {len(batch)} interactions")
+        except Exception as e:
+            self.failed += len(pending)
+            logger.error(f"Dropping {len(pending)} of {len(batch)} interactions: {str(e)}", exc_info=True)
+
+    async def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = await self._next_batch()
+            if batch:
+                await self._write(batch)
+
+    async def flush(self):
+        """Write everything currently buffered without waiting for the flush interval."""
+        batch = []
+        while not self._queue.empty():
+            record = self._queue.get_nowait()
+            if record is _STOP:
+                continue
+            batch.append(record)
+            if len(batch) >= self.max_batch_size:
+                await self._write(batch)
+                batch = []
+        if batch:
+            await self._write(batch)
+
+    async def close(self):
+        """Drain the buffer and stop the background task (call on shutdown)."""
+        if self.running:
+            await self._queue.put(_STOP)
+            await self._task
+        self._task = None
+        await self.flush()
+        logger.info(f"Interaction writer closed (written={self.written}, failed={self.failed})")
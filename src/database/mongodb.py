@@ -1,114 +1,213 @@
 import logging
 import os
-from typing import Optional, Dict, Any
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
 from pymongo import MongoClient, ASCENDING
 from pymongo.errors import PyMongoError, OperationFailure
+from src.database.interaction_writer import InteractionWriter
+from src.database.profile_cache import ProfileCache
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    AsyncIOMotorClient = None
 
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-    handlers=[logging.FileHandler("bot.log", encoding="utf-8"), logging.StreamHandler()]
-)
 logger = logging.getLogger(__name__)
 
-class MongoDB:
-    def __init__(self):
-        """Initialize MongoDB connection."""
+INTERACTION_TTL_SECONDS = 604800  # 7 days
+
+_shared_mongodb = None
+_shared_async_mongodb = None
+_shared_lock = threading.Lock()
+
+
+def _client_options() -> Dict[str, Any]:
+    """Connection pool settings shared by the sync and async clients."""
+    return {
+        "serverSelectionTimeoutMS": 5000,
+        "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", "50")),
+        "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000")),
+    }
+
+
+def create_client() -> MongoClient:
+    """Create a pooled MongoClient from environment settings."""
+    mongo_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+    return MongoClient(mongo_uri, **_client_options())
+
+
+DATABASE = "aarogyaai"
+COLLECTIONS = ("users", "interactions", "prompt_cache", "diet_plan_library", "prompts")
+# (collection, keys, index options) created by `MongoDB.ensure_indexes`; the interactions TTL index is
+# handled separately because changing its expiry needs a drop and rebuild.
+INDEXES = [
+    ("users", [("user_id", ASCENDING)], {"unique": True, "name": "user_id_unique"}),
+    ("interactions", [("user_id", ASCENDING), ("timestamp", ASCENDING)], {"name": "user_id_timestamp"}),
+    ("interactions", [("input_type", ASCENDING)], {"name": "input_type"}),
+    ("prompt_cache", [("key", ASCENDING)], {"unique": True, "name": "key_1"}),
+    # Diet plan library: one entry per profile and library version
+    ("diet_plan_library", [("profile", ASCENDING), ("version", ASCENDING)], {"unique": True, "name": "profile_version"}),
+]
+
+
+def interaction_document(
+    user_id: str,
+    input_type: str,
+    input_text: str,
+    response: str,
+    language: str,
+    is_audio: bool = False,
+    pdf_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build an interactions document."""
+    return {
+        "user_id": user_id,
+        "input_type": input_type,
+        "input_text": input_text,
+        "response": response,
+        "language": language,
+        "is_audio": is_audio,
+        "pdf_path": pdf_path,
+        "timestamp": datetime.utcnow()
+    }
+
+
+def cached_response_update(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the prompt_cache upsert of a response."""
+    return {"$set": {"response": response, "timestamp": datetime.utcnow()}}
+
+
+def recent_interaction_query(user_id: str, input_type: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Return the filter and find options of a user's latest interaction of a type."""
+    return {"user_id": user_id, "input_type": input_type}, {"sort": [("timestamp", -1)]}
+
+
+def library_key(profile: str, version: str) -> Dict[str, Any]:
+    """Filter of one diet plan library entry."""
+    return {"profile": profile, "version": version}
+
+
+class _MongoHandle:
+    """
+    Collections, profile cache and request guards shared by `MongoDB` and `AsyncMongoDB`. Documents and
+    queries are built by the module-level helpers above; the subclasses only issue the calls (blocking
+    or awaited) and handle their results.
+    """
+
+    label = "MongoDB"
+
+    def _bind(self, client, owns_client: bool):
+        self._owns_client = owns_client
+        self.client = client
+        self.db = client[DATABASE]
+        for name in COLLECTIONS:
+            setattr(self, name, self.db[name])
+        self.profile_cache = ProfileCache()
+        logger.info(f"Connected to {self.label}")
+
+    def _connected(self) -> bool:
+        if self.db is None:
+            logger.error("No database connection")
+            return False
+        return True
+
+    def _user_id(self, user_data: Dict[str, Any]) -> Optional[str]:
+        user_id = user_data.get("user_id")
+        if not user_id:
+            logger.error("No user_id provided in user_data")
+        return user_id
+
+    def _user_saved(self, user_id: str, user_data: Dict[str, Any]):
+        self.profile_cache.update(user_id, user_data)
+        logger.info(f"Saved user data for {user_id}")
+
+    def _user_save_failed(self, user_data: Dict[str, Any], e: Exception):
+        logger.error(f"Error saving user data: {str(e)}", exc_info=True)
+        self.profile_cache.invalidate(user_data.get("user_id"))
+
+    def close(self):
+        """Close the MongoDB connection if this instance owns it."""
+        if hasattr(self, "client") and self._owns_client:
+            self.client.close()
+            logger.info(f"{self.label} connection closed")
+
+
+class MongoDB(_MongoHandle):
+    def __init__(self, client: Optional[MongoClient] = None):
+        """
+        Initialize MongoDB connection.
+        Args:
+            client: Existing MongoClient to reuse; a new pooled client is created if omitted
+        """
         try:
-            mongo_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
-            self.client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-            self.db = self.client["aarogyaai"]
-            self.users = self.db["users"]
-            self.interactions = self.db["interactions"]
-            self.prompt_cache = self.db["prompt_cache"]
-            self.prompts = self.db["prompts"]
-            self._create_indexes()
-            logger.info("Connected to MongoDB")
+            self._bind(client or create_client(), client is None)
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {str(e)}", exc_info=True)
             self.db = None
 
-    def _create_indexes(self):
-        """Create necessary indexes for MongoDB collections."""
-        try:
-            # Users collection: unique index on user_id
-            self.users.create_index([("user_id", ASCENDING)], unique=True, name="user_id_unique")
-            logger.info("Unique index on users.user_id created or already exists")
-        except OperationFailure as e:
-            logger.info(f"Unique index on users.user_id already exists: {str(e)}")
-
-        try:
-            # Interactions collection: compound index on user_id and timestamp
-            self.interactions.create_index(
-                [("user_id", ASCENDING), ("timestamp", ASCENDING)],
-                name="user_id_timestamp"
-            )
-            logger.info("Compound index on interactions.user_id,timestamp created or already exists")
-        except OperationFailure as e:
-            logger.info(f"Compound index on interactions.user_id,timestamp already exists: {str(e)}")
-
-        try:
-            # Interactions collection: index on input_type
-            self.interactions.create_index([("input_type", ASCENDING)], name="input_type")
-            logger.info("Index on interactions.input_type created or already exists")
-        except OperationFailure as e:
-            logger.info(f"Index on interactions.input_type already exists: {str(e)}")
+    def ensure_indexes(self):
+        """
+        Create necessary indexes for MongoDB collections.
+        This is a migration step: run it once at startup (or via `python -m src.database.mongodb`),
+        not per request.
+        """
+        if not self._connected():
+            return
+        for collection, keys, options in INDEXES:
+            try:
+                self.db[collection].create_index(keys, **options)
+                logger.info(f"Index {options['name']} on {collection} created or already exists")
+            except OperationFailure as e:
+                logger.info(f"Index {options['name']} on {collection} already exists: {str(e)}")
 
         try:
             # Interactions collection: TTL index on timestamp
-            try:
+            # Only drop the index when its expiry differs; recreating it on every start rebuilds the whole index.
+            existing = self.interactions.index_information().get("timestamp_1")
+            if existing and existing.get("expireAfterSeconds") != INTERACTION_TTL_SECONDS:
                 self.interactions.drop_index("timestamp_1")
-                logger.info("Dropped existing timestamp_1 index")
-            except OperationFailure as e:
-                if "index not found" in str(e):
-                    logger.info("No timestamp_1 index to drop")
-                else:
-                    logger.error(f"Failed to drop timestamp_1 index: {str(e)}")
-            self.interactions.create_index(
-                [("timestamp", ASCENDING)],
-                name="timestamp_1",
-                expireAfterSeconds=604800  # 7 days
-            )
-            logger.info("TTL index on interactions.timestamp created with 7-day expiry")
+                logger.info("Dropped timestamp_1 index with outdated expiry")
+                existing = None
+            if not existing:
+                self.interactions.create_index(
+                    [("timestamp", ASCENDING)],
+                    name="timestamp_1",
+                    expireAfterSeconds=INTERACTION_TTL_SECONDS
+                )
+                logger.info("TTL index on interactions.timestamp created with 7-day expiry")
+            else:
+                logger.info("TTL index on interactions.timestamp already up to date")
         except OperationFailure as e:
             logger.error(f"Failed to create timestamp TTL index: {str(e)}")
 
-        try:
-            # Prompt cache collection: unique index on key
-            self.prompt_cache.create_index([("key", ASCENDING)], unique=True, name="key_1")
-            logger.info("Unique index on prompt_cache.key created or already exists")
-        except OperationFailure as e:
-            logger.info(f"Unique index on prompt_cache.key already exists: {str(e)}")
-
     def save_user(self, user_data: Dict[str, Any]) -> bool:
         """Save or update user data in the users collection."""
-        if self.db is None:
-            logger.error("No database connection")
+        if not self._connected():
             return False
         try:
-            user_id = user_data.get("user_id")
+            user_id = self._user_id(user_data)
             if not user_id:
-                logger.error("No user_id provided in user_data")
                 return False
-            self.users.update_one(
-                {"user_id": user_id},
-                {"$set": user_data},
-                upsert=True
-            )
-            logger.info(f"Saved user data for {user_id}")
+            self.users.update_one({"user_id": user_id}, {"$set": user_data}, upsert=True)
+            self._user_saved(user_id, user_data)
             return True
         except PyMongoError as e:
-            logger.error(f"Error saving user data: {str(e)}", exc_info=True)
+            self._user_save_failed(user_data, e)
             return False
 
     def get_user(self, user_id: str) -> Dict[str, Any]:
         """Retrieve user data by user_id."""
-        if self.db is None:
-            logger.error("No database connection")
+        if not self._connected():
             return {}
+        cached = self.profile_cache.get(user_id)
+        if cached is not None:
+            return cached
         try:
-            user = self.users.find_one({"user_id": user_id})
-            return user or {}
+            user = self.users.find_one({"user_id": user_id}) or {}
+            self.profile_cache.put(user_id, user)
+            return user
         except PyMongoError as e:
             logger.error(f"Error retrieving user {user_id}: {str(e)}", exc_info=True)
             return {}
@@ -124,22 +223,12 @@ class MongoDB:
         pdf_path: Optional[str] = None
     ) -> bool:
         """Save interaction data to the interactions collection."""
-        if self.db is None:
-            logger.error("No database connection")
+        if not self._connected():
             return False
         try:
-            from datetime import datetime
-            interaction = {
-                "user_id": user_id,
-                "input_type": input_type,
-                "input_text": input_text,
-                "response": response,
-                "language": language,
-                "is_audio": is_audio,
-                "pdf_path": pdf_path,
-                "timestamp": datetime.utcnow()
-            }
-            self.interactions.insert_one(interaction)
+            self.interactions.insert_one(
+                interaction_document(user_id, input_type, input_text, response, language, is_audio, pdf_path)
+            )
             logger.info(f"Saved interaction for user {user_id}, type: {input_type}")
             return True
         except PyMongoError as e:
@@ -148,31 +237,23 @@ class MongoDB:
 
     def get_diet_plan_prompt(self, language: str) -> Optional[Dict[str, Any]]:
         """Retrieve diet plan prompt for the specified language."""
-        if self.db is None:
-            logger.error("No database connection")
+        if not self._connected():
             return None
         try:
-            prompt = self.prompts.find_one({"type": "diet_plan", "language": language})
-            return prompt
+            return self.prompts.find_one({"type": "diet_plan", "language": language})
         except PyMongoError as e:
             logger.error(f"Error retrieving diet plan prompt for language {language}: {str(e)}", exc_info=True)
             return None
 
     def cache_response(self, key: str, response: Dict[str, Any]) -> bool:
         """Cache a response in the prompt_cache collection."""
-        if self.db is None:
-            logger.error("No database connection")
+        if not self._connected():
             return False
         if not key:
             logger.error("Cannot cache response with null or empty key")
             return False
         try:
-            from datetime import datetime
-            self.prompt_cache.update_one(
-                {"key": key},
-                {"$set": {"response": response, "timestamp": datetime.utcnow()}},
-                upsert=True
-            )
+            self.prompt_cache.update_one({"key": key}, cached_response_update(response), upsert=True)
             logger.info(f"Cached response for key {key}")
             return True
         except PyMongoError as e:
@@ -181,8 +262,7 @@ class MongoDB:
 
     def get_cached_response(self, key: str) -> Optional[Dict[str, Any]]:
         """Retrieve a cached response by key."""
-        if self.db is None:
-            logger.error("No database connection")
+        if not self._connected():
             return None
         try:
             cached = self.prompt_cache.find_one({"key": key})
@@ -191,8 +271,247 @@ class MongoDB:
             logger.error(f"Error retrieving cached response for key {key}: {str(e)}", exc_info=True)
             return None
 
-    def close(self):
-        """Close the MongoDB connection."""
-        if hasattr(self, "client"):
-            self.client.close()
-            logger.info("MongoDB connection closed")
\ No newline at end of file
+    def get_recent_interaction(self, user_id: str, input_type: str) -> Optional[Dict[str, Any]]:
+        """Retrieve the most recent interaction of a given type for a user."""
+        if not self._connected():
+            return None
+        try:
+            query, options = recent_interaction_query(user_id, input_type)
+            return self.interactions.find_one(query, **options)
+        except PyMongoError as e:
+            logger.error(f"Error retrieving recent interaction for user {user_id}: {str(e)}", exc_info=True)
+            return None
+
+
+class AsyncMongoDB(_MongoHandle):
+    """
+    Non-blocking counterpart of `MongoDB` built on motor, for use inside asyncio handlers.
+    Exposes the same data methods as coroutines, plus the diet plan library and the interaction
+    write-behind buffer. Index migrations stay on the sync class.
+    """
+
+    label = "MongoDB (async)"
+
+    def __init__(self, client: Optional["AsyncIOMotorClient"] = None):
+        """
+        Initialize the async MongoDB connection.
+        Args:
+            client: Existing AsyncIOMotorClient to reuse; a new pooled client is created if omitted
+        """
+        self.interaction_writer: Optional[InteractionWriter] = None
+        try:
+            if AsyncIOMotorClient is None:
+                raise ImportError("motor is not installed")
+            mongo_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+            self._bind(client or AsyncIOMotorClient(mongo_uri, **_client_options()), client is None)
+        except Exception as e:
+            logger.error(f"Failed to connect to MongoDB (async): {str(e)}", exc_info=True)
+            self.db = None
+
+    async def save_user(self, user_data: Dict[str, Any]) -> bool:
+        """Save or update user data in the users collection."""
+        if not self._connected():
+            return False
+        try:
+            user_id = self._user_id(user_data)
+            if not user_id:
+                return False
+            await self.users.update_one({"user_id": user_id}, {"$set": user_data}, upsert=True)
+            self._user_saved(user_id, user_data)
+            return True
+        except PyMongoError as e:
+            self._user_save_failed(user_data, e)
+            return False
+
+    async def get_user(self, user_id: str) -> Dict[str, Any]:
+        """Retrieve user data by user_id."""
+        if not self._connected():
+            return {}
+        cached = self.profile_cache.get(user_id)
+        if cached is not None:
+            return cached
+        try:
+            user = await self.users.find_one({"user_id": user_id}) or {}
+            self.profile_cache.put(user_id, user)
+            return user
+        except PyMongoError as e:
+            logger.error(f"Error retrieving user {user_id}: {str(e)}", exc_info=True)
+            return {}
+
+    async def save_interaction(
+        self,
+        user_id: str,
+        input_type: str,
+        input_text: str,
+        response: str,
+        language: str,
+        is_audio: bool = False,
+        pdf_path: Optional[str] = None
+    ) -> bool:
+        """Save interaction data to the interactions collection."""
+        if not self._connected():
+            return False
+        try:
+            interaction = interaction_document(user_id, input_type, input_text, response, language, is_audio, pdf_path)
+            if self.interaction_writer is not None and self.interaction_writer.running:
+                await self.interaction_writer.enqueue(interaction)
+                logger.info(f"Queued interaction for user {user_id}, type: {input_type}")
+            else:
+                await self.interactions.insert_one(interaction)
+                logger.info(f"Saved interaction for user {user_id}, type: {input_type}")
+            return True
+        except PyMongoError as e:
+            logger.error(f"Error saving interaction for user {user_id}: {str(e)}", exc_info=True)
+            return False
+
+    async def get_diet_plan_prompt(self, language: str) -> Optional[Dict[str, Any]]:
+        """Retrieve diet plan prompt for the specified language."""
+        if not self._connected():
+            return None
+        try:
+            return await self.prompts.find_one({"type": "diet_plan", "language": language})
+        except PyMongoError as e:
+            logger.error(f"Error retrieving diet plan prompt for language {language}: {str(e)}", exc_info=True)
+            return None
+
+    async def cache_response(self, key: str, response: Dict[str, Any]) -> bool:
+        """Cache a response in the prompt_cache collection."""
+        if not self._connected():
+            return False
+        if not key:
+            logger.error("Cannot cache response with null or empty key")
+            return False
+        try:
+            await self.prompt_cache.update_one({"key": key}, cached_response_update(response), upsert=True)
+            logger.info(f"Cached response for key {key}")
+            return True
+        except PyMongoError as e:
+            logger.error(f"Error caching response for key {key}: {str(e)}", exc_info=True)
+            return False
+
+    async def get_cached_response(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retrieve a cached response by key."""
+        if not self._connected():
+            return None
+        try:
+            cached = await self.prompt_cache.find_one({"key": key})
+            return cached.get("response") if cached else None
+        except PyMongoError as e:
+            logger.error(f"Error retrieving cached response for key {key}: {str(e)}", exc_info=True)
+            return None
+
+    async def get_recent_interaction(self, user_id: str, input_type: str) -> Optional[Dict[str, Any]]:
+        """Retrieve the most recent interaction of a given type for a user."""
+        if not self._connected():
+            return None
+        try:
+            query, options = recent_interaction_query(user_id, input_type)
+            return await self.interactions.find_one(query, **options)
+        except PyMongoError as e:
+            logger.error(f"Error retrieving recent interaction for user {user_id}: {str(e)}", exc_info=True)
+            return None
+
+    async def get_library_plan(self, profile: str, version: str) -> Optional[Dict[str, Any]]:
+        """Retrieve a pre-generated diet plan of the given library version."""
+        if self.db is None:
+            return None
+        try:
+            return await self.diet_plan_library.find_one(library_key(profile, version))
+        except PyMongoError as e:
+            logger.error(f"Error retrieving library plan for profile {profile}: {str(e)}", exc_info=True)
+            return None
+
+    async def save_library_plan(self, entry: Dict[str, Any]) -> bool:
+        """Insert or replace a library plan (keyed on profile and version)."""
+        if not self._connected():
+            return False
+        try:
+            await self.diet_plan_library.replace_one(library_key(entry["profile"], entry["version"]), entry, upsert=True)
+            return True
+        except PyMongoError as e:
+            logger.error(f"Error saving library plan for profile {entry.get('profile')}: {str(e)}", exc_info=True)
+            return False
+
+    async def list_library_plans(self, version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List library entries (without the plans), optionally of one version only."""
+        if not self._connected():
+            return []
+        try:
+            query = {"version": version} if version is not None else {}
+            return await self.diet_plan_library.find(query, {"diet_plan": 0}).to_list(length=None)
+        except PyMongoError as e:
+            logger.error(f"Error listing library plans: {str(e)}", exc_info=True)
+            return []
+
+    async def delete_library_plans(self, version: str) -> int:
+        """Delete all library entries of a version; returns the number removed."""
+        if not self._connected():
+            return 0
+        try:
+            result = await self.diet_plan_library.delete_many({"version": version})
+            return result.deleted_count
+        except PyMongoError as e:
+            logger.error(f"Error deleting library plans of version {version}: {str(e)}", exc_info=True)
+            return 0
+
+    def start_interaction_writer(self):
+        """Route save_interaction through a write-behind batching buffer. Must be called on the running loop."""
+        if self.db is None:
+            logger.error("No database connection; interactions will not be buffered")
+            return
+        if self.interaction_writer is None:
+            self.interaction_writer = InteractionWriter(self.interactions)
+        self.interaction_writer.start()
+
+    async def close_interaction_writer(self):
+        """Flush buffered interactions and stop the writer."""
+        if self.interaction_writer is not None:
+            await self.interaction_writer.close()
+            self.interaction_writer = None
+
+
+def get_mongodb() -> MongoDB:
+    """Return the process-wide MongoDB handle, creating its pooled client on first use."""
+    global _shared_mongodb
+    if _shared_mongodb is None:
+        with _shared_lock:
+            if _shared_mongodb is None:
+                _shared_mongodb = MongoDB()
+    return _shared_mongodb
+
+
+def get_async_mongodb() -> AsyncMongoDB:
+    """Return the process-wide async MongoDB handle, creating its pooled client on first use."""
+    global _shared_async_mongodb
+    if _shared_async_mongodb is None:
+        with _shared_lock:
+            if _shared_async_mongodb is None:
+                _shared_async_mongodb = AsyncMongoDB()
+    return _shared_async_mongodb
+
+
+def clear_profile_caches():
+    """Drop the cached profiles of the process-wide handles (e.g. after users moved between workers)."""
+    for handle in (_shared_mongodb, _shared_async_mongodb):
+        if handle is not None:
+            handle.profile_cache.clear()
+
+
+def close_mongodb():
+    """Close the process-wide MongoDB handles (call on shutdown)."""
+    global _shared_mongodb, _shared_async_mongodb
+    with _shared_lock:
+        if _shared_mongodb is not None:
+            _shared_mongodb.close()
+            _shared_mongodb = None
+        if _shared_async_mongodb is not None:
+            _shared_async_mongodb.close()
+            _shared_async_mongodb = None
+
+
+if __name__ == "__main__":
+    from src.utils.logging_config import setup_logging
+    setup_logging()
+    mongodb = MongoDB()
+    mongodb.ensure_indexes()
+    mongodb.close()
\ No newline at end of file
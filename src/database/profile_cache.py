@@ -0,0 +1,78 @@
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class ProfileCache:
+    """
+    In-process LRU cache of user profiles with a per-entry TTL.
+
+    Entries are updated in place on writes (write-through), so the setup-state flags
+    (`awaiting_name`, `awaiting_age`, ...) are served from memory between messages.
+    Callers always receive a deep copy, so mutating a returned profile never touches the cache.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[float] = None):
+        """
+        Args:
+            max_size: Max cached profiles (env PROFILE_CACHE_SIZE, default 10000)
+            ttl: Seconds an entry stays valid (env PROFILE_CACHE_TTL, default 300)
+        """
+        self.max_size = max_size or int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+        self.ttl = ttl or float(os.getenv("PROFILE_CACHE_TTL", "300"))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached profile, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, user_id: str, profile: Dict[str, Any]):
+        """Cache a full profile as loaded from the database."""
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, copy.deepcopy(profile))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def update(self, user_id: str, fields: Dict[str, Any]):
+        """Apply a `$set`-style partial update to a cached profile, if present."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry[1].update(copy.deepcopy(fields))
+
+    def invalidate(self, user_id: str):
+        """Drop a cached profile."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Drop every cached profile."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries)
+            }
@@ -4,23 +4,8 @@ import os
 import subprocess
 from google.cloud import speech
 from src.utils.helpers import LANGUAGE_MAP
+from src.utils.retry import get_policy
 
-
-class UnicodeSafeStreamHandler(logging.StreamHandler):
-    def __init__(self):
-        super().__init__(stream=sys.stdout)
-        if sys.stdout.encoding.lower() != "utf-8":
-            self.stream = open(sys.stdout.fileno(), mode="w", encoding="utf-8", buffering=1)
-
-
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler("bot.log", encoding="utf-8"),
-        UnicodeSafeStreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 if sys.platform == "win32":
@@ -93,7 +78,7 @@ def transcribe_audio(file_path: str, lang: str) -> str:
         )
 
         # Transcribe
-        response = client.recognize(config=config, audio=audio)
+        response = get_policy("speech").call_sync(client.recognize, config=config, audio=audio)
         transcribed_text = "".join(result.alternatives[0].transcript for result in response.results).strip()
 
         if not transcribed_text:
@@ -5,11 +5,6 @@ import pytesseract
 from PIL import Image
 from pdf2image import convert_from_path
 
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-    handlers=[logging.FileHandler("bot.log"), logging.StreamHandler()]
-)
 logger = logging.getLogger(__name__)
 
 # Configure Tesseract path
@@ -1,34 +1,24 @@
+import asyncio
 import logging
 import sys
 import os
-from google.cloud import translate_v2 as translate
-from deep_translator import GoogleTranslator
+from typing import List
 from src.utils.helpers import validate_translation, LANGUAGE_MAP
+from src.input_processing.translation_cache import translation_cache
+from src.input_processing.translation_backends import backends_for
 
-class UnicodeSafeStreamHandler(logging.StreamHandler):
-    def __init__(self):
-        super().__init__(stream=sys.stdout)
-        if sys.stdout.encoding.lower() != "utf-8":
-            self.stream = open(sys.stdout.fileno(), mode="w", encoding="utf-8", buffering=1)
-
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler("bot.log", encoding="utf-8"),
-        UnicodeSafeStreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 if os.name == "nt":
     if sys.stdout.encoding != "utf-8":
         sys.stdout.reconfigure(encoding="utf-8")
 
+
 async def translate_text(text: str, source_lang: str, target_lang: str) -> str:
     """
-    Translate text from source language to target language using Google Cloud Translate.
-    Fallback to deep-translator if Google Cloud fails.
+    Translate text from source language to target language with the configured backends
+    (TRANSLATION_BACKENDS, default Google Cloud Translate then deep-translator), trying the next
+    backend when one fails or returns an invalid translation.
     Args:
         text: Text to translate
         source_lang: Source language code (e.g., 'en')
@@ -48,46 +38,83 @@ async def translate_text(text: str, source_lang: str, target_lang: str) -> str:
         logger.info(f"No translation needed for {source_lang} to {target_lang}: {text[:50]}...")
         return text
 
-    # Add medical context only for translation, strip for output
-    health_keywords = ["health", "fever", "headache", "diabetes", "cough", "pain"]
-    context_text = (
-        f"Translate this health-related text accurately into {LANGUAGE_MAP[target_lang]['name']}: {text}"
-        if any(word in text.lower() for word in health_keywords)
-        else text
-    )
-
-    try:
-        client = translate.Client()
-        result = client.translate(
-            context_text,
-            source_language=source_lang,
-            target_language=target_lang
-        )
-        translated_text = result["translatedText"]
-        # Strip context prefix if present
-        prefix = f"Translate this health-related text accurately into {LANGUAGE_MAP[target_lang]['name']}: "
-        if translated_text.startswith(prefix):
-            translated_text = translated_text[len(prefix):]
-        if validate_translation(translated_text, target_lang):
+    backends = backends_for(source_lang, target_lang)
+    cached = await translation_cache.get(text, source_lang, target_lang, [backend.engine for backend in backends])
+    if cached is not None:
+        return cached
+
+    for backend in backends:
+        try:
+            translated_text = await backend.translate_one(text, source_lang, target_lang)
+        except Exception as e:
+            logger.warning(f"{backend.name} translation failed: {str(e)}. Trying next backend.")
+            continue
+        if translated_text and validate_translation(translated_text, target_lang):
             logger.info(
-                f"Google Cloud translated '{text[:50]}...' from {source_lang} to {target_lang}: {translated_text[:50]}..."
+                f"{backend.name} translated '{text[:50]}...' from {source_lang} to {target_lang}: {translated_text[:50]}..."
             )
+            await translation_cache.put(text, source_lang, target_lang, translated_text, backend.engine)
             return translated_text
-        else:
-            logger.warning(f"Google Cloud translation validation failed for '{text[:50]}...' to {target_lang}. Trying fallback.")
-            raise ValueError("Validation failed")
-    except Exception as e:
-        logger.warning(f"Google Cloud translation failed: {str(e)}. Falling back to deep-translator.")
+        logger.warning(f"{backend.name} translation validation failed for '{text[:50]}...' to {target_lang}.")
+
+    logger.error(f"All translation backends failed for '{text[:50]}...' to {target_lang}. Returning original text.")
+    return text
+
+
+async def translate_batch(segments: List[str], source_lang: str, target_lang: str) -> List[str]:
+    """
+    Translate many segments with as few requests as possible.
+
+    Duplicate segments are translated once and cached segments are not sent at all. The rest go to
+    the first configured backend in as few requests as it allows; segments it fails to translate (or
+    translates invalidly) move on to the next backend.
+    Args:
+        segments: Texts to translate
+        source_lang: Source language code (e.g., 'en')
+        target_lang: Target language code (e.g., 'ml')
+    Returns:
+        Translations in the same order as `segments` (the original text where translation failed)
+    """
+    if source_lang == target_lang or target_lang not in LANGUAGE_MAP:
+        return list(segments)
+
+    unique = list(dict.fromkeys(s for s in segments if s and isinstance(s, str) and s.strip()))
+    backends = backends_for(source_lang, target_lang)
+    engines = [backend.engine for backend in backends]
+    cached = await asyncio.gather(*(translation_cache.get(s, source_lang, target_lang, engines) for s in unique))
+    translated = {s: text for s, text in zip(unique, cached) if text is not None}
+    pending = [s for s in unique if s not in translated]
+    sent = len(pending)
+
+    for backend in backends:
+        if not pending:
+            break
         try:
-            translated_text = GoogleTranslator(source=source_lang, target=target_lang).translate(text)
-            if validate_translation(translated_text, target_lang):
-                logger.info(
-                    f"Deep-translator translated '{text[:50]}...' from {source_lang} to {target_lang}: {translated_text[:50]}..."
-                )
-                return translated_text
-            else:
-                logger.warning(f"Deep-translator validation failed for '{text[:50]}...' to {target_lang}.")
-                return text
+            results = await backend.translate_many(pending, source_lang, target_lang)
         except Exception as e:
-            logger.error(f"Deep-translator translation failed: {str(e)}")
-            return text
\ No newline at end of file
+            logger.warning(f"{backend.name} batch translation failed: {str(e)}. Trying next backend.")
+            continue
+        done = {
+            s: text for s, text in zip(pending, results) if text and validate_translation(text, target_lang)
+        }
+        await asyncio.gather(
+            *(translation_cache.put(s, source_lang, target_lang, t, backend.engine) for s, t in done.items())
+        )
+        translated.update(done)
+        logger.info(f"{backend.name} translated {len(done)}/{len(pending)} segments from {source_lang} to {target_lang}")
+        pending = [s for s in pending if s not in done]
+
+    if unique:
+        logger.info(
+            f"Batch translated {len(segments)} segments ({len(unique)} unique, {len(unique) - sent} cached, "
+            f"{len(pending)} untranslated) from {source_lang} to {target_lang}"
+        )
+    return [translated.get(s, s) if isinstance(s, str) else s for s in segments]
+
+
+async def translate_lines(text: str, source_lang: str, target_lang: str) -> str:
+    """Translate multi-line text line by line in one batch, keeping the line structure."""
+    if not text or source_lang == target_lang:
+        return text
+    lines = text.split("\n")
+    return "\n".join(await translate_batch(lines, source_lang, target_lang))
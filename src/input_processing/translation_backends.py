@@ -0,0 +1,301 @@
+"""
+Pluggable translation backends used by `translate_text` and `translate_batch`.
+
+Backends are tried in the order given by TRANSLATION_BACKENDS (comma-separated), skipping those that
+do not support the language pair; a segment moves on to the next backend when one fails or returns
+an invalid translation.
+
+    TRANSLATION_BACKENDS=indictrans2,google,deep_translator
+
+- google: Google Cloud Translate (batched list requests)
+- deep_translator: deep-translator's free Google endpoint, one segment per request
+- indictrans2: local IndicTrans2 CTranslate2 model on CPU, loaded once per process
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils.helpers import LANGUAGE_MAP
+from src.utils.executors import get_pool, run_io, run_model
+from src.utils.retry import get_policy
+from src.input_processing.translation_batcher import TranslationMicroBatcher
+
+logger = logging.getLogger(__name__)
+
+INDIC_LANGUAGES = {lang for lang in LANGUAGE_MAP if lang != "en"}
+HEALTH_CONTEXT_KEYWORDS = ["health", "fever", "headache", "diabetes", "cough", "pain"]
+
+
+class TranslationBackend:
+    """Interface of a translation engine."""
+
+    name = "base"
+    # Bump when a change alters the backend's output; cached translations are keyed by `engine`.
+    version = "1"
+
+    @property
+    def engine(self) -> str:
+        """Identity of the backend's output, part of the translation cache key."""
+        return f"{self.name}-{self.version}"
+
+    def supports(self, source_lang: str, target_lang: str) -> bool:
+        return True
+
+    async def translate_many(self, segments: List[str], source_lang: str, target_lang: str) -> List[Optional[str]]:
+        """Translate segments; returns one translation per segment, None where a segment failed."""
+        raise NotImplementedError
+
+    async def translate_one(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
+        return (await self.translate_many([text], source_lang, target_lang))[0]
+
+    async def warm_up(self):
+        """Load models or open connections ahead of the first request."""
+
+
+class GoogleCloudBackend(TranslationBackend):
+    name = "google"
+    version = "v2-text"
+
+    def __init__(self):
+        self._client = None
+        self.max_segments = int(os.getenv("TRANSLATE_BATCH_MAX_SEGMENTS", "128"))
+        self.max_chars = int(os.getenv("TRANSLATE_BATCH_MAX_CHARS", "30000"))
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google.cloud import translate_v2 as translate
+            self._client = translate.Client()
+        return self._client
+
+    def _chunks(self, segments: List[str]) -> List[List[str]]:
+        """Split segments into request-sized chunks (segment count and total characters)."""
+        chunks, current, size = [], [], 0
+        for segment in segments:
+            if current and (len(current) >= self.max_segments or size + len(segment) > self.max_chars):
+                chunks.append(current)
+                current, size = [], 0
+            current.append(segment)
+            size += len(segment)
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def _context(texts: List[str], target_lang: str) -> Tuple[str, List[str]]:
+        """Add medical context to health-related texts for translation; the prefix is stripped from the output."""
+        prefix = f"Translate this health-related text accurately into {LANGUAGE_MAP[target_lang]['name']}: "
+        return prefix, [
+            prefix + text if any(word in text.lower() for word in HEALTH_CONTEXT_KEYWORDS) else text for text in texts
+        ]
+
+    async def _request(self, texts: List[str], prefix: str, source_lang: str, target_lang: str) -> List[str]:
+        """
+        One Translate request. Single and batched translations use the same plain-text format and
+        context prefix, so a segment translates (and is cached) the same either way.
+        """
+        response = await get_policy("translate").call(
+            run_io,
+            self.client.translate,
+            texts,
+            source_language=source_lang,
+            target_language=target_lang,
+            format_="text"
+        )
+        results = []
+        for item in response:
+            translated_text = item["translatedText"]
+            results.append(translated_text[len(prefix):] if translated_text.startswith(prefix) else translated_text)
+        return results
+
+    async def translate_many(self, segments: List[str], source_lang: str, target_lang: str) -> List[Optional[str]]:
+        prefix, texts = self._context(segments, target_lang)
+        results: List[Optional[str]] = []
+        for chunk in self._chunks(texts):
+            try:
+                results.extend(await self._request(chunk, prefix, source_lang, target_lang))
+            except Exception as e:
+                logger.warning(f"Google Cloud batch translation of {len(chunk)} segments failed: {str(e)}")
+                results.extend([None] * len(chunk))
+        return results
+
+    async def translate_one(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
+        prefix, texts = self._context([text], target_lang)
+        return (await self._request(texts, prefix, source_lang, target_lang))[0]
+
+
+class DeepTranslatorBackend(TranslationBackend):
+    name = "deep_translator"
+    version = "google-free"
+
+    async def translate_many(self, segments: List[str], source_lang: str, target_lang: str) -> List[Optional[str]]:
+        from deep_translator import GoogleTranslator
+        translator = GoogleTranslator(source=source_lang, target=target_lang)
+        results: List[Optional[str]] = []
+        for segment in segments:
+            try:
+                results.append(await get_policy("deep_translator").call(run_io, translator.translate, segment))
+            except Exception as e:
+                logger.error(f"Deep-translator translation failed: {str(e)}")
+                results.append(None)
+        return results
+
+
+_indictrans2_model = None
+_indictrans2_lock = threading.Lock()
+
+
+def indictrans2_pipeline_workers() -> int:
+    """
+    Pre/post-processing processes for the IndicTrans2 engine (env INDICTRANS2_NUM_WORKERS, default 0).
+
+    The engine spawns them outside the executor pools, so the request is capped at the cores not
+    already taken by the CPU workload pool's processes, keeping one core for the decoder.
+    """
+    requested = int(os.getenv("INDICTRANS2_NUM_WORKERS", "0"))
+    cpu_pool = get_pool("cpu")
+    reserved = 1 + (cpu_pool.max_workers if cpu_pool.kind == "process" else 0)
+    available = max(0, (os.cpu_count() or 1) - reserved)
+    if requested > available:
+        logger.warning(
+            f"INDICTRANS2_NUM_WORKERS={requested} exceeds the {available} cores left after the CPU pool "
+            f"({cpu_pool.max_workers} {cpu_pool.kind} workers) and the decoder; using {available}"
+        )
+        return available
+    return requested
+
+
+def get_indictrans2_model():
+    """
+    Return the process-wide IndicTrans2 `Model`, loading it on first use.
+
+    The inference package lives under INDICTRANS2_HOME (a directory whose name is not importable), so
+    it is put on sys.path and imported as `inference.engine`, as the Triton server does.
+    """
+    global _indictrans2_model
+    if _indictrans2_model is None:
+        with _indictrans2_lock:
+            if _indictrans2_model is None:
+                home = os.getenv(
+                    "INDICTRANS2_HOME",
+                    os.path.join(os.path.dirname(__file__), "..", "..", "models", "indictrans2-indic-indic-1b")
+                )
+                home = os.path.abspath(home)
+                if home not in sys.path:
+                    sys.path.insert(0, home)
+                from inference.engine import Model
+
+                ckpt_dir = os.getenv("INDICTRANS2_CKPT_DIR", os.path.join(home, "ct2_int8_model"))
+                logger.info(f"Loading IndicTrans2 model from {ckpt_dir}")
+                _indictrans2_model = Model(
+                    ckpt_dir,
+                    device=os.getenv("INDICTRANS2_DEVICE", "cpu"),
+                    input_lang_code_format="iso",
+                    model_type="ctranslate2",
+                    memory_size=int(os.getenv("INDICTRANS2_MEMORY_SIZE", "50000")),
+                    memory_path=os.getenv("INDICTRANS2_MEMORY_PATH") or None,
+                    num_workers=indictrans2_pipeline_workers()
+                )
+    return _indictrans2_model
+
+
+class IndicTrans2Backend(TranslationBackend):
+    """
+    Local IndicTrans2 model. A checkpoint covers one direction (INDICTRANS2_DIRECTION: indic-indic,
+    en-indic or indic-en); the bundled 1B checkpoint is indic-indic.
+    """
+
+    name = "indictrans2"
+    version = "1b-ct2"
+
+    def __init__(self):
+        self.direction = os.getenv("INDICTRANS2_DIRECTION", "indic-indic")
+        # Concurrent requests from different users are merged into shared decoder batches.
+        self.batcher = TranslationMicroBatcher(get_indictrans2_model)
+
+    def supports(self, source_lang: str, target_lang: str) -> bool:
+        src_side, tgt_side = self.direction.split("-", 1)
+        return (
+            source_lang != target_lang
+            and (source_lang == "en" if src_side == "en" else source_lang in INDIC_LANGUAGES)
+            and (target_lang == "en" if tgt_side == "en" else target_lang in INDIC_LANGUAGES)
+        )
+
+    async def translate_many(self, segments: List[str], source_lang: str, target_lang: str) -> List[Optional[str]]:
+        results = await asyncio.gather(
+            *(self.batcher.submit(segment, source_lang, target_lang) for segment in segments), return_exceptions=True
+        )
+        failures = sum(isinstance(r, BaseException) for r in results)
+        if failures:
+            logger.warning(f"IndicTrans2 failed {failures}/{len(segments)} segments; they fall back to the next backend")
+        return [None if isinstance(r, BaseException) else r for r in results]
+
+    def stats(self) -> Dict[str, Any]:
+        model = _indictrans2_model
+        return {
+            "batcher": self.batcher.stats(),
+            "translation_memory": model.memory.stats() if model is not None and model.memory is not None else None,
+            "sentence_splitting": model.split_stats() if model is not None else None
+        }
+
+    async def warm_up(self):
+        model = await run_model(get_indictrans2_model)
+        src_side, tgt_side = self.direction.split("-", 1)
+        source = "en" if src_side == "en" else "hi"
+        target = "en" if tgt_side == "en" else ("ta" if source == "hi" else "hi")
+        sample = "Drink enough water every day." if source == "en" else "हर दिन पर्याप्त पानी पिएं।"
+        await run_model(model.translate_paragraph, sample, source, target)
+        logger.info(f"IndicTrans2 backend ready ({self.direction})")
+
+
+BACKEND_CLASSES = {
+    "google": GoogleCloudBackend,
+    "deep_translator": DeepTranslatorBackend,
+    "indictrans2": IndicTrans2Backend,
+}
+
+_backends: Dict[str, TranslationBackend] = {}
+
+
+def configured_backends() -> List[TranslationBackend]:
+    """Return the configured backends in priority order (instances are shared)."""
+    names = [n.strip() for n in os.getenv("TRANSLATION_BACKENDS", "google,deep_translator").split(",") if n.strip()]
+    backends = []
+    for name in names:
+        if name not in BACKEND_CLASSES:
+            logger.error(f"Unknown translation backend '{name}' in TRANSLATION_BACKENDS; skipping")
+            continue
+        if name not in _backends:
+            _backends[name] = BACKEND_CLASSES[name]()
+        backends.append(_backends[name])
+    return backends
+
+
+def backends_for(source_lang: str, target_lang: str) -> List[TranslationBackend]:
+    """Return the configured backends that support a language pair, in priority order."""
+    return [backend for backend in configured_backends() if backend.supports(source_lang, target_lang)]
+
+
+def backend_stats() -> Dict[str, Any]:
+    """Return metrics of the backends that report any (e.g. the IndicTrans2 micro-batcher)."""
+    return {name: backend.stats() for name, backend in _backends.items() if hasattr(backend, "stats")}
+
+
+async def close_backends():
+    """Stop background tasks owned by backends and release the local model's helper processes."""
+    for backend in _backends.values():
+        if hasattr(backend, "batcher"):
+            await backend.batcher.close()
+    if _indictrans2_model is not None:
+        await run_model(_indictrans2_model.close)
+
+
+async def warm_up_backends():
+    """Warm up every configured backend; failures are logged and the backend stays in the chain."""
+    for backend in configured_backends():
+        try:
+            await backend.warm_up()
+        except Exception as e:
+            logger.error(f"Warm-up of translation backend '{backend.name}' failed: {str(e)}", exc_info=True)
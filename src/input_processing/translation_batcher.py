@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.utils.executors import run_model
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough subword count of a paragraph (SentencePiece splits most words into about two pieces)."""
+    return 2 * len(text.split()) + 2
+
+
+class TranslationMicroBatcher:
+    """
+    Collects concurrent (paragraph, src, tgt) requests and translates them together in one
+    `Model.paragraphs_batch_translate__multilingual` call, so the CTranslate2 batch is filled
+    instead of decoding one user's paragraph at a time.
+
+    A batch is flushed when the oldest request has waited `max_wait_ms`, or when it reaches
+    `max_tokens` (estimated) or `max_items`. One batch runs at a time; requests arriving meanwhile
+    form the next batch. Callers await a future per request.
+    """
+
+    def __init__(
+        self,
+        model_getter: Callable[[], Any],
+        max_wait_ms: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        max_items: Optional[int] = None,
+        max_queue_size: Optional[int] = None
+    ):
+        """
+        Args:
+            model_getter: Blocking callable returning the loaded engine Model
+            max_wait_ms: Max time the first request of a batch waits for company (env MICROBATCH_MAX_WAIT_MS, default 20)
+            max_tokens: Estimated tokens per batch (env MICROBATCH_MAX_TOKENS, default 8192; the decoder's batch is 9216)
+            max_items: Paragraphs per batch (env MICROBATCH_MAX_ITEMS, default 64)
+            max_queue_size: Pending requests before submit() rejects (env MICROBATCH_QUEUE_SIZE, default 1024)
+        """
+        self.model_getter = model_getter
+        self.max_wait = (max_wait_ms or float(os.getenv("MICROBATCH_MAX_WAIT_MS", "20"))) / 1000
+        self.max_tokens = max_tokens or int(os.getenv("MICROBATCH_MAX_TOKENS", "8192"))
+        self.max_items = max_items or int(os.getenv("MICROBATCH_MAX_ITEMS", "64"))
+        self.max_queue_size = max_queue_size or int(os.getenv("MICROBATCH_QUEUE_SIZE", "1024"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._carry: Optional[Tuple] = None
+        # Requests taken off the queue for the current batch, so they can be failed if the task stops
+        self._batch: List[Tuple] = []
+        self.batches = 0
+        self.items = 0
+        self.tokens = 0
+        self.rejected = 0
+        self.failed_batches = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+        self.total_batch_time = 0.0
+        self.flush_reasons = {"timeout": 0, "tokens": 0, "items": 0}
+
+    @staticmethod
+    def _fail(items: List[Tuple], error: Exception):
+        for item in items:
+            if not item[5].done():
+                item[5].set_exception(error)
+
+    def _ensure_started(self):
+        if self._task is not None and not self._task.done():
+            return
+        if self._task is not None:
+            if self._task.get_loop() is not asyncio.get_running_loop():
+                # The old loop is gone and nobody can await its futures; start over.
+                self._queue, self._carry, self._batch = None, None, []
+            else:
+                # Requests already queued (and carried over) are picked up by the new task; only the batch
+                # the dead task had taken would never resolve.
+                error = None if self._task.cancelled() else self._task.exception()
+                logger.error(f"Micro-batching task stopped ({error!r}); restarting it")
+                self._fail(self._batch, RuntimeError("translation micro-batcher stopped"))
+                self._batch = []
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, paragraph: str, source_lang: str, target_lang: str) -> str:
+        """
+        Queue one paragraph and wait for its translation.
+
+        Raises:
+            asyncio.QueueFull: If too many requests are pending (callers fall back to another backend)
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((paragraph, source_lang, target_lang, estimate_tokens(paragraph), time.monotonic(), future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        return await future
+
+    async def _next_batch(self) -> Tuple[List[Tuple], str]:
+        first = self._carry or await self._queue.get()
+        self._carry = None
+        batch, tokens = [first], first[3]
+        self._batch = batch
+        deadline = first[4] + self.max_wait
+        while len(batch) < self.max_items:
+            # Requests already queued always join (under backlog the deadline has long passed);
+            # only waiting for new ones is bounded by the deadline.
+            if not self._queue.empty():
+                item = self._queue.get_nowait()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return batch, "timeout"
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    return batch, "timeout"
+            if tokens + item[3] > self.max_tokens:
+                # Keep it for the next batch so this one stays within the token budget.
+                self._carry = item
+                return batch, "tokens"
+            batch.append(item)
+            tokens += item[3]
+        return batch, "items"
+
+    async def _run(self):
+        while True:
+            batch, reason = await self._next_batch()
+            batch = [item for item in batch if not item[5].cancelled()]
+            if not batch:
+                continue
+            self._batch = batch
+            started = time.monotonic()
+            for item in batch:
+                wait = started - item[4]
+                self.total_wait += wait
+                self.max_wait_seen = max(self.max_wait_seen, wait)
+            self.flush_reasons[reason] += 1
+            self.batches += 1
+            self.items += len(batch)
+            self.tokens += sum(item[3] for item in batch)
+            try:
+                model = await run_model(self.model_getter)
+                results = await run_model(
+                    model.paragraphs_batch_translate__multilingual, [(item[0], item[1], item[2]) for item in batch]
+                )
+            except Exception as e:
+                self.failed_batches += 1
+                logger.error(f"Micro-batch of {len(batch)} paragraphs failed: {str(e)}", exc_info=True)
+                self._fail(batch, e)
+                self._batch = []
+                continue
+            finally:
+                self.total_batch_time += time.monotonic() - started
+            for item, result in zip(batch, results):
+                if not item[5].done():
+                    item[5].set_result(result)
+            self._batch = []
+
+    async def close(self):
+        """Stop the batching task; the batch being translated fails and queued requests are cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._fail(self._batch, RuntimeError("translation micro-batcher closed"))
+        self._batch = []
+        if self._carry is not None:
+            self._carry[5].cancel()
+            self._carry = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._queue.get_nowait()[5].cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue and batch metrics."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "rejected": self.rejected,
+            "failed_batches": self.failed_batches,
+            "avg_batch_items": self.items / self.batches if self.batches else 0.0,
+            "avg_batch_tokens": self.tokens / self.batches if self.batches else 0.0,
+            "avg_wait_ms": 1000 * self.total_wait / self.items if self.items else 0.0,
+            "max_wait_ms": 1000 * self.max_wait_seen,
+            "avg_batch_ms": 1000 * self.total_batch_time / self.batches if self.batches else 0.0,
+            "flush_reasons": dict(self.flush_reasons)
+        }
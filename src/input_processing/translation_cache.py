@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from src.utils.executors import run_io
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every cached translation. Entries are also keyed by the backend that produced
+# them (`TranslationBackend.engine`), so changing TRANSLATION_BACKENDS does not serve stale output.
+TRANSLATION_ENGINE_VERSION = os.getenv("TRANSLATION_ENGINE_VERSION", "google-v2.1")
+
+
+def normalize_text(text: str) -> str:
+    """Normalization applied before keying: Unicode NFC and collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text: str, source_lang: str, target_lang: str, engine: str) -> str:
+    raw = "\x1f".join((TRANSLATION_ENGINE_VERSION, engine, source_lang, target_lang, normalize_text(text)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    Two-tier translation cache: an in-process LRU in front of a SQLite file shared by all bot
+    processes on the host. Both tiers expire entries after `ttl` seconds.
+
+    SQLite reads and writes run on the I/O executor so the event loop never waits on disk.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[float] = None, path: Optional[str] = None):
+        """
+        Args:
+            max_size: Max in-memory entries (env TRANSLATION_CACHE_SIZE, default 20000)
+            ttl: Seconds an entry stays valid (env TRANSLATION_CACHE_TTL, default 30 days)
+            path: SQLite file (env TRANSLATION_CACHE_PATH, default translation_cache.sqlite3);
+                an empty value disables the persistent tier
+        """
+        self.max_size = max_size or int(os.getenv("TRANSLATION_CACHE_SIZE", "20000"))
+        self.ttl = ttl or float(os.getenv("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600)))
+        self.path = path if path is not None else os.getenv("TRANSLATION_CACHE_PATH", "translation_cache.sqlite3")
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._db is None:
+            try:
+                db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations "
+                    "(key TEXT PRIMARY KEY, text TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db = db
+            except sqlite3.Error as e:
+                logger.error(f"Disabling persistent translation cache at {self.path}: {str(e)}")
+                self.path = None
+                return None
+        return self._db
+
+    def _remember(self, key: str, text: str, expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _get_persistent(self, keys: List[str]) -> Optional[tuple]:
+        """Return (key, text, expires_at) of the first of `keys` with a live row."""
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return None
+            try:
+                rows = db.execute(
+                    f"SELECT key, text, expires_at FROM translations WHERE key IN ({','.join('?' * len(keys))}) "
+                    "AND expires_at >= ?",
+                    (*keys, time.time())
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.error(f"Translation cache read failed: {str(e)}")
+                return None
+        found = {row[0]: row for row in rows}
+        return next((found[key] for key in keys if key in found), None)
+
+    def _put_persistent(self, key: str, text: str, expires_at: float):
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO translations (key, text, expires_at) VALUES (?, ?, ?)",
+                    (key, text, expires_at)
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Translation cache write failed: {str(e)}")
+
+    async def get(self, text: str, source_lang: str, target_lang: str, engines: List[str]) -> Optional[str]:
+        """
+        Return a cached translation, or None on a miss.
+        Args:
+            engines: Engines whose translations may be served, in order of preference
+        """
+        keys = [cache_key(text, source_lang, target_lang, engine) for engine in engines]
+        for key in keys:
+            cached = self._get_memory(key)
+            if cached is not None:
+                self.memory_hits += 1
+                return cached
+        row = await run_io(self._get_persistent, keys) if self.path and keys else None
+        if row is not None:
+            self.persistent_hits += 1
+            self._remember(*row)
+            return row[1]
+        self.misses += 1
+        return None
+
+    async def put(self, text: str, source_lang: str, target_lang: str, translated: str, engine: str):
+        """Store a validated translation made by `engine` in both tiers."""
+        key = cache_key(text, source_lang, target_lang, engine)
+        expires_at = time.time() + self.ttl
+        self._remember(key, translated, expires_at)
+        self.writes += 1
+        if self.path:
+            await run_io(self._put_persistent, key, translated, expires_at)
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the persistent tier; returns the number removed."""
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return 0
+            return db.execute("DELETE FROM translations WHERE expires_at < ?", (time.time(),)).rowcount
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-tier hit counters, hit rate and in-memory size."""
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "engine_version": TRANSLATION_ENGINE_VERSION
+        }
+
+
+translation_cache = TranslationCache()
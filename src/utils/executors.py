@@ -0,0 +1,152 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from src.utils.logging_config import init_worker_logging, worker_log_queue
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_call(fn: Callable, submitted_at: float, *args, **kwargs):
+    """Run `fn` and report how long it waited in the pool queue. Module-level so process pools can pickle it."""
+    wait = time.time() - submitted_at
+    return wait, fn(*args, **kwargs)
+
+
+class WorkloadPool:
+    """
+    Bounded executor for one class of blocking work, with queue-depth and wait-time metrics.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int):
+        """
+        Args:
+            name: Workload class name used in logs and metrics (e.g. 'cpu', 'io')
+            kind: 'process' or 'thread'
+            max_workers: Pool size
+        """
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        # Workers log through the parent's writer instead of the inherited in-memory queue.
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            initializer=init_worker_logging,
+                            initargs=(worker_log_queue(), logging.getLogger().level)
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix=f"{self.name}-worker"
+                        )
+                    logger.info(f"Started {self.kind} pool '{self.name}' with {self.max_workers} workers")
+        return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable in the pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(_timed_call, fn, time.time(), *args, **kwargs)
+        self.in_flight += 1
+        try:
+            wait, result = await loop.run_in_executor(self._get_executor(), call)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if wait > 1.0:
+            logger.warning(f"Task {getattr(fn, '__name__', fn)} waited {wait:.2f}s in '{self.name}' pool")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and wait-time metrics for this pool."""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.max_workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait": self.total_wait / self.completed if self.completed else 0.0,
+            "max_wait": self.max_wait
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+            logger.info(f"Stopped {self.kind} pool '{self.name}'")
+
+
+# CPU-bound local work (OCR) runs in processes; I/O-bound cloud calls (Gemini, Speech, TTS, Translate) in threads.
+_pools: Dict[str, WorkloadPool] = {
+    "cpu": WorkloadPool(
+        "cpu",
+        os.getenv("CPU_EXECUTOR_KIND", "process"),
+        int(os.getenv("CPU_EXECUTOR_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    ),
+    "io": WorkloadPool(
+        "io",
+        "thread",
+        int(os.getenv("IO_EXECUTOR_WORKERS", "32"))
+    ),
+    # In-process model inference (IndicTrans2). CTranslate2 parallelizes internally and releases the GIL,
+    # so one thread per loaded model keeps calls serialized without idle cores.
+    "model": WorkloadPool(
+        "model",
+        "thread",
+        int(os.getenv("MODEL_EXECUTOR_WORKERS", "1"))
+    ),
+}
+
+
+def get_pool(name: str) -> WorkloadPool:
+    """Return the pool for a workload class."""
+    return _pools[name]
+
+
+async def run_cpu(fn: Callable, *args, **kwargs) -> Any:
+    """Run CPU-bound work (e.g. OCR) off the event loop. `fn` and its arguments must be picklable."""
+    return await _pools["cpu"].run(fn, *args, **kwargs)
+
+
+async def run_io(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking I/O call (e.g. a synchronous cloud client) off the event loop."""
+    return await _pools["io"].run(fn, *args, **kwargs)
+
+
+async def run_model(fn: Callable, *args, **kwargs) -> Any:
+    """Run local model inference on the dedicated model thread(s)."""
+    return await _pools["model"].run(fn, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Return metrics for every workload pool."""
+    return {name: pool.stats() for name, pool in _pools.items()}
+
+
+def shutdown_executors(wait: bool = True):
+    """Stop all workload pools (call on shutdown)."""
+    for pool in _pools.values():
+        pool.shutdown(wait=wait)
@@ -2,11 +2,6 @@ import re
 import logging
 from typing import Dict
 
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-    handlers=[logging.FileHandler("bot.log", encoding="utf-8")]
-)
 logger = logging.getLogger(__name__)
 
 LANGUAGE_MAP: Dict[str, Dict[str, str]] = {
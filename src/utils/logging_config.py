@@ -0,0 +1,122 @@
+import atexit
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import random
+import sys
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+DIAGNOSTIC_MODE = os.getenv("DIAGNOSTIC_MODE", "False").lower() == "true"
+DIAGNOSTIC_SAMPLE_RATE = float(os.getenv("DIAGNOSTIC_SAMPLE_RATE", "0.01"))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+# Queue and listener for records from pool worker processes (see `worker_log_queue`)
+_worker_queue = None
+_worker_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class UnicodeSafeStreamHandler(logging.StreamHandler):
+    def __init__(self):
+        super().__init__(stream=sys.stdout)
+        if sys.stdout.encoding.lower() != "utf-8":
+            self.stream = open(sys.stdout.fileno(), mode="w", encoding="utf-8", buffering=1)
+
+
+def setup_logging():
+    """
+    Configure process-wide logging once. Records are put on an in-memory queue by the calling thread
+    and written to a size-rotated LOG_FILE and stdout by a background listener thread, so logging never
+    blocks the event loop on disk I/O.
+
+    Env:
+        LOG_LEVEL: Root level (default INFO)
+        TELEGRAM_LOG_LEVEL: Level for python-telegram-bot and httpx (default WARNING)
+        LOG_FILE: Log file path (default bot.log)
+        LOG_MAX_BYTES / LOG_BACKUP_COUNT: Rotation size and number of rotated files kept
+    """
+    global _listener
+    if _listener is not None:
+        return
+    if multiprocessing.parent_process() is not None:
+        # Helper processes (e.g. IndicTrans2 pipeline workers) re-import the bot module when spawned;
+        # they must not open a second writer on the parent's rotating log file.
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.getenv("LOG_FILE", "bot.log"),
+        maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+        backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+        encoding="utf-8"
+    )
+    stream_handler = UnicodeSafeStreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    library_level = os.getenv("TELEGRAM_LOG_LEVEL", "WARNING").upper()
+    for name in ("telegram", "telegram.ext", "httpx", "httpcore"):
+        logging.getLogger(name).setLevel(library_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def worker_log_queue():
+    """
+    Return a multiprocessing queue whose records the parent writes with its own handlers, for process
+    pool workers (pass it to `init_worker_logging`). None when logging is not set up in this process.
+    """
+    global _worker_queue, _worker_listener
+    if _listener is None:
+        return None
+    if _worker_queue is None:
+        _worker_queue = multiprocessing.Queue(-1)
+        _worker_listener = logging.handlers.QueueListener(_worker_queue, *_listener.handlers, respect_handler_level=True)
+        _worker_listener.start()
+    return _worker_queue
+
+
+def init_worker_logging(log_queue, level: int):
+    """
+    Process pool initializer. A forked worker inherits the parent's QueueHandler but not its listener
+    thread, so its records would pile up unread in a copy of the in-memory queue; replace it with a
+    handler on the parent-drained multiprocessing queue (or drop records if there is none).
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue) if log_queue is not None else logging.NullHandler())
+    root.setLevel(level)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writers."""
+    global _listener, _worker_queue, _worker_listener
+    if _worker_listener is not None:
+        _worker_listener.stop()
+        _worker_listener = None
+        _worker_queue = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def diagnostic_sample() -> bool:
+    """Return True when a (costly) diagnostic dump should be logged for this event."""
+    return (
+        DIAGNOSTIC_MODE
+        and random.random() < DIAGNOSTIC_SAMPLE_RATE
+        and logging.getLogger().isEnabledFor(logging.DEBUG)
+    )
@@ -1,6 +1,7 @@
 import logging
 import os
 from datetime import datetime
+from typing import Dict, List, Optional
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.units import inch
@@ -9,12 +10,9 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.enums import TA_LEFT, TA_CENTER
+from src.utils.ui_strings import MEAL_TYPE_KEYS, ui_text
+from src.utils.executors import run_io
 
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-    handlers=[logging.FileHandler("bot.log", encoding="utf-8"), logging.StreamHandler()]
-)
 logger = logging.getLogger(__name__)
 
 
@@ -45,163 +43,177 @@ def register_fonts():
             else:
                 logger.warning(f"Font file {font_file} not found for language {lang}. Using Helvetica as fallback.")
         else:
-            logger.debug(f"Using built-in font {font_name} for language {lang}")
+            logger.debug("Using built-in font %s for language %s", font_name, lang)
 
 
-async def generate_pdf(diet_plan: dict, output_filename: str, language: str = "en", user_info: dict = None) -> str:
+async def localize_meal_types(meal_types: List[str], language: str) -> Dict[str, str]:
     """
-    Generate a structured PDF for a diet plan with daily meal tables.
+    Map each distinct meal type to its localized form: known types come from the UI catalog, other
+    English types are translated in one batch, and already-localized types are kept.
+    """
+    localized = {}
+    unknown = []
+    for meal_type in dict.fromkeys(meal_types):
+        key = MEAL_TYPE_KEYS.get(meal_type.strip().lower())
+        if key:
+            localized[meal_type] = await ui_text(key, language)
+        elif meal_type.isascii() and language != "en":
+            unknown.append(meal_type)
+        else:
+            localized[meal_type] = meal_type
+    if unknown:
+        from src.input_processing.translation import translate_batch
+        localized.update(zip(unknown, await translate_batch(unknown, "en", language)))
+    return localized
 
-    Args:
-        diet_plan (dict): Structured diet plan with days, meals, and notes.
-        output_filename (str): Name of the output PDF file.
-        language (str): Language code (e.g., 'en', 'ml').
-        user_info (dict): User details (name, age, condition).
 
-    Returns:
-        str: Path to the generated PDF file, or None if generation fails.
-    """
-    try:
-        # Register fonts
-        register_fonts()
+FONT_MAP = {
+    "ml": "NotoSansMalayalam-Regular",
+    "hi": "NotoSansDevanagari-Regular",
+    "ta": "NotoSansTamil-Regular",
+    "te": "NotoSansTelugu-Regular",
+    "bn": "NotoSansBengali-Regular",
+    "kn": "NotoSansKannada-Regular",
+    "en": "Helvetica"
+}
 
-        # Ensure output directory
-        output_dir = os.path.join("temp")
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, output_filename)
 
-        # Initialize PDF document
-        doc = SimpleDocTemplate(
-            output_path,
-            pagesize=letter,
-            leftMargin=0.5 * inch,
-            rightMargin=0.5 * inch,
-            topMargin=0.75 * inch,
-            bottomMargin=0.5 * inch
-        )
-        styles = getSampleStyleSheet()
-
-        # Font selection
-        font_map = {
-            "ml": "NotoSansMalayalam-Regular",
-            "hi": "NotoSansDevanagari-Regular",
-            "ta": "NotoSansTamil-Regular",
-            "te": "NotoSansTelugu-Regular",
-            "bn": "NotoSansBengali-Regular",
-            "kn": "NotoSansKannada-Regular",
-            "en": "Helvetica"
-        }
-        font_name = font_map.get(language, "Helvetica")
+class DietPlanPdf:
+    """
+    Incremental builder of a diet plan PDF. Sections are turned into flowables as soon as their content
+    is ready (e.g. each day of a plan that is still streaming from Gemini); `build` lays them out and
+    writes the file.
+    """
+
+    def __init__(self, language: str = "en"):
+        """
+        Args:
+            language (str): Language code (e.g., 'en', 'ml').
+        """
+        register_fonts()
+        self.language = language
+        self.font_name = FONT_MAP.get(language, "Helvetica")
+        self.story = []
 
         # Custom styles
-        title_style = ParagraphStyle(
+        self.title_style = ParagraphStyle(
             name="Title",
             fontSize=18,
             leading=22,
             textColor=colors.darkblue,
             spaceAfter=12,
-            fontName=font_name,
+            fontName=self.font_name,
             alignment=TA_CENTER
         )
-        subtitle_style = ParagraphStyle(
+        self.subtitle_style = ParagraphStyle(
             name="Subtitle",
             fontSize=14,
             leading=16,
             textColor=colors.black,
             spaceAfter=8,
-            fontName=font_name,
+            fontName=self.font_name,
             alignment=TA_LEFT
         )
-        body_style = ParagraphStyle(
+        self.body_style = ParagraphStyle(
             name="Body",
             fontSize=11,
             leading=13,
             spaceAfter=6,
-            fontName=font_name,
+            fontName=self.font_name,
             alignment=TA_LEFT,
             wordWrap="CJK"
         )
-        table_header_style = ParagraphStyle(
+        self.table_header_style = ParagraphStyle(
             name="TableHeader",
             fontSize=12,
             leading=14,
             textColor=colors.white,
-            fontName=font_name,
+            fontName=self.font_name,
             alignment=TA_LEFT
         )
 
-        # Translate title if needed
-        title_text = "Personalized Diet Plan"
-        if language != "en":
-            from src.input_processing.translation import translate_text
-            title_text = await translate_text("Personalized Diet Plan", "en", language) or title_text
+    async def add_header(self, user_info: dict = None):
+        """Add the title and, if given, the user's details (name, age, condition)."""
+        title_text = await ui_text("pdf_title", self.language)
+        self.story.append(Paragraph(title_text, self.title_style))
+        self.story.append(Spacer(1, 12))
 
-        # Build content
-        story = []
+        if user_info:
+            user_text = await ui_text(
+                "pdf_user_info",
+                self.language,
+                name=user_info.get('name', 'Unknown'),
+                age=user_info.get('age', 'Unknown'),
+                condition=user_info.get('condition', 'None')
+            )
+            self.story.append(Paragraph(user_text, self.subtitle_style))
+            self.story.append(Spacer(1, 12))
 
-        # Header
-        story.append(Paragraph(title_text, title_style))
-        story.append(Spacer(1, 12))
+    async def add_day(self, day: str, meals: List[dict], meal_types: Dict[str, str] = None):
+        """
+        Add one day's meal table.
 
-        # User info
-        if user_info:
-            user_text = f"Name: {user_info.get('name', 'Unknown')} | Age: {user_info.get('age', 'Unknown')} | Condition: {user_info.get('condition', 'None')}"
-            if language != "en":
-                user_text = await translate_text(user_text, "en", language) or user_text
-            story.append(Paragraph(user_text, subtitle_style))
-            story.append(Spacer(1, 12))
+        Args:
+            day (str): Day number.
+            meals (list): Meals with time, type and details.
+            meal_types (dict): Localized form of each meal type (types missing from it are shown as-is).
+        """
+        meal_types = meal_types or {}
+        day_title = await ui_text("pdf_day", self.language, day=day)
+        self.story.append(Paragraph(day_title, self.subtitle_style))
+        self.story.append(Spacer(1, 6))
 
-        # Daily meal plans
-        for day, meals in diet_plan.get("days", {}).items():
-            day_title = f"Day {day}"
-            if language != "en":
-                day_title = await translate_text(day_title, "en", language) or day_title
-            story.append(Paragraph(day_title, subtitle_style))
-            story.append(Spacer(1, 6))
-
-            # Table for meals
-            table_data = [["Time", "Meal", "Details"]]
-            for meal in meals:
-                time = meal.get("time", "")
-                meal_type = meal.get("type", "")
-                details = meal.get("details", "")
-                if language != "en" and meal_type:
-                    meal_type = await translate_text(meal_type, "en", language) or meal_type
-                table_data.append([
-                    Paragraph(time, body_style),
-                    Paragraph(meal_type, body_style),
-                    Paragraph(details, body_style)
-                ])
-
-            table = Table(table_data, colWidths=[1.5 * inch, 1.5 * inch, 4.0 * inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), font_name),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('BOX', (0, 0), (-1, -1), 1, colors.black),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
-            story.append(table)
-            story.append(Spacer(1, 12))
-
-        # Notes section
-        notes = diet_plan.get("notes", "")
+        # Table for meals
+        table_data = [["Time", "Meal", "Details"]]
+        for meal in meals:
+            time = meal.get("time", "")
+            meal_type = meal.get("type", "")
+            details = meal.get("details", "")
+            meal_type = meal_types.get(meal_type, meal_type)
+            table_data.append([
+                Paragraph(time, self.body_style),
+                Paragraph(meal_type, self.body_style),
+                Paragraph(details, self.body_style)
+            ])
+
+        table = Table(table_data, colWidths=[1.5 * inch, 1.5 * inch, 4.0 * inch])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), self.font_name),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('BOX', (0, 0), (-1, -1), 1, colors.black),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+            ('LEFTPADDING', (0, 0), (-1, -1), 6),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]))
+        self.story.append(table)
+        self.story.append(Spacer(1, 12))
+
+    async def add_notes(self, notes: str):
+        """Add the notes section (skipped when there are no notes)."""
         if notes:
-            notes_title = "Additional Notes"
-            if language != "en":
-                notes_title = await translate_text(notes_title, "en", language) or notes_title
-            story.append(Paragraph(notes_title, subtitle_style))
-            story.append(Spacer(1, 6))
-            story.append(Paragraph(notes, body_style))
-            story.append(Spacer(1, 12))
+            notes_title = await ui_text("pdf_notes_title", self.language)
+            self.story.append(Paragraph(notes_title, self.subtitle_style))
+            self.story.append(Spacer(1, 6))
+            self.story.append(Paragraph(notes, self.body_style))
+            self.story.append(Spacer(1, 12))
+
+    def _write(self, output_path: str):
+        doc = SimpleDocTemplate(
+            output_path,
+            pagesize=letter,
+            leftMargin=0.5 * inch,
+            rightMargin=0.5 * inch,
+            topMargin=0.75 * inch,
+            bottomMargin=0.5 * inch
+        )
+        font_name = self.font_name
 
         # Footer template
         def add_footer(canvas, doc):
@@ -211,10 +223,57 @@ async def generate_pdf(diet_plan: dict, output_filename: str, language: str = "e
             canvas.drawCentredString(letter[0] / 2, 0.25 * inch, footer_text)
             canvas.restoreState()
 
-        # Build PDF
-        doc.build(story, onFirstPage=add_footer, onLaterPages=add_footer)
-        logger.info(f"Generated PDF: {output_path} for language {language}")
-        return output_path
+        doc.build(self.story, onFirstPage=add_footer, onLaterPages=add_footer)
+
+    async def build(self, output_filename: str) -> Optional[str]:
+        """
+        Lay out the added sections and write the PDF (on the I/O executor).
+
+        Returns:
+            str: Path to the generated PDF file, or None if generation fails.
+        """
+        try:
+            # Ensure output directory
+            output_dir = os.path.join("temp")
+            os.makedirs(output_dir, exist_ok=True)
+            output_path = os.path.join(output_dir, output_filename)
+            await run_io(self._write, output_path)
+            logger.info(f"Generated PDF: {output_path} for language {self.language}")
+            return output_path
+        except Exception as e:
+            logger.error(f"Error generating PDF {output_filename} for language {self.language}: {str(e)}", exc_info=True)
+            return None
+
+
+async def generate_pdf(diet_plan: dict, output_filename: str, language: str = "en", user_info: dict = None) -> str:
+    """
+    Generate a structured PDF for a diet plan with daily meal tables.
+
+    Args:
+        diet_plan (dict): Structured diet plan with days, meals, and notes.
+        output_filename (str): Name of the output PDF file.
+        language (str): Language code (e.g., 'en', 'ml').
+        user_info (dict): User details (name, age, condition).
+
+    Returns:
+        str: Path to the generated PDF file, or None if generation fails.
+    """
+    try:
+        pdf = DietPlanPdf(language)
+        await pdf.add_header(user_info)
+
+        # Daily meal plans
+        meal_types = {}
+        if language != "en":
+            meal_types = await localize_meal_types(
+                [meal.get("type", "") for meals in diet_plan.get("days", {}).values() for meal in meals if meal.get("type")],
+                language
+            )
+        for day, meals in diet_plan.get("days", {}).items():
+            await pdf.add_day(day, meals, meal_types)
+
+        await pdf.add_notes(diet_plan.get("notes", ""))
     except Exception as e:
         logger.error(f"Error generating PDF {output_filename} for language {language}: {str(e)}", exc_info=True)
-        return None
\ No newline at end of file
+        return None
+    return await pdf.build(output_filename)
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from google.api_core import exceptions as google_exceptions
+except ImportError:
+    google_exceptions = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    """Raised by callers to mark a failed attempt as worth retrying (e.g. malformed model output)."""
+
+
+class OutputFormatError(RetryableError):
+    """
+    The service answered but its output was unusable. Retried, but not counted as a failure by the
+    circuit breaker, which only tracks outages.
+    """
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the service's circuit breaker is open."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Classify an exception as transient (retry) or permanent (fail fast)."""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, (RetryableError, asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if httpx is not None:
+        if isinstance(exc, httpx.TransportError):
+            return True
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code in RETRYABLE_STATUS_CODES
+    if google_exceptions is not None:
+        if isinstance(exc, (google_exceptions.RetryError, google_exceptions.ServerError)):
+            return True
+        if isinstance(exc, google_exceptions.GoogleAPICallError):
+            return getattr(exc, "code", None) in RETRYABLE_STATUS_CODES
+    return False
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing service for `reset_timeout` seconds after `failure_threshold`
+    consecutive transient failures, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit '{self.name}' closed")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_progress = False
+
+    def release_trial(self):
+        """Free the half-open trial slot of an attempt that ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_progress = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                logger.warning(f"Circuit '{self.name}' opened after {self.failures} consecutive failures")
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, bounded by an attempt count and a per-call deadline,
+    guarded by a circuit breaker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        deadline: float = 30.0,
+        retry_on: Callable[[BaseException], bool] = is_retryable,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        Args:
+            name: Service name used in logs
+            max_attempts: Total attempts including the first
+            base_delay: Backoff base in seconds (doubles per attempt)
+            max_delay: Upper bound for a single backoff
+            deadline: Total seconds allowed for all attempts and backoffs
+            retry_on: Predicate deciding whether an exception is transient
+            breaker: Circuit breaker shared by all calls to this service
+        """
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_on = retry_on
+        self.breaker = breaker or CircuitBreaker(name)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def _before_attempt(self):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+    def _after_failure(self, exc: Exception, attempt: int, remaining: float) -> Optional[float]:
+        """Record a failure and return the delay before the next attempt, or None to give up."""
+        if not self.retry_on(exc):
+            # A permanent error still means the service answered.
+            self.breaker.record_success()
+            return None
+        if isinstance(exc, OutputFormatError):
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt)
+        if delay >= remaining:
+            return None
+        logger.warning(
+            f"{self.name} attempt {attempt}/{self.max_attempts} failed: {str(exc)}. Retrying in {delay:.2f}s"
+        )
+        return delay
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Await `fn(*args, **kwargs)` under this policy."""
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            self._before_attempt()
+            remaining = deadline_at - loop.time()
+            try:
+                result = await asyncio.wait_for(fn(*args, **kwargs), timeout=max(remaining, 0.001))
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                delay = self._after_failure(e, attempt, deadline_at - loop.time())
+                if delay is None:
+                    raise
+            except BaseException:
+                # Cancelled mid-attempt: no outcome to record, but a half-open trial must not stay taken.
+                self.breaker.release_trial()
+                raise
+            await asyncio.sleep(delay)
+
+    def call_sync(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call a blocking `fn(*args, **kwargs)` under this policy. Only for code already running in an
+        executor thread; the deadline is checked between attempts, not enforced mid-call.
+        """
+        deadline_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            self._before_attempt()
+            try:
+                result = fn(*args, **kwargs)
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                delay = self._after_failure(e, attempt, deadline_at - time.monotonic())
+                if delay is None:
+                    raise
+            except BaseException:
+                self.breaker.release_trial()
+                raise
+            time.sleep(delay)
+
+
+def _policy_from_env(name: str, max_attempts: int, base_delay: float, deadline: float) -> RetryPolicy:
+    prefix = f"RETRY_{name.upper()}_"
+    return RetryPolicy(
+        name,
+        max_attempts=int(os.getenv(prefix + "ATTEMPTS", str(max_attempts))),
+        base_delay=float(os.getenv(prefix + "BASE_DELAY", str(base_delay))),
+        deadline=float(os.getenv(prefix + "DEADLINE", str(deadline))),
+        breaker=CircuitBreaker(
+            name,
+            failure_threshold=int(os.getenv(prefix + "BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv(prefix + "BREAKER_RESET", "30"))
+        )
+    )
+
+
+_policies: Dict[str, RetryPolicy] = {
+    "gemini": _policy_from_env("gemini", 3, 1.0, 120.0),
+    "translate": _policy_from_env("translate", 3, 0.3, 15.0),
+    "deep_translator": _policy_from_env("deep_translator", 2, 0.3, 10.0),
+    "speech": _policy_from_env("speech", 3, 0.5, 30.0),
+    "tts": _policy_from_env("tts", 3, 0.5, 20.0),
+    "n8n": _policy_from_env("n8n", 3, 0.5, 10.0),
+    "mongodb": _policy_from_env("mongodb", 3, 0.5, 10.0),
+}
+
+
+def get_policy(name: str) -> RetryPolicy:
+    """Return the shared retry policy for an outbound service."""
+    return _policies[name]
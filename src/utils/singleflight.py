@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds a finished answer keeps being served to repeats of the same request (groups created with a TTL)
+SINGLE_FLIGHT_TTL = float(os.getenv("SINGLE_FLIGHT_TTL", "10"))
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls by key: the first caller of a key starts the call and callers arriving
+    while it is in flight await the same result (or exception) instead of starting their own. With a
+    `ttl`, a successful result is also served to callers arriving up to `ttl` seconds after it finished.
+
+    Whether a result is reused is decided when the call finishes, not by a caller, so it holds even if
+    every caller was cancelled or timed out while the call kept running.
+    """
+
+    def __init__(self, name: str, ttl: float = 0.0, remember_if: Optional[Callable[[Any], bool]] = None):
+        """
+        Args:
+            name: Group name used in logs and metrics (e.g. 'diet_plan')
+            ttl: Seconds a finished result is reused (0 to share only in-flight calls)
+            remember_if: Predicate on a result; results it rejects (e.g. fallback answers) are not reused
+        """
+        self.name = name
+        self.ttl = ttl
+        self.remember_if = remember_if
+        self._calls: Dict[str, asyncio.Task] = {}
+        # key -> (expires_at, result), in expiry order
+        self._recent: Dict[str, Tuple[float, Any]] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.memo_hits = 0
+
+    async def do(self, key: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Await `fn(*args, **kwargs)`, or the call already in flight for `key`. The call runs as its own
+        task, so a caller that gives up (e.g. times out) does not cancel it for the others.
+        Returns:
+            The result and whether it was shared with an earlier caller
+        """
+        recent = self._recent.get(key)
+        if recent is not None and recent[0] > time.monotonic():
+            self.memo_hits += 1
+            logger.debug("Reusing finished %s call for key %s", self.name, key)
+            return recent[1], True
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.followers += 1
+            logger.debug("Joining in-flight %s call for key %s", self.name, key)
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if task.cancelled():
+            return
+        # Mark the error as retrieved even if every caller has given up waiting.
+        if task.exception() is None and self.ttl > 0:
+            if self.remember_if is None or self.remember_if(task.result()):
+                self._remember(key, task.result())
+
+    def _remember(self, key: str, result: Any):
+        now = time.monotonic()
+        for old in list(self._recent):
+            if self._recent[old][0] > now:
+                break
+            del self._recent[old]
+        self._recent.pop(key, None)
+        self._recent[key] = (now + self.ttl, result)
+
+    def discard(self, key: str):
+        """Stop reusing the finished result of a key (e.g. a fallback answer that should not be repeated)."""
+        self._recent.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.leaders + self.followers + self.memo_hits
+        return {
+            "in_flight": len(self._calls),
+            "remembered": len(self._recent),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "memo_hits": self.memo_hits,
+            "dedup_rate": (self.followers + self.memo_hits) / calls if calls else 0.0
+        }
+
+
+_groups: Dict[str, SingleFlight] = {}
+
+
+def get_singleflight(name: str, ttl: float = 0.0, remember_if: Optional[Callable[[Any], bool]] = None) -> SingleFlight:
+    """Return the process-wide single-flight group of a name, creating it (with `ttl`, `remember_if`) on first use."""
+    if name not in _groups:
+        _groups[name] = SingleFlight(name, ttl, remember_if)
+    return _groups[name]
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    """Return metrics for every single-flight group."""
+    return {name: group.stats() for name, group in _groups.items()}
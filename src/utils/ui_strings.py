@@ -0,0 +1,233 @@
+"""
+Catalog of the bot's fixed UI strings, pre-translated for every language in LANGUAGE_MAP.
+
+Handlers look strings up by key with `ui_text`, which is a dictionary lookup once the catalog is
+loaded. Strings missing from the catalog (e.g. added since the last build) are translated at runtime
+with `translate_text` as before and reported once.
+
+Build or refresh the catalog (only new, changed or invalid entries are re-translated):
+    python -m src.utils.ui_strings build
+Check it without network access (exits non-zero on problems):
+    python -m src.utils.ui_strings validate
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Set
+from src.utils.helpers import LANGUAGE_MAP, validate_translation
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = os.getenv("UI_CATALOG_PATH", os.path.join(os.path.dirname(__file__), "ui_catalog.json"))
+
+DIET_CHOICE_MENU = "Please reply with: 1 for Medical Report, 2 for Specific Condition, 3 for General Diet"
+
+UI_STRINGS: Dict[str, str] = {
+    # Onboarding and menus
+    "welcome_back": "Welcome back, {name}! Select an option or use /dietplan for diet options:",
+    "welcome_registered": "Thank you, {name}! Select an option or use /dietplan for diet options:",
+    "ask_name": "Please provide your name (1-50 characters).",
+    "invalid_name": "Please provide a valid name (1-50 characters, letters only).",
+    "ask_age": "Thank you! Please provide your age (0-120).",
+    "invalid_age": "Please provide a valid age (0-120, numbers only).",
+    "ask_allergies": "Thank you! Do you have any allergies (e.g., penicillin)? If none, say 'None'.",
+    "ask_query": "Please enter your health-related query.",
+    "prediction_unavailable": "Prediction feature is not available yet. Please try another option.",
+    "prescription_unavailable": "Prescription feature is not available yet. Please try another option.",
+    # Diet plan flow
+    "diet_choice_menu": DIET_CHOICE_MENU,
+    "invalid_diet_choice": "Invalid choice. " + DIET_CHOICE_MENU,
+    "ask_report_upload": "Please upload your medical report (PDF or image).",
+    "ask_condition": "Please specify a condition (e.g., diabetes, hypertension, cholesterol).",
+    # Errors
+    "error_request": "❌ Error processing your request. Please try again.",
+    "error_choice": "❌ Error processing your choice. Please try again.",
+    "error_diet_plan": "❌ Error generating diet plan. Please try again.",
+    "error_pdf_generation": "❌ Failed to generate diet plan PDF. Please try again.",
+    "error_pdf_send": "❌ Error sending diet plan PDF. Please try again.",
+    "error_generic": "Sorry, an error occurred. Please try again.",
+    "error_no_document_text": "❌ No text found in document. Please upload a valid medical report.",
+    "error_document": "❌ Error processing document. Please try again.",
+    "error_transcription": "❌ Could not transcribe voice message. Please try again.",
+    "error_voice": "❌ Error processing voice message. Please try again.",
+    # Diet plan PDF
+    "pdf_title": "Personalized Diet Plan",
+    "pdf_user_info": "Name: {name} | Age: {age} | Condition: {condition}",
+    "pdf_day": "Day {day}",
+    "pdf_notes_title": "Additional Notes",
+    "meal_breakfast": "Breakfast",
+    "meal_lunch": "Lunch",
+    "meal_dinner": "Dinner",
+    "meal_snack": "Snack",
+    "meal_mid_morning_snack": "Mid-Morning Snack",
+    "meal_evening_snack": "Evening Snack",
+}
+
+# Meal types as Gemini returns them (lower-cased) -> catalog key
+MEAL_TYPE_KEYS: Dict[str, str] = {
+    UI_STRINGS[key].lower(): key for key in UI_STRINGS if key.startswith("meal_")
+}
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+_catalog: Optional[Dict[str, Dict[str, str]]] = None
+_reported_missing: Set[str] = set()
+
+
+def placeholders(text: str) -> Set[str]:
+    return set(_PLACEHOLDER.findall(text))
+
+
+def _read_catalog_file(path: str = CATALOG_PATH) -> dict:
+    if not os.path.exists(path):
+        return {"source": {}, "languages": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_catalog(path: str = CATALOG_PATH) -> Dict[str, Dict[str, str]]:
+    """Load the catalog into memory, keeping only entries whose English source is unchanged."""
+    global _catalog
+    try:
+        data = _read_catalog_file(path)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load UI string catalog {path}: {str(e)}")
+        data = {"source": {}, "languages": {}}
+    source = data.get("source", {})
+    _catalog = {
+        lang: {key: text for key, text in entries.items() if source.get(key) == UI_STRINGS.get(key)}
+        for lang, entries in data.get("languages", {}).items()
+    }
+    logger.info(
+        f"Loaded UI string catalog with {sum(len(v) for v in _catalog.values())} entries "
+        f"for {len(_catalog)} languages"
+    )
+    return _catalog
+
+
+def lookup(key: str, lang: str) -> Optional[str]:
+    """Return the catalog template for `key` in `lang`, or None if it is not in the catalog."""
+    if lang == "en":
+        return UI_STRINGS[key]
+    catalog = _catalog if _catalog is not None else load_catalog()
+    return catalog.get(lang, {}).get(key)
+
+
+async def ui_text(key: str, lang: str, **fmt) -> str:
+    """
+    Return UI string `key` in `lang`, formatted with `fmt`.
+
+    Args:
+        key: Key in UI_STRINGS
+        lang: Target language code
+        **fmt: Values for the string's placeholders (e.g. name)
+    Returns:
+        Localized text; the English text if translation is unavailable
+    """
+    template = lookup(key, lang)
+    if template is not None:
+        return template.format(**fmt)
+    english = UI_STRINGS[key].format(**fmt)
+    if lang not in LANGUAGE_MAP:
+        return english
+    if f"{lang}:{key}" not in _reported_missing:
+        _reported_missing.add(f"{lang}:{key}")
+        logger.warning(f"UI string '{key}' missing from catalog for {lang}; translating at runtime")
+    from src.input_processing.translation import translate_text
+    return await translate_text(english, "en", lang) or english
+
+
+def check_entry(key: str, lang: str, text: Optional[str]) -> Optional[str]:
+    """Return a description of what is wrong with a catalog entry, or None if it is usable."""
+    if not text:
+        return "missing"
+    if placeholders(text) != placeholders(UI_STRINGS[key]):
+        return f"placeholders {sorted(placeholders(text))} != {sorted(placeholders(UI_STRINGS[key]))}"
+    if not validate_translation(text, lang):
+        return "not in target script"
+    return None
+
+
+def validate_catalog(data: dict) -> List[str]:
+    """Return one line per missing, stale or invalid entry."""
+    problems = []
+    source = data.get("source", {})
+    for lang in LANGUAGE_MAP:
+        if lang == "en":
+            continue
+        entries = data.get("languages", {}).get(lang, {})
+        for key in UI_STRINGS:
+            if key in entries and source.get(key) != UI_STRINGS[key]:
+                problems.append(f"{lang}:{key}: stale (English text changed since build)")
+                continue
+            problem = check_entry(key, lang, entries.get(key))
+            if problem:
+                problems.append(f"{lang}:{key}: {problem}")
+    return problems
+
+
+async def build_catalog(path: str = CATALOG_PATH, languages: Optional[List[str]] = None, concurrency: int = 8) -> dict:
+    """Translate every missing, stale or invalid entry and write the catalog to `path`."""
+    from src.input_processing.translation import translate_text
+
+    data = _read_catalog_file(path)
+    old_source = data.get("source", {})
+    semaphore = asyncio.Semaphore(concurrency)
+    languages = languages or [lang for lang in LANGUAGE_MAP if lang != "en"]
+
+    async def translate_entry(lang: str, key: str):
+        async with semaphore:
+            return lang, key, await translate_text(UI_STRINGS[key], "en", lang)
+
+    jobs = []
+    for lang in languages:
+        entries = data.setdefault("languages", {}).setdefault(lang, {})
+        for key in UI_STRINGS:
+            current = entries.get(key)
+            if old_source.get(key) != UI_STRINGS[key] or check_entry(key, lang, current):
+                jobs.append(translate_entry(lang, key))
+
+    for lang, key, text in await asyncio.gather(*jobs):
+        problem = check_entry(key, lang, text)
+        if problem:
+            logger.warning(f"Rejected translation for {lang}:{key} ({problem}): {text}")
+            data["languages"][lang].pop(key, None)
+        else:
+            data["languages"][lang][key] = text
+
+    for entries in data.get("languages", {}).values():
+        for key in list(entries):
+            if key not in UI_STRINGS:
+                del entries[key]
+    data["source"] = dict(UI_STRINGS)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    logger.info(f"Wrote UI string catalog to {path} ({len(jobs)} entries translated)")
+    return data
+
+
+def main():
+    from src.utils.logging_config import setup_logging
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Build or validate the UI string catalog")
+    parser.add_argument("command", choices=["build", "validate"])
+    parser.add_argument("--path", default=CATALOG_PATH)
+    parser.add_argument("--languages", nargs="*", help="Only build these language codes")
+    args = parser.parse_args()
+    if args.command == "build":
+        data = asyncio.run(build_catalog(args.path, args.languages))
+    else:
+        data = _read_catalog_file(args.path)
+    problems = validate_catalog(data)
+    for problem in problems:
+        print(problem)
+    print(f"{len(problems)} problem(s) in {args.path}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
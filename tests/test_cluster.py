@@ -0,0 +1,213 @@
+import asyncio
+import json
+from collections import Counter
+
+import pytest
+
+from src.bot.cluster import Coordinator, HashRing, update_owner_key
+from src.bot.webhook import SECRET_HEADER
+
+KEYS = [str(user_id) for user_id in range(10000)]
+
+
+def test_update_owner_key():
+    assert update_owner_key({"update_id": 1, "message": {"from": {"id": 5}, "chat": {"id": 9}}}) == "5"
+    assert update_owner_key({"update_id": 1, "callback_query": {"from": {"id": 6}}}) == "6"
+    assert update_owner_key({"update_id": 1, "channel_post": {"chat": {"id": -100}}}) == "-100"
+    assert update_owner_key({"update_id": 3}) == "3"
+
+
+def test_ring_spreads_keys_evenly():
+    ring = HashRing()
+    for node in range(4):
+        ring.add(node)
+    counts = Counter(ring.get(key) for key in KEYS)
+    assert set(counts) == {0, 1, 2, 3}
+    assert all(1500 < count < 3500 for count in counts.values())
+
+
+def test_ring_moves_only_keys_of_the_changed_node():
+    ring = HashRing()
+    for node in range(4):
+        ring.add(node)
+    before = {key: ring.get(key) for key in KEYS}
+
+    ring.add(4)
+    after = {key: ring.get(key) for key in KEYS}
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert all(after[key] == 4 for key in moved)
+    assert 1000 < len(moved) < 3000
+
+    ring.remove(4)
+    assert {key: ring.get(key) for key in KEYS} == before
+    ring.remove(2)
+    assert all(ring.get(key) == before[key] for key in KEYS if before[key] != 2)
+
+
+def test_empty_ring_and_idempotent_membership():
+    ring = HashRing()
+    assert ring.get("1") is None
+    ring.add(1)
+    ring.add(1)
+    assert ring.get("1") == 1
+    ring.remove(1)
+    ring.remove(1)
+    assert ring.get("1") is None
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.payload = payload or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise ValueError(self.status_code)
+
+    def json(self):
+        return self.payload
+
+
+class FakeWorkers:
+    """Stands in for the coordinator's HTTP client; workers report `busy` owners per port."""
+
+    def __init__(self):
+        self.busy = {}
+        self.posts = []
+
+    async def get(self, url, **kwargs):
+        port = int(url.split(":")[2].split("/")[0])
+        if url.endswith("/cluster/busy"):
+            return FakeResponse(200, {"owners": self.busy.get(port, [])})
+        return FakeResponse(200, {"queue_depth": 0, "in_flight": 0})
+
+    async def post(self, url, content=None, headers=None):
+        self.posts.append((url, content))
+        return FakeResponse(200)
+
+
+@pytest.fixture
+def coordinator(monkeypatch):
+    monkeypatch.setenv("WEBHOOK_SECRET", "public")
+    monkeypatch.setenv("WORKER_HANDOFF_TIMEOUT", "5")
+    c = Coordinator(3)
+    c.client = FakeWorkers()
+    for worker in c.workers[:2]:
+        c.ownership.add(worker.index)
+        c.routing.add(worker.index)
+        worker.state = "healthy"
+    return c
+
+
+def key_owned_by(ring, node):
+    return next(key for key in KEYS if ring.get(key) == node)
+
+
+def grown_ring():
+    ring = HashRing()
+    for node in (0, 1, 2):
+        ring.add(node)
+    return ring
+
+
+def queued(worker):
+    items = []
+    while not worker.queue.empty():
+        items.append(worker.queue.get_nowait())
+    return items
+
+
+def test_dispatch_routes_by_owner(coordinator):
+    key = key_owned_by(coordinator.routing, 1)
+    assert coordinator.dispatch(key, b"u1")
+    assert coordinator.workers[1].pending_keys == {key: 1}
+    assert queued(coordinator.workers[1]) == [(key, b"u1")]
+
+
+def test_join_holds_moving_users_until_previous_owner_is_done(coordinator):
+    async def run():
+        joiner = coordinator.workers[2]
+        key = next(k for k in KEYS if grown_ring().get(k) == 2)
+        previous = coordinator.workers[coordinator.routing.get(key)]
+        # The previous owner still has an update for this user queued, and one in progress.
+        previous.enqueue(key, b"old")
+        coordinator.client.busy[previous.port] = [key]
+
+        join = asyncio.create_task(coordinator.join(joiner))
+        await asyncio.sleep(0.01)
+        assert joiner.state == "joining"
+        assert coordinator.dispatch(key, b"new-1") and coordinator.dispatch(key, b"new-2")
+        assert joiner.held == [(key, b"new-1"), (key, b"new-2")]
+
+        previous.queue.get_nowait()
+        previous.dequeued(key)
+        await asyncio.sleep(0.3)
+        assert not join.done()  # the old owner is still processing the user's update
+        coordinator.client.busy[previous.port] = []
+        await asyncio.wait_for(join, 2)
+        return joiner, key
+
+    joiner, key = asyncio.run(run())
+    assert joiner.state == "healthy"
+    assert joiner.flush_pending
+    assert queued(joiner) == [(key, b"new-1"), (key, b"new-2")]
+
+
+def test_join_is_not_held_up_by_other_users(coordinator):
+    async def run():
+        # A user that stays on worker 0 after the join
+        other = next(k for k in KEYS if grown_ring().get(k) == 0)
+        coordinator.workers[0].enqueue(other, b"busy")
+        coordinator.client.busy[coordinator.workers[0].port] = [other]
+        await asyncio.wait_for(coordinator.join(coordinator.workers[2]), 1)
+
+    asyncio.run(run())
+    assert coordinator.workers[2].state == "healthy"
+
+
+def test_drain_hands_users_to_the_rest_of_the_ring(coordinator):
+    async def run():
+        leaving = coordinator.workers[0]
+        key = key_owned_by(coordinator.routing, 0)
+        drain = asyncio.create_task(coordinator.drain(leaving))
+        await asyncio.sleep(0)
+        assert leaving.state == "draining"
+        assert coordinator.dispatch(key, b"held")
+        await asyncio.wait_for(drain, 2)
+        return leaving, key
+
+    leaving, key = asyncio.run(run())
+    remaining = coordinator.workers[1]
+    assert leaving.state == "stopped"
+    assert coordinator.ownership.nodes == coordinator.routing.nodes == {1}
+    assert remaining.flush_pending
+    assert queued(remaining) == [(key, b"held")]
+
+
+def test_failover_reroutes_queued_updates_in_order(coordinator):
+    async def run():
+        failed = coordinator.workers[0]
+        keys = [key for key in KEYS if coordinator.routing.get(key) == 0][:3]
+        for i, key in enumerate(keys):
+            failed.enqueue(key, f"u{i}".encode())
+        await coordinator._fail(failed)
+        failed.forwarder.cancel()
+        return keys
+
+    keys = asyncio.run(run())
+    survivor = coordinator.workers[1]
+    assert coordinator.workers[0].state == "unhealthy"
+    assert queued(survivor) == [(key, f"u{i}".encode()) for i, key in enumerate(keys)]
+    assert survivor.flush_pending
+
+
+def test_public_endpoint(coordinator):
+    async def run():
+        update = {"update_id": 1, "message": {"from": {"id": 5}, "chat": {"id": 5}}}
+        ok = await coordinator.handle("POST", "/telegram", {SECRET_HEADER: "public"}, json.dumps(update).encode())
+        denied = await coordinator.handle("POST", "/telegram", {SECRET_HEADER: "wrong"}, b"{}")
+        bad = await coordinator.handle("POST", "/telegram", {SECRET_HEADER: "public"}, b"{oops")
+        health = await coordinator.handle("GET", "/healthz", {}, b"")
+        return ok[0], denied[0], bad[0], health[0]
+
+    assert asyncio.run(run()) == (200, 401, 400, 200)
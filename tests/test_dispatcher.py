@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime
+
+from telegram import Chat, Message, Update, User
+
+from src.bot.dispatcher import OperationLimits, PerUserUpdateProcessor, update_owner
+
+_update_ids = iter(range(1, 10 ** 6))
+
+
+def update(user_id):
+    user = User(id=user_id, first_name="Test", is_bot=False)
+    message = Message(
+        message_id=1, date=datetime.now(), chat=Chat(id=user_id, type="private"), from_user=user, text="hi"
+    )
+    return Update(update_id=next(_update_ids), message=message)
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+        self.running = 0
+        self.max_running = 0
+
+    async def handle(self, name, delay):
+        self.events.append(("start", name))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(delay)
+        self.running -= 1
+        self.events.append(("end", name))
+
+
+def test_update_owner():
+    assert update_owner(update(42)) == 42
+    assert update_owner(object()) is None
+
+
+def test_same_owner_is_serialized_while_other_owners_run():
+    async def run():
+        processor = PerUserUpdateProcessor(8)
+        recorder = Recorder()
+        await asyncio.gather(
+            processor.process_update(update(1), recorder.handle("a1", 0.05)),
+            processor.process_update(update(1), recorder.handle("a2", 0.01)),
+            processor.process_update(update(2), recorder.handle("b1", 0.01)),
+        )
+        return processor, recorder.events
+
+    processor, events = asyncio.run(run())
+    assert events.index(("end", "a1")) < events.index(("start", "a2"))
+    # The other user is not held up behind user 1's queue.
+    assert events.index(("end", "b1")) < events.index(("end", "a1"))
+    assert processor.stats() == {"active_users": 0, "queued_updates": 0, "running_updates": 0}
+
+
+def test_global_limit_counts_only_running_updates():
+    async def run():
+        processor = PerUserUpdateProcessor(2)
+        recorder = Recorder()
+        updates = [processor.process_update(update(1), recorder.handle(f"a{i}", 0.02)) for i in range(5)]
+        updates += [processor.process_update(update(u), recorder.handle(f"u{u}", 0.02)) for u in (2, 3, 4)]
+        await asyncio.gather(*updates)
+        return recorder
+
+    recorder = asyncio.run(run())
+    assert recorder.max_running == 2
+    a_starts = [name for kind, name in recorder.events if kind == "start" and name.startswith("a")]
+    assert a_starts == [f"a{i}" for i in range(5)]
+    # User 1's queued updates do not hold slots: other users finish before user 1's backlog does.
+    assert recorder.events.index(("end", "u2")) < recorder.events.index(("end", "a4"))
+
+
+def test_operation_limits_enforce_cap():
+    async def run():
+        limits = OperationLimits({"ocr": 2})
+        recorder = Recorder()
+        seen = []
+
+        async def job(i):
+            async with limits.limit("ocr"):
+                seen.append(limits.stats()["ocr"]["running"])
+                await recorder.handle(i, 0.01)
+
+        jobs = [asyncio.create_task(job(i)) for i in range(6)]
+        await asyncio.sleep(0.001)
+        waiting = limits.stats()["ocr"]["waiting"]
+        await asyncio.gather(*jobs)
+        return recorder, seen, waiting, limits.stats()
+
+    recorder, seen, waiting, stats = asyncio.run(run())
+    assert recorder.max_running == 2
+    assert max(seen) == 2
+    assert waiting == 4
+    assert stats == {"ocr": {"limit": 2, "running": 0, "waiting": 0}}
@@ -0,0 +1,144 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+
+import pytest
+
+for requirement in ("regex", "sentencepiece", "indicnlp", "mosestokenizer", "nltk", "sacremoses"):
+    pytest.importorskip(requirement)
+
+MODEL_HOME = os.path.join(os.path.dirname(__file__), "..", "models", "indictrans2-indic-indic-1b")
+if MODEL_HOME not in sys.path:
+    # The inference package is imported the way the IndicTrans2 backend and the Triton server do.
+    sys.path.insert(0, MODEL_HOME)
+
+from inference import engine  # noqa: E402
+
+
+class FakeEngine(engine.Model):
+    """
+    `Model` with deterministic stand-ins for preprocessing, decoding and postprocessing, so the
+    translation paths can be compared without a checkpoint. Sentences containing "long" are split
+    into two segments, like sentences over the decoder's input length.
+    """
+
+    def __init__(self, pipeline=None, pipeline_chunk_size=3):
+        self.memory = None
+        self.pipeline = pipeline
+        self.pipeline_chunk_size = pipeline_chunk_size
+        self.split_counts = {"sentences": 0, "split_sentences": 0, "segments": 0}
+        self._split_counts_lock = threading.Lock()
+
+    def preprocess_batch(self, batch, src_lang, tgt_lang):
+        tagged, maps, counts = [], [], []
+        for sent in batch:
+            segments = [sent + "/1", sent + "/2"] if "long" in sent else [sent]
+            tagged.extend(f"{src_lang} {tgt_lang} {segment}" for segment in segments)
+            maps.extend([{"<ID1>": sent}] * len(segments))
+            counts.append(len(segments))
+        return tagged, maps, counts
+
+    def translate_lines_with_memory(self, lines, lang_pairs):
+        return [line.split(" ", 2)[2].upper() for line in lines]
+
+    def postprocess(self, sents, placeholder_entity_map, lang, common_lang="hin_Deva"):
+        assert len(sents) == len(placeholder_entity_map)
+        return [f"{lang}:{sent}" for sent in sents]
+
+
+PARAGRAPHS = [
+    (["s1", "s2"], "hin_Deva", "tam_Taml"),
+    (["long s3", "s4", "s5", "s6"], "tam_Taml", "hin_Deva"),
+    (["s7"], "ben_Beng", "eng_Latn"),
+    (["s8", "long s9"], "hin_Deva", "ben_Beng"),
+    (["s10", "s11", "s12"], "eng_Latn", "hin_Deva"),
+]
+
+
+def test_pipelined_translation_matches_serial(monkeypatch):
+    serial = FakeEngine()
+    expected = serial._serial_translate(PARAGRAPHS)
+
+    with ThreadPoolExecutor(max_workers=2) as workers:
+        pipelined = FakeEngine(pipeline=workers)
+        # Worker-side helpers use the process's text processor; here the workers are threads.
+        monkeypatch.setattr(engine, "_worker_processor", pipelined)
+        assert pipelined._pipelined_translate(PARAGRAPHS) == expected
+
+    assert expected[1] == "hin_Deva:LONG S3/1 hin_Deva:LONG S3/2 hin_Deva:S4 hin_Deva:S5 hin_Deva:S6"
+    assert pipelined.split_counts == serial.split_counts == {"sentences": 12, "split_sentences": 2, "segments": 14}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 100])
+def test_pipelined_translation_is_independent_of_chunk_size(monkeypatch, chunk_size):
+    expected = FakeEngine()._serial_translate(PARAGRAPHS)
+    with ThreadPoolExecutor(max_workers=3) as workers:
+        pipelined = FakeEngine(pipeline=workers, pipeline_chunk_size=chunk_size)
+        monkeypatch.setattr(engine, "_worker_processor", pipelined)
+        assert pipelined._pipelined_translate(PARAGRAPHS) == expected
+
+
+def placeholder_spans(pieces):
+    """Index ranges of the pieces forming each `<ID..>` placeholder."""
+    spans, start = [], None
+    for i, piece in enumerate(pieces):
+        if "<" in piece:
+            start = i
+        if ">" in piece and start is not None:
+            spans.append((start, i))
+            start = None
+    return spans
+
+
+def test_split_long_sentence_never_cuts_inside_a_placeholder():
+    pieces = []
+    for i in range(12):
+        pieces += ["▁take", "▁the", "▁<", "ID", str(i), ">", "▁dose"]
+    for max_len in range(5, 30):
+        segments = engine.split_long_sentence(pieces, max_len)
+        assert [piece for segment in segments for piece in segment] == pieces
+        assert all(0 < len(segment) <= max_len for segment in segments)
+        cuts = list(accumulate(len(segment) for segment in segments[:-1]))
+        for start, end in placeholder_spans(pieces):
+            assert not any(start < cut <= end for cut in cuts)
+
+
+def test_split_long_sentence_prefers_clause_punctuation():
+    pieces = ["▁a"] * 6 + ["▁,"] + ["▁b"] * 5
+    assert engine.split_long_sentence(pieces, 10) == [pieces[:7], pieces[7:]]
+    # A clause cut that would leave the segment less than half full is not taken.
+    pieces = ["▁a", "▁,"] + ["▁b"] * 10
+    assert engine.split_long_sentence(pieces, 10) == [pieces[:10], pieces[10:]]
+
+
+def test_short_sentences_are_not_split():
+    assert engine.split_long_sentence(["▁a", "▁b"], 2) == [["▁a", "▁b"]]
+    sents, maps, counts = engine.truncate_long_sentences(["▁a ▁b", "▁c"], [{"x": 1}, {}], max_len=2)
+    assert (sents, maps, counts) == (["▁a ▁b", "▁c"], [{"x": 1}, {}], [1, 1])
+
+
+def test_truncate_and_merge_round_trip():
+    long_sent = " ".join(f"▁w{i}" for i in range(25))
+    sents = ["▁short", long_sent, "▁also ▁short"]
+    maps = [{"<ID1>": "a"}, {"<ID1>": "b"}, {}]
+    segments, segment_maps, counts = engine.truncate_long_sentences(sents, maps, max_len=10)
+
+    assert counts == [1, 3, 1]
+    assert len(segments) == len(segment_maps) == sum(counts)
+    assert segment_maps[1:4] == [{"<ID1>": "b"}] * 3
+    assert engine.merge_segments(segments, counts) == sents
+
+
+def test_merge_segments_joins_per_target_script():
+    segments = ["पहला भाग।", " दूसरा भाग ", "अलग", "第一部分", "第二部分"]
+    assert engine.merge_segments(segments[:3], [2, 1], "hin_Deva") == ["पहला भाग। दूसरा भाग", "अलग"]
+    assert engine.merge_segments(segments[3:], [2], "zho_Hans") == ["第一部分第二部分"]
+    assert engine.merge_segments(["a", ""], [2], "eng_Latn") == ["a"]
+
+
+def test_split_stats():
+    model = FakeEngine()
+    model._record_splits([1, 3, 1, 2])
+    assert model.split_stats() == {"sentences": 4, "split_sentences": 2, "segments": 7, "split_rate": 0.5}
@@ -0,0 +1,99 @@
+import asyncio
+
+from src.database.interaction_writer import InteractionWriter, is_transient_write_error
+from src.utils.retry import CircuitBreaker, RetryPolicy
+
+
+class BulkWriteError(Exception):
+    """Stand-in for pymongo's BulkWriteError: the per-record errors are in `details`."""
+
+    def __init__(self, errors):
+        super().__init__("batch op errors occurred")
+        self.details = {"writeErrors": errors}
+
+
+class FakeCollection:
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.calls = []
+        self.stored = []
+
+    async def insert_many(self, records, ordered=True):
+        self.calls.append(list(records))
+        if self.failures:
+            failure = self.failures.pop(0)
+            if isinstance(failure, BulkWriteError):
+                failed = {error["index"] for error in failure.details["writeErrors"]}
+                self.stored += [r for i, r in enumerate(records) if i not in failed]
+            raise failure
+        self.stored += records
+
+
+def writer(collection, attempts=3):
+    policy = RetryPolicy(
+        "test", max_attempts=attempts, base_delay=0.001, deadline=5, retry_on=is_transient_write_error,
+        breaker=CircuitBreaker("test", failure_threshold=100)
+    )
+    return InteractionWriter(collection, max_batch_size=10, flush_interval=0.01, policy=policy)
+
+
+def records(n):
+    return [{"user_id": str(i)} for i in range(n)]
+
+
+def test_transient_error_is_retried():
+    collection = FakeCollection([ConnectionError("reset")])
+    w = writer(collection)
+    asyncio.run(w._write(records(3)))
+    assert len(collection.calls) == 2
+    assert collection.stored == records(3)
+    assert (w.written, w.failed) == (3, 0)
+
+
+def test_partial_failure_retries_only_records_not_inserted():
+    collection = FakeCollection([BulkWriteError([{"index": 1, "code": 6}, {"index": 3, "code": 6}])])
+    w = writer(collection)
+    asyncio.run(w._write(records(4)))
+    assert collection.calls[1] == [{"user_id": "1"}, {"user_id": "3"}]
+    assert sorted(r["user_id"] for r in collection.stored) == ["0", "1", "2", "3"]
+    assert (w.written, w.failed) == (4, 0)
+
+
+def test_duplicate_key_counts_as_written():
+    collection = FakeCollection([BulkWriteError([{"index": 0, "code": 11000}])])
+    w = writer(collection)
+    asyncio.run(w._write(records(2)))
+    assert len(collection.calls) == 1
+    assert (w.written, w.failed) == (2, 0)
+
+
+def test_records_dropped_after_bounded_retries():
+    collection = FakeCollection([ConnectionError("down")] * 5)
+    w = writer(collection, attempts=2)
+    asyncio.run(w._write(records(3)))
+    assert len(collection.calls) == 2
+    assert (w.written, w.failed) == (0, 3)
+
+
+def test_permanent_error_is_not_retried():
+    collection = FakeCollection([ValueError("bad document")])
+    w = writer(collection)
+    asyncio.run(w._write(records(2)))
+    assert len(collection.calls) == 1
+    assert w.failed == 2
+
+
+def test_close_flushes_buffered_records():
+    collection = FakeCollection([])
+
+    async def run():
+        w = writer(collection)
+        w.start()
+        for record in records(15):
+            await w.enqueue(record)
+        await w.close()
+        return w
+
+    w = asyncio.run(run())
+    assert collection.stored == records(15)
+    assert w.written == 15
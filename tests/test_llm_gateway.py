@@ -0,0 +1,204 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from src.ai_pipeline.llm_gateway import FakeLLM, LLMGateway, TokenBucket
+
+MODEL = "gemini-1.5-flash"
+
+
+class TrackingLLM(FakeLLM):
+    """FakeLLM that records the highest number of concurrent calls per model."""
+
+    def __init__(self, latency=0.02, fail=False):
+        super().__init__(latency)
+        self.fail = fail
+        self.active = {}
+        self.peak = {}
+
+    async def generate(self, model, prompt):
+        self.active[model] = self.active.get(model, 0) + 1
+        self.peak[model] = max(self.peak.get(model, 0), self.active[model])
+        try:
+            if self.fail:
+                self.calls += 1
+                await asyncio.sleep(self.latency)
+                raise ConnectionError("backend down")
+            return await super().generate(model, prompt)
+        finally:
+            self.active[model] -= 1
+
+
+def test_concurrency_is_capped_per_model():
+    backend = TrackingLLM()
+    gateway = LLMGateway(backend, max_concurrency=2, rpm=0)
+
+    async def run():
+        await asyncio.gather(
+            *(gateway.generate(f"question {i}", "qa", MODEL) for i in range(6)),
+            *(gateway.generate(f"question {i}", "qa", "gemini-1.5-pro") for i in range(3))
+        )
+
+    asyncio.run(run())
+    assert backend.calls == 9
+    assert backend.peak == {MODEL: 2, "gemini-1.5-pro": 2}
+    assert gateway.stats()["models"][MODEL]["in_flight"] == 0
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    async def run():
+        bucket = TokenBucket(rate_per_minute=1200, capacity=2)  # 20 a second
+        started = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return bucket, time.monotonic() - started
+
+    bucket, elapsed = asyncio.run(run())
+    # Two tokens from the burst, then four more at 50 ms each.
+    assert elapsed >= 0.18
+    assert bucket.waits >= 4
+
+
+def test_token_bucket_without_rate_never_waits():
+    async def run():
+        bucket = TokenBucket(rate_per_minute=0)
+        for _ in range(100):
+            await bucket.acquire()
+        return bucket.waits
+
+    assert asyncio.run(run()) == 0
+
+
+def test_gateway_rate_limit_is_reported():
+    gateway = LLMGateway(FakeLLM(latency=0), max_concurrency=8, rpm=1200)
+    # No burst allowance, so every call after the first waits for the bucket.
+    gateway._model_limits(MODEL).bucket = TokenBucket(rate_per_minute=1200, capacity=1)
+
+    async def run():
+        await asyncio.gather(*(gateway.generate(f"q{i}", "qa", MODEL) for i in range(3)))
+
+    asyncio.run(run())
+    assert gateway.stats()["models"][MODEL]["rate_limited_waits"] >= 2
+
+
+def test_identical_prompts_in_flight_share_one_call():
+    backend = FakeLLM(latency=0.05)
+    gateway = LLMGateway(backend, max_concurrency=8, rpm=0)
+
+    async def run():
+        answers = await asyncio.gather(
+            gateway.generate("same", "qa", MODEL),
+            gateway.generate("same", "qa", MODEL),
+            gateway.generate("same", "prescription", MODEL),
+            gateway.generate("same", "qa", "gemini-1.5-pro"),
+            gateway.generate("other", "qa", MODEL)
+        )
+        # Finished calls are not memoized.
+        answers.append(await gateway.generate("same", "qa", MODEL))
+        return answers
+
+    answers = asyncio.run(run())
+    assert len(set(answers)) == 1
+    assert backend.calls == 4
+    agents = gateway.stats()["agents"]
+    assert (agents["qa"]["calls"], agents["qa"]["coalesced"]) == (4, 1)
+    assert (agents["prescription"]["calls"], agents["prescription"]["coalesced"]) == (0, 1)
+    assert gateway.stats()["models"][MODEL]["pending_prompts"] == 0
+
+
+def test_cancelling_one_caller_keeps_the_shared_call():
+    backend = FakeLLM(latency=0.05)
+    gateway = LLMGateway(backend, max_concurrency=8, rpm=0)
+
+    async def run():
+        first = asyncio.ensure_future(gateway.generate("same", "qa", MODEL))
+        second = asyncio.ensure_future(gateway.generate("same", "qa", MODEL))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+
+    answer, cancelled = asyncio.run(run())
+    assert cancelled and answer.startswith("Rest well")
+    assert backend.calls == 1
+
+
+def test_errors_reach_every_waiter_and_are_counted_once():
+    backend = TrackingLLM(fail=True)
+    gateway = LLMGateway(backend, max_concurrency=8, rpm=0)
+
+    async def run():
+        return await asyncio.gather(
+            *(gateway.generate("same", "qa", MODEL) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert backend.calls == 1
+    assert gateway.stats()["agents"]["qa"]["errors"] == 1
+
+
+def test_per_agent_accounting():
+    gateway = LLMGateway(FakeLLM(latency=0.01), max_concurrency=8, rpm=0)
+
+    async def run():
+        await gateway.generate("one two three", "qa", MODEL)
+        await gateway.generate("four five", "qa", MODEL)
+        await gateway.generate("```json please", "diet", MODEL)
+
+    asyncio.run(run())
+    agents = gateway.stats()["agents"]
+    assert agents["qa"]["calls"] == 2
+    assert agents["qa"]["prompt_tokens"] == 5
+    assert agents["qa"]["output_tokens"] > 0
+    assert agents["qa"]["avg_latency"] >= 0.01
+    assert agents["diet"]["calls"] == 1
+    assert gateway.stats()["backend"] == "FakeLLM"
+
+
+def test_stream_yields_the_full_answer_under_a_concurrency_slot():
+    backend = FakeLLM(latency=0.02)
+    gateway = LLMGateway(backend, max_concurrency=1, rpm=0)
+    prompt = "Return the plan as ```json"
+
+    async def run():
+        chunks, in_flight = [], []
+        async for text in gateway.stream(prompt, "diet", MODEL):
+            chunks.append(text)
+            in_flight.append(gateway.stats()["models"][MODEL]["in_flight"])
+        return chunks, in_flight
+
+    chunks, in_flight = asyncio.run(run())
+    assert len(chunks) > 1
+    text = "".join(chunks)
+    assert text == backend.respond(prompt)
+    assert len(json.loads(text.strip("`").removeprefix("json"))["days"]) == 7
+    assert set(in_flight) == {1}
+    stats = gateway.stats()["agents"]["diet"]
+    assert (stats["calls"], stats["errors"], stats["prompt_tokens"]) == (1, 0, 5)
+    assert stats["output_tokens"] == len(text.split())
+    assert gateway.stats()["models"][MODEL]["in_flight"] == 0
+
+
+def test_abandoned_stream_is_recorded_as_an_error_and_frees_its_slot():
+    gateway = LLMGateway(FakeLLM(latency=0.02), max_concurrency=1, rpm=0)
+
+    async def run():
+        chunks = gateway.stream("Return the plan as ```json", "diet", MODEL)
+        await chunks.__anext__()
+        await chunks.aclose()
+        # The slot is free again.
+        return await asyncio.wait_for(gateway.generate("question", "qa", MODEL), 1)
+
+    assert asyncio.run(run()).startswith("Rest well")
+    assert gateway.stats()["agents"]["diet"]["errors"] == 1
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.setenv("LLM_BACKEND", "fake")
+    assert isinstance(LLMGateway(rpm=0).backend, FakeLLM)
+    monkeypatch.setenv("LLM_BACKEND", "gemini")
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    with pytest.raises(ValueError):
+        LLMGateway(rpm=0)
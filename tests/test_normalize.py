@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("regex")
+
+MODEL_HOME = os.path.join(os.path.dirname(__file__), "..", "models", "indictrans2-indic-indic-1b")
+if MODEL_HOME not in sys.path:
+    # The inference package is imported the way the IndicTrans2 backend and the Triton server do.
+    sys.path.insert(0, MODEL_HOME)
+
+from inference.benchmark_normalize import TEMPLATES, reference_normalize, synthetic_corpus  # noqa: E402
+from inference.normalize_regex_inference import normalize  # noqa: E402
+
+EDGE_CASES = [
+    "",
+    "\n",
+    "plain sentence without anything to wrap\n",
+    "डॉ. ए. के. शर्मा से मिलें।",
+    "Visit www.aarogya.in/book/ or https://clinic.example.org/a?id=12 today.",
+    "Mail a.b+c@example.co.in and ping @doc_1 #tag|other",
+    "BP १२०/८० and sugar ११०-१४० mg/dl, HbA1c 7.5 % to 8.2 %",
+    "Emergency: call 108|102, e.g. 9812345678 at 10:30.",
+    "Repeated 12/05/2024 and 12/05/2024 again, plus 1:2",
+    "tabs\tand   spaces\n\nand newlines",
+    "Dose: １２.５ mg at ０８:３０",
+    "<ID1> already looks like a placeholder 2024-01-01",
+]
+
+
+@pytest.mark.parametrize("sentence", EDGE_CASES + TEMPLATES)
+def test_fast_path_matches_reference(sentence):
+    assert normalize(sentence) == reference_normalize(sentence)
+
+
+def test_fast_path_matches_reference_on_synthetic_corpus():
+    mismatches = [sent for sent in synthetic_corpus(5000) if normalize(sent) != reference_normalize(sent)]
+    assert mismatches == []
+
+
+def test_placeholders_map_back_to_matches():
+    text, mapping = normalize("Write to patient7@example.com on ३१/१२/2024")
+    assert text == "Write to <ID1> on <ID2>"
+    assert mapping["<ID1>"] == "patient7@example.com"
+    assert mapping["< ID2 >"] == "31/12/2024"
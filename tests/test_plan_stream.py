@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from src.ai_pipeline.plan_stream import DietPlanStreamParser, PlanStreamError
+
+MEALS = [{"time": "07:00-08:00", "type": "Breakfast", "details": "Vegetable upma"}]
+PLAN = "```json\n" + json.dumps({"days": {"1": MEALS, "2": MEALS}, "score": 123, "ratio": 12.5, "notes": "Drink water."}) + "\n```"
+
+
+def parse(chunks):
+    parser = DietPlanStreamParser()
+    days = [day for chunk in chunks for day, _ in parser.feed(chunk)]
+    return days, parser.finish()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(PLAN)])
+def test_every_chunk_boundary_gives_the_same_plan(size):
+    days, plan = parse([PLAN[i:i + size] for i in range(0, len(PLAN), size)])
+    assert days == ["1", "2"]
+    assert plan == json.loads(PLAN[len("```json\n"):-len("\n```")])
+
+
+@pytest.mark.parametrize("split", ['"score": 1', '"score": 12', '"ratio": 12', '"ratio": 12.'])
+def test_top_level_number_split_at_chunk_boundary(split):
+    cut = PLAN.index(split) + len(split)
+    _, plan = parse([PLAN[:cut], PLAN[cut:]])
+    assert plan["score"] == 123
+    assert plan["ratio"] == 12.5
+
+
+def test_invalid_number_is_rejected():
+    parser = DietPlanStreamParser()
+    with pytest.raises(PlanStreamError):
+        parser.feed('{"score": 12.x')
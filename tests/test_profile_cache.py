@@ -0,0 +1,111 @@
+import pytest
+
+from src.database import profile_cache
+from src.database.profile_cache import ProfileCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def cache(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(profile_cache.time, "monotonic", clock)
+    return ProfileCache(**kwargs), clock
+
+
+def test_lru_evicts_least_recently_used(monkeypatch):
+    c, _ = cache(monkeypatch, max_size=2, ttl=60)
+    c.put("a", {"name": "A"})
+    c.put("b", {"name": "B"})
+    assert c.get("a") == {"name": "A"}
+    c.put("c", {"name": "C"})
+    assert c.get("b") is None
+    assert c.get("a") == {"name": "A"}
+    assert c.get("c") == {"name": "C"}
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    c, clock = cache(monkeypatch, max_size=10, ttl=60)
+    c.put("a", {"name": "A"})
+    clock.now += 59
+    assert c.get("a") == {"name": "A"}
+    clock.now += 2
+    assert c.get("a") is None
+    assert c.stats()["size"] == 0
+
+
+def test_write_through_update_and_invalidation(monkeypatch):
+    c, _ = cache(monkeypatch, max_size=10, ttl=60)
+    c.update("a", {"age": 30})
+    assert c.get("a") is None  # updates never create partial entries
+    c.put("a", {"name": "A", "awaiting_age": True})
+    c.update("a", {"age": 30, "awaiting_age": False})
+    assert c.get("a") == {"name": "A", "age": 30, "awaiting_age": False}
+    c.invalidate("a")
+    assert c.get("a") is None
+
+
+def test_missing_user_is_cached_as_empty_profile(monkeypatch):
+    c, clock = cache(monkeypatch, max_size=10, ttl=60)
+    c.put("new", {})
+    assert c.get("new") == {}
+    clock.now += 61
+    assert c.get("new") is None
+
+
+def test_returned_profiles_are_copies(monkeypatch):
+    c, _ = cache(monkeypatch, max_size=10, ttl=60)
+    c.put("a", {"allergies": ["nuts"]})
+    c.get("a")["allergies"].append("milk")
+    assert c.get("a") == {"allergies": ["nuts"]}
+
+
+def test_clear_and_stats(monkeypatch):
+    c, _ = cache(monkeypatch, max_size=10, ttl=60)
+    c.put("a", {})
+    c.get("a")
+    c.get("b")
+    assert c.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "size": 1}
+    c.clear()
+    assert c.get("a") is None
+
+
+class FakeUsers:
+    def __init__(self, docs):
+        self.docs = docs
+        self.reads = 0
+        self.fail = None
+
+    def find_one(self, query):
+        self.reads += 1
+        return self.docs.get(query["user_id"])
+
+    def update_one(self, query, update, upsert=False):
+        if self.fail:
+            raise self.fail
+        self.docs.setdefault(query["user_id"], {}).update(update["$set"])
+
+
+def test_mongodb_handle_caches_profiles_and_invalidates_on_failed_write():
+    errors = pytest.importorskip("pymongo.errors")
+    from src.database.mongodb import MongoDB
+
+    users = FakeUsers({"a": {"user_id": "a", "name": "A"}})
+    db = MongoDB(client={"aarogyaai": {"users": users, "interactions": None, "prompt_cache": None,
+                                       "diet_plan_library": None, "prompts": None}})
+    assert db.get_user("a")["name"] == "A"
+    assert db.get_user("a")["name"] == "A"
+    assert db.get_user("missing") == {} and db.get_user("missing") == {}
+    assert users.reads == 2
+
+    assert db.save_user({"user_id": "a", "age": 30})
+    assert db.get_user("a")["age"] == 30
+    users.fail = errors.PyMongoError("down")
+    assert not db.save_user({"user_id": "a", "age": 31})
+    assert db.get_user("a")["age"] == 30
+    assert users.reads == 3
@@ -0,0 +1,197 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.utils import retry
+from src.utils.retry import (
+    CircuitBreaker, CircuitOpenError, OutputFormatError, RetryableError, RetryPolicy, is_retryable
+)
+
+
+class FakeTime:
+    """Replaces the retry module's clock: sleeping advances it instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(retry, "time", fake)
+    # Deterministic backoff: always the upper bound of the jitter range.
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: high)
+    return fake
+
+
+class Failing:
+    def __init__(self, *errors, result="ok"):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+def policy(**kwargs):
+    kwargs.setdefault("breaker", CircuitBreaker("test", failure_threshold=100))
+    return RetryPolicy("test", **kwargs)
+
+
+def test_deadline_stops_retries(clock):
+    fn = Failing(*[ConnectionError("reset")] * 10)
+    with pytest.raises(ConnectionError):
+        policy(max_attempts=10, base_delay=1.0, deadline=5.0).call_sync(fn)
+    # Backoffs of 1s and 2s fit in the 5s deadline; the next one (4s) would not.
+    assert clock.sleeps == [1.0, 2.0]
+    assert fn.calls == 3
+
+
+def test_attempts_are_bounded(clock):
+    fn = Failing(*[TimeoutError()] * 10)
+    with pytest.raises(TimeoutError):
+        policy(max_attempts=3, base_delay=0.1, deadline=60).call_sync(fn)
+    assert fn.calls == 3
+
+
+def test_transient_errors_are_retried_until_success(clock):
+    fn = Failing(ConnectionError(), RetryableError("bad output"))
+    assert policy(max_attempts=3, base_delay=0.1, deadline=60).call_sync(fn) == "ok"
+    assert fn.calls == 3
+
+
+def test_permanent_errors_fail_fast(clock):
+    fn = Failing(ValueError("bad request"))
+    with pytest.raises(ValueError):
+        policy(max_attempts=5, base_delay=0.1, deadline=60).call_sync(fn)
+    assert fn.calls == 1
+    assert clock.sleeps == []
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (RetryableError(), True),
+    (OutputFormatError(), True),
+    (TimeoutError(), True),
+    (asyncio.TimeoutError(), True),
+    (ConnectionResetError(), True),
+    (CircuitOpenError(), False),
+    (ValueError(), False),
+    (KeyError(), False),
+])
+def test_is_retryable(exc, expected):
+    assert is_retryable(exc) is expected
+
+
+@pytest.mark.parametrize("status, expected", [(429, True), (503, True), (400, False), (404, False)])
+def test_is_retryable_http_status(status, expected):
+    request = httpx.Request("GET", "http://example.test")
+    response = httpx.Response(status, request=request)
+    assert is_retryable(httpx.HTTPStatusError("error", request=request, response=response)) is expected
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_reset(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    p = RetryPolicy("test", max_attempts=1, breaker=breaker)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            p.call_sync(Failing(ConnectionError()))
+    assert breaker.state == "open"
+
+    fn = Failing()
+    with pytest.raises(CircuitOpenError):
+        p.call_sync(fn)
+    assert fn.calls == 0
+
+    clock.now += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.release_trial()
+    assert p.call_sync(fn) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens_breaker(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    p = RetryPolicy("test", max_attempts=1, breaker=breaker)
+    with pytest.raises(ConnectionError):
+        p.call_sync(Failing(ConnectionError()))
+    clock.now += 30
+    with pytest.raises(ConnectionError):
+        p.call_sync(Failing(ConnectionError()))
+    assert breaker.state == "open"
+
+
+def test_permanent_error_resets_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    p = RetryPolicy("test", max_attempts=1, breaker=breaker)
+    for error in (ConnectionError(), ValueError(), ConnectionError()):
+        with pytest.raises(type(error)):
+            p.call_sync(Failing(error))
+    assert breaker.state == "closed"
+
+
+def test_output_format_errors_do_not_trip_breaker(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    p = RetryPolicy("test", max_attempts=3, base_delay=0.1, deadline=60, breaker=breaker)
+    for _ in range(3):
+        with pytest.raises(OutputFormatError):
+            p.call_sync(Failing(*[OutputFormatError("not JSON")] * 3))
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_cancelled_trial_is_released(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    p = RetryPolicy("test", max_attempts=1, breaker=breaker)
+    with pytest.raises(ConnectionError):
+        p.call_sync(Failing(ConnectionError()))
+    clock.now += 30
+
+    async def run():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.Event().wait()
+
+        probe = asyncio.create_task(p.call(hang))
+        await started.wait()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        async def ok():
+            return "ok"
+
+        return await p.call(ok)
+
+    assert asyncio.run(run()) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_async_call_retries_and_honours_deadline():
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(1)
+
+    p = policy(max_attempts=5, base_delay=0.001, deadline=0.05)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(p.call(slow))
+    # The first attempt uses up the whole deadline, so there is no time left for another one.
+    assert len(calls) == 1
@@ -0,0 +1,197 @@
+import asyncio
+
+import pytest
+
+from src.utils import singleflight
+from src.utils.singleflight import SingleFlight
+
+
+class FakeTime:
+    """Replaces the singleflight module's clock, leaving the event loop's alone."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(singleflight, "time", fake)
+    return fake
+
+
+class Call:
+    """Counts invocations and finishes when released."""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, *args):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result if self.result is not None else args
+
+
+def test_followers_share_the_leaders_result():
+    async def run():
+        flights = SingleFlight("test")
+        call = Call()
+        callers = [asyncio.ensure_future(flights.do("key", call, "a")) for _ in range(3)]
+        await asyncio.sleep(0)
+        call.release.set()
+        return flights, call, await asyncio.gather(*callers)
+
+    flights, call, results = asyncio.run(run())
+    assert call.calls == 1
+    assert results == [(("a",), False), (("a",), True), (("a",), True)]
+    assert flights.stats()["leaders"] == 1 and flights.stats()["followers"] == 2
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_followers_share_the_leaders_exception():
+    async def run():
+        flights = SingleFlight("test")
+        call = Call(error=ConnectionError("down"))
+        callers = [asyncio.ensure_future(flights.do("key", call)) for _ in range(2)]
+        await asyncio.sleep(0)
+        call.release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        # A failure is not reused: the next caller starts a new call.
+        call.error = None
+        call.result = "ok"
+        return results, await flights.do("key", call), call.calls
+
+    results, retry, calls = asyncio.run(run())
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert retry == ("ok", False)
+    assert calls == 2
+
+
+def test_without_ttl_finished_calls_are_not_reused():
+    async def run():
+        flights = SingleFlight("test")
+        call = Call(result="ok")
+        call.release.set()
+        return [await flights.do("key", call) for _ in range(2)], call.calls
+
+    assert asyncio.run(run()) == ([("ok", False), ("ok", False)], 2)
+
+
+def test_ttl_memo_expires(clock):
+    async def run():
+        flights = SingleFlight("test", ttl=10)
+        call = Call(result="ok")
+        call.release.set()
+        first = await flights.do("key", call)
+        clock.now += 9
+        memo = await flights.do("key", call)
+        clock.now += 2
+        expired = await flights.do("key", call)
+        return flights, call.calls, [first, memo, expired]
+
+    flights, calls, results = asyncio.run(run())
+    assert results == [("ok", False), ("ok", True), ("ok", False)]
+    assert calls == 2
+    assert flights.stats()["memo_hits"] == 1
+
+
+def test_expired_entries_are_dropped_when_new_ones_are_remembered(clock):
+    async def run():
+        flights = SingleFlight("test", ttl=10)
+        call = Call(result="ok")
+        call.release.set()
+        await flights.do("old", call)
+        clock.now += 11
+        await flights.do("new", call)
+        return flights.stats()["remembered"]
+
+    assert asyncio.run(run()) == 1
+
+
+def test_rejected_results_are_not_reused(clock):
+    async def run():
+        flights = SingleFlight("test", ttl=10, remember_if=lambda result: result[1])
+        call = Call(result=("Sorry, try again", False))
+        call.release.set()
+        first = await flights.do("key", call)
+        call.result = ("answer", True)
+        second = await flights.do("key", call)
+        third = await flights.do("key", call)
+        return [first, second, third], call.calls
+
+    results, calls = asyncio.run(run())
+    assert results == [(("Sorry, try again", False), False), (("answer", True), False), (("answer", True), True)]
+    assert calls == 2
+
+
+def test_cancelled_leader_does_not_leave_a_fallback_behind(clock):
+    async def run():
+        flights = SingleFlight("test", ttl=10, remember_if=lambda result: result[1])
+        call = Call(result=("Sorry, try again", False))
+        leader = asyncio.ensure_future(flights.do("key", call))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("key", call))
+        await asyncio.sleep(0)
+        # The leader's caller gives up; the call keeps running for the follower.
+        leader.cancel()
+        await asyncio.sleep(0)
+        call.release.set()
+        shared = await follower
+        await asyncio.sleep(0)
+        call.result = ("answer", True)
+        retry = await flights.do("key", call)
+        return leader.cancelled(), shared, retry, flights.stats()
+
+    cancelled, shared, retry, stats = asyncio.run(run())
+    assert cancelled
+    assert shared == (("Sorry, try again", False), True)
+    assert retry == (("answer", True), False)
+    assert stats["memo_hits"] == 0
+
+
+def test_call_finishing_after_every_caller_gave_up(clock):
+    async def run():
+        flights = SingleFlight("test", ttl=10)
+        call = Call(result="ok")
+        try:
+            await asyncio.wait_for(flights.do("key", call), 0.01)
+        except asyncio.TimeoutError:
+            pass
+        call.release.set()
+        await asyncio.sleep(0)
+        return await flights.do("key", call), call.calls
+
+    # The abandoned call still completed and its result is reused.
+    assert asyncio.run(run()) == (("ok", True), 1)
+
+
+def test_cancelled_call_is_not_remembered(clock):
+    async def run():
+        flights = SingleFlight("test", ttl=10)
+        call = Call(result="ok")
+        caller = asyncio.ensure_future(flights.do("key", call))
+        await asyncio.sleep(0)
+        flights._calls["key"].cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        call.release.set()
+        return await flights.do("key", call), flights.stats()
+
+    result, stats = asyncio.run(run())
+    assert result == ("ok", False)
+    assert stats["remembered"] == 1 and stats["in_flight"] == 0
+
+
+def test_get_singleflight_returns_one_group_per_name():
+    group = singleflight.get_singleflight("test-group", 5)
+    assert singleflight.get_singleflight("test-group") is group
+    assert group.ttl == 5
+    assert "test-group" in singleflight.singleflight_stats()
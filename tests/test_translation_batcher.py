@@ -0,0 +1,176 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.input_processing.translation_batcher import TranslationMicroBatcher, estimate_tokens
+
+
+class StubModel:
+    """Stands in for the IndicTrans2 Model; records every batch and can be held mid-batch."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def paragraphs_batch_translate__multilingual(self, requests):
+        self.batches.append([paragraph for paragraph, _, _ in requests])
+        self.entered.set()
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("decoder crashed")
+        return [f"{tgt}:{paragraph}" for paragraph, _, tgt in requests]
+
+
+def batcher_for(model, **kwargs):
+    kwargs.setdefault("max_wait_ms", 20)
+    return TranslationMicroBatcher(lambda: model, **kwargs)
+
+
+async def translate_all(batcher, paragraphs):
+    return await asyncio.gather(*(batcher.submit(p, "en", "hi") for p in paragraphs))
+
+
+async def entered(model):
+    while not model.entered.is_set():
+        await asyncio.sleep(0.001)
+
+
+def test_lone_request_flushes_after_max_wait():
+    model = StubModel()
+    batcher = batcher_for(model, max_wait_ms=30)
+
+    async def run():
+        result = await batcher.submit("hello", "en", "hi")
+        await batcher.close()
+        return result
+
+    assert asyncio.run(run()) == "hi:hello"
+    stats = batcher.stats()
+    assert stats["flush_reasons"]["timeout"] == 1
+    assert stats["max_wait_ms"] >= 30
+
+
+def test_concurrent_requests_share_a_batch():
+    model = StubModel()
+    batcher = batcher_for(model)
+
+    async def run():
+        results = await translate_all(batcher, ["a", "b", "c"])
+        await batcher.close()
+        return results
+
+    assert asyncio.run(run()) == ["hi:a", "hi:b", "hi:c"]
+    assert model.batches == [["a", "b", "c"]]
+
+
+def test_item_cap():
+    model = StubModel()
+    batcher = batcher_for(model, max_items=3)
+    paragraphs = [str(i) for i in range(7)]
+
+    async def run():
+        results = await translate_all(batcher, paragraphs)
+        await batcher.close()
+        return results
+
+    assert asyncio.run(run()) == [f"hi:{p}" for p in paragraphs]
+    assert model.batches == [["0", "1", "2"], ["3", "4", "5"], ["6"]]
+    assert batcher.flush_reasons == {"timeout": 1, "tokens": 0, "items": 2}
+
+
+def test_token_cap_carries_the_overflowing_request_to_the_next_batch():
+    model = StubModel()
+    paragraphs = ["one two three", "four five six", "seven eight nine", "ten"]
+    budget = estimate_tokens(paragraphs[0]) * 2
+    batcher = batcher_for(model, max_tokens=budget)
+
+    async def run():
+        results = await translate_all(batcher, paragraphs)
+        await batcher.close()
+        return results
+
+    assert asyncio.run(run()) == [f"hi:{p}" for p in paragraphs]
+    # The third request did not fit the first batch and leads the second one.
+    assert model.batches == [paragraphs[:2], paragraphs[2:]]
+    assert batcher.flush_reasons["tokens"] == 1
+    assert batcher.stats()["avg_batch_tokens"] <= budget
+
+
+def test_failed_batch_fails_its_callers_only():
+    model = StubModel(fail=True)
+    batcher = batcher_for(model)
+
+    async def run():
+        with pytest.raises(RuntimeError, match="decoder crashed"):
+            await batcher.submit("a", "en", "hi")
+        model.fail = False
+        result = await batcher.submit("b", "en", "hi")
+        await batcher.close()
+        return result
+
+    assert asyncio.run(run()) == "hi:b"
+    assert batcher.failed_batches == 1
+
+
+def test_queue_bound_rejects():
+    batcher = batcher_for(StubModel(), max_queue_size=1)
+
+    async def run():
+        first = asyncio.ensure_future(batcher.submit("a", "en", "hi"))
+        await asyncio.sleep(0)
+        # The batching task has not run yet, so "a" still occupies the only slot.
+        with pytest.raises(asyncio.QueueFull):
+            await batcher.submit("b", "en", "hi")
+        result = await first
+        await batcher.close()
+        return result
+
+    assert asyncio.run(run()) == "hi:a"
+    assert batcher.rejected == 1
+
+
+def test_close_resolves_in_flight_and_queued_requests():
+    model = StubModel()
+    model.release.clear()
+    batcher = batcher_for(model)
+
+    async def run():
+        in_flight = asyncio.ensure_future(batcher.submit("a", "en", "hi"))
+        await entered(model)
+        queued = asyncio.ensure_future(batcher.submit("b", "en", "hi"))
+        await asyncio.sleep(0)
+        await batcher.close()
+        model.release.set()
+        return await asyncio.gather(in_flight, queued, return_exceptions=True)
+
+    in_flight, queued = asyncio.run(run())
+    assert isinstance(in_flight, RuntimeError) and "closed" in str(in_flight)
+    assert isinstance(queued, asyncio.CancelledError)
+
+
+def test_restart_fails_the_lost_batch_and_keeps_the_queue():
+    model = StubModel()
+    model.release.clear()
+    batcher = batcher_for(model)
+
+    async def run():
+        lost = asyncio.ensure_future(batcher.submit("a", "en", "hi"))
+        await entered(model)
+        waiting = asyncio.ensure_future(batcher.submit("b", "en", "hi"))
+        await asyncio.sleep(0)
+        batcher._task.cancel()
+        await asyncio.sleep(0)
+        model.release.set()
+        later = await batcher.submit("c", "en", "hi")
+        results = await asyncio.gather(lost, waiting, return_exceptions=True)
+        await batcher.close()
+        return results + [later]
+
+    lost, waiting, later = asyncio.run(run())
+    assert isinstance(lost, RuntimeError) and "stopped" in str(lost)
+    assert (waiting, later) == ("hi:b", "hi:c")
+    assert model.batches[-1] == ["b", "c"]
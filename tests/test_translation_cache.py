@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from src.input_processing import translation_cache as module
+from src.input_processing.translation_cache import TranslationCache, cache_key, normalize_text
+
+DECOMPOSED = "né"  # "né" as e + combining acute
+COMPOSED = "né"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "translations.sqlite3")
+
+
+def test_normalize_text():
+    assert normalize_text(DECOMPOSED) == COMPOSED
+    assert normalize_text("  take\t two \n tablets ") == "take two tablets"
+
+
+def test_cache_key_normalizes_text_and_separates_engines(monkeypatch):
+    assert cache_key(DECOMPOSED, "en", "hi", "google") == cache_key(f" {COMPOSED}  ", "en", "hi", "google")
+    assert cache_key("hello", "en", "hi", "google") != cache_key("hello", "en", "hi", "indictrans2")
+    assert cache_key("hello", "en", "hi", "google") != cache_key("hello", "en", "ta", "google")
+    before = cache_key("hello", "en", "hi", "google")
+    monkeypatch.setattr(module, "TRANSLATION_ENGINE_VERSION", "google-v3")
+    assert cache_key("hello", "en", "hi", "google") != before
+
+
+def test_memory_hit_and_engine_preference():
+    async def run():
+        cache = TranslationCache(path="")
+        await cache.put("hello", "en", "hi", "namaste-g", "google")
+        await cache.put("hello", "en", "hi", "namaste-i", "indictrans2")
+        return (
+            await cache.get("hello", "en", "hi", ["indictrans2", "google"]),
+            await cache.get("hello", "en", "hi", ["google"]),
+            await cache.get("hello", "en", "hi", ["deep_translator"]),
+            cache.stats()
+        )
+
+    preferred, fallback, miss, stats = asyncio.run(run())
+    assert (preferred, fallback, miss) == ("namaste-i", "namaste-g", None)
+    assert (stats["memory_hits"], stats["persistent_hits"], stats["misses"]) == (2, 0, 1)
+
+
+def test_persistent_tier_survives_instances_and_promotes_to_memory(db_path):
+    async def run():
+        writer = TranslationCache(path=db_path)
+        await writer.put("hello", "en", "hi", "namaste", "google")
+        writer.close()
+
+        reader = TranslationCache(path=db_path)
+        first = await reader.get(" hello ", "en", "hi", ["google"])
+        second = await reader.get("hello", "en", "hi", ["google"])
+        reader.close()
+        return first, second, reader.stats()
+
+    first, second, stats = asyncio.run(run())
+    assert first == second == "namaste"
+    assert (stats["persistent_hits"], stats["memory_hits"], stats["size"]) == (1, 1, 1)
+
+
+def test_persistent_lookup_respects_engine_order(db_path):
+    async def run():
+        writer = TranslationCache(path=db_path)
+        await writer.put("hello", "en", "hi", "namaste-g", "google")
+        await writer.put("hello", "en", "hi", "namaste-i", "indictrans2")
+        writer.close()
+        reader = TranslationCache(path=db_path)
+        try:
+            return await reader.get("hello", "en", "hi", ["indictrans2", "google"])
+        finally:
+            reader.close()
+
+    assert asyncio.run(run()) == "namaste-i"
+
+
+def test_expired_entries_are_misses_and_purged(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "time", lambda: now[0])
+
+    async def run():
+        cache = TranslationCache(ttl=60, path=db_path)
+        await cache.put("hello", "en", "hi", "namaste", "google")
+        now[0] += 61
+        result = await cache.get("hello", "en", "hi", ["google"])
+        return cache, result
+
+    cache, result = asyncio.run(run())
+    assert result is None
+    assert cache.purge_expired() == 1
+    cache.close()
+
+
+def test_lru_bound():
+    async def run():
+        cache = TranslationCache(max_size=2, path="")
+        for word in ("one", "two", "three"):
+            await cache.put(word, "en", "hi", word.upper(), "google")
+        return [await cache.get(word, "en", "hi", ["google"]) for word in ("one", "two", "three")]
+
+    assert asyncio.run(run()) == [None, "TWO", "THREE"]
+
+
+def test_unwritable_path_disables_persistent_tier(tmp_path):
+    async def run():
+        cache = TranslationCache(path=str(tmp_path / "missing" / "cache.sqlite3"))
+        await cache.put("hello", "en", "hi", "namaste", "google")
+        return cache, await cache.get("hello", "en", "hi", ["google"])
+
+    cache, result = asyncio.run(run())
+    assert result == "namaste"
+    assert cache.path is None
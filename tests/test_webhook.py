@@ -0,0 +1,154 @@
+import asyncio
+import json
+
+import httpx
+
+from src.bot.dispatcher import PerUserUpdateProcessor
+from src.bot.fake_telegram import FakeBotAPI, FakeTelegramSender
+from src.bot.webhook import SECRET_HEADER, WebhookIngress, serve_http
+
+SECRET = "s3cret"
+
+
+class FakeApplication:
+    """The parts of a PTB Application the ingress uses; handled updates are recorded per user."""
+
+    def __init__(self, delay=0.0):
+        self.bot = None
+        self.bot_data = {}
+        self.update_processor = PerUserUpdateProcessor(8)
+        self.delay = delay
+        self.handled = []
+
+    async def process_update(self, update):
+        await asyncio.sleep(self.delay)
+        self.handled.append((update.effective_user.id, update.message.text))
+
+
+def ingress(app=None, **kwargs):
+    kwargs.setdefault("secret_token", SECRET)
+    return WebhookIngress(app or FakeApplication(), **kwargs)
+
+
+async def served(handler):
+    server = await serve_http(handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}"
+
+
+def body(update):
+    return json.dumps(update).encode()
+
+
+def test_valid_update_is_acknowledged_over_http():
+    async def run():
+        hook = ingress()
+        server, url = await served(hook.handle)
+        async with server:
+            sender = FakeTelegramSender(url + "/telegram", SECRET)
+            status = await sender.send(sender.text_update(42, "/start"))
+        return status, hook
+
+    status, hook = asyncio.run(run())
+    assert status == 200
+    assert hook.queue.qsize() == 1
+    assert hook.stats()["accepted"] == 1
+
+
+def test_bad_secret_is_rejected_over_http():
+    async def run():
+        hook = ingress()
+        server, url = await served(hook.handle)
+        async with server:
+            sender = FakeTelegramSender(url + "/telegram", "wrong")
+            return await sender.send(sender.text_update(42, "hi")), hook
+
+    status, hook = asyncio.run(run())
+    assert status == 401
+    assert hook.queue.qsize() == 0
+
+
+def test_undecodable_body_is_rejected():
+    async def run():
+        hook = ingress()
+        return await hook.handle("POST", "/telegram", {SECRET_HEADER: SECRET}, b"{not json")
+
+    assert asyncio.run(run())[0] == 400
+
+
+def test_unknown_path_and_method():
+    async def run():
+        hook = ingress()
+        headers = {SECRET_HEADER: SECRET}
+        return (
+            (await hook.handle("POST", "/other", headers, b"{}"))[0],
+            (await hook.handle("GET", "/telegram", headers, b""))[0],
+        )
+
+    assert asyncio.run(run()) == (404, 405)
+
+
+def test_full_queue_answers_503_counting_backlogged_updates():
+    async def run():
+        hook = ingress(max_queue_size=2)
+        sender = FakeTelegramSender("unused")
+        headers = {SECRET_HEADER: SECRET}
+        statuses = [(await hook.handle("POST", "/telegram", headers, body(sender.text_update(1, "x"))))[0] for _ in range(3)]
+        # Backlogged updates count against the limit too.
+        hook.queue.get_nowait()
+        hook.backlogged = 1
+        statuses.append((await hook.handle("POST", "/telegram", headers, body(sender.text_update(2, "y"))))[0])
+        return statuses, hook.stats()
+
+    statuses, stats = asyncio.run(run())
+    assert statuses == [200, 200, 503, 503]
+    assert stats["rejected"] == 2
+
+
+def test_workers_keep_each_users_order_and_drain_finishes_queued_work():
+    async def run():
+        app = FakeApplication(delay=0.005)
+        hook = ingress(app, workers=4)
+        sender = FakeTelegramSender("unused")
+        headers = {SECRET_HEADER: SECRET}
+        for i in range(6):
+            for user in (1, 2):
+                await hook.handle("POST", "/telegram", headers, body(sender.text_update(user, f"{user}-{i}")))
+        hook.start_workers()
+        await hook.drain()
+        return app.handled, hook
+
+    handled, hook = asyncio.run(run())
+    assert len(handled) == 12
+    for user in (1, 2):
+        assert [text for owner, text in handled if owner == user] == [f"{user}-{i}" for i in range(6)]
+    assert hook.stats() == {"queue_depth": 0, "backlogged": 0, "in_flight": 0, "accepted": 12, "rejected": 0}
+    assert hook._workers == []
+
+
+def test_cluster_busy_reports_pending_owners():
+    async def run():
+        hook = ingress()
+        sender = FakeTelegramSender("unused")
+        await hook.handle("POST", "/telegram", {SECRET_HEADER: SECRET}, body(sender.text_update(7, "x")))
+        denied = await hook.handle("GET", "/cluster/busy", {}, b"")
+        busy = await hook.handle("GET", "/cluster/busy", {SECRET_HEADER: SECRET}, b"")
+        return denied, busy
+
+    denied, busy = asyncio.run(run())
+    assert denied[0] == 401
+    assert busy == (200, {"owners": ["7"]})
+
+
+def test_fake_bot_api_records_calls():
+    async def run():
+        api = FakeBotAPI()
+        server, url = await served(api.handle)
+        async with server:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(url + "/botTOKEN/sendMessage", json={"chat_id": 42, "text": "hello"})
+        return response.json(), api.calls
+
+    payload, calls = asyncio.run(run())
+    assert payload["ok"] and payload["result"]["text"] == "hello"
+    assert calls == [("sendMessage", {"chat_id": 42, "text": "hello"})]